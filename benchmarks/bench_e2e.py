@@ -0,0 +1,424 @@
+"""End-to-end benchmarks against a local stub LLM (see stub_llm.py).
+
+Drives CrewEngine.run, CrewEngine.process_message and the FastAPI endpoints
+with the real crewai stack; only the model is replaced. Each case runs in a
+fresh subprocess inside a temporary working directory, so peak RSS is per
+case and nothing touches ./projects. Results are written as JSON:
+
+    {"meta": {...}, "results": [{"name", "throughput_per_s", "p50_s", "p95_s",
+                                 "overhead_p50_s", "peak_rss_mb", ...}]}
+
+"overhead" is latency minus the time the stub spent emulating the model,
+i.e. what the orchestrator itself costs.
+
+--tiers runs every case once per role -> tier assignment (LLM_ROLE_TIERS
+syntax, "default" for the configured one). Pointed at real models with
+--base-url, this compares run time and approval rate across tierings:
+
+    python benchmarks/bench_e2e.py [--quick] [--output results.json]
+    python benchmarks/bench_e2e.py --compare baseline.json results.json
+    python benchmarks/bench_e2e.py --scenarios run \
+        --base-url http://gpu:11434/v1 --fast-model openai/qwen3:1.7b \
+        --tiers default "*=main" "*=fast"
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from src.memory_store import ENTRY_HEADING  # noqa: E402
+
+SCENARIOS = ("run", "message_task", "message_chat", "api_run", "api_jobs")
+FAILED_PREFIXES = ("Crew execution failed", "Fix cycle execution failed")
+DONE_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = (len(ordered) - 1) * pct / 100
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def outcome_of(result):
+    """A run's outcome from its result text, as the engine classifies it."""
+    if not isinstance(result, str) or result.startswith(FAILED_PREFIXES):
+        return "error"
+    return "rejected" if "REJECTED" in result.upper() else "approved"
+
+
+def populate_project(project_dir, size):
+    """A project with `size` modules and as many memory entries.
+
+    The entries are written the way the engine records features, so memory
+    retrieval ranks them and prompts grow like a real project's.
+    """
+    code_dir = os.path.join(project_dir, "code")
+    os.makedirs(code_dir, exist_ok=True)
+    for i in range(size):
+        package = os.path.join(code_dir, f"pkg{i // 50}")
+        os.makedirs(package, exist_ok=True)
+        with open(os.path.join(package, f"module_{i}.py"), "w") as f:
+            f.write(f"def feature_{i}(value):\n    return value + {i}\n")
+    with open(os.path.join(project_dir, "memory.md"), "w") as f:
+        f.write("# Project Memory\n")
+        for i in range(size):
+            f.write(
+                f"\n{ENTRY_HEADING} feature {i}\n\n**Result Summary:**\n"
+                f"APPROVED: Added feature_{i} to pkg{i // 50}.\n\n---\n"
+            )
+
+
+# --- Worker: one case, in its own process ---
+
+def run_case(case):
+    """Runs one benchmark case in this process and returns its result."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from stub_llm import StubLLMServer
+
+    review_script = {"rejections": 0}
+    stubs = [] if case.get("base_url") else [
+        StubLLMServer(
+            latency=case["latency"], token_rate=case["token_rate"],
+            review_script=review_script,
+            model_latency=case.get("model_latency")
+        ).start()
+        for _ in range(case.get("endpoints", 1))
+    ]
+    os.environ["OLLAMA_BASE_URL"] = (
+        case.get("base_url") or ",".join(stub.base_url for stub in stubs))
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    if case.get("tiers"):
+        os.environ["LLM_ROLE_TIERS"] = case["tiers"]
+    if case.get("fast_model"):
+        os.environ["LLM_FAST_MODEL"] = case["fast_model"]
+    # Every iteration must reach the model; code execution is not part of
+    # the scripted runs
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["CODE_EXEC_MODE"] = "cold"
+
+    import logging
+    logging.disable(logging.CRITICAL)
+    from src.engine import CrewEngine
+
+    project = "bench"
+    populate_project(os.path.join("projects", project), case["project_size"])
+    scenario = case["scenario"]
+    latencies, overheads, outcomes = [], [], []
+    requests = prompt_tokens = 0
+
+    def measure(operation, iterations, per_iteration=1):
+        """Runs operation() `iterations` times.
+
+        operation() returns one (latency, outcome) per run it made; latency
+        None means its own wall time, outcome None means unknown.
+        """
+        nonlocal requests, prompt_tokens
+        for _ in range(iterations):
+            for stub in stubs:
+                stub.reset(rejections=case["rejections"] * per_iteration)
+            start = time.perf_counter()
+            results = operation()
+            seconds = time.perf_counter() - start
+            stats = {
+                key: sum(stub.stats()[key] for stub in stubs)
+                for key in ("requests", "prompt_tokens", "model_seconds")
+            }
+            requests += stats["requests"]
+            prompt_tokens += stats["prompt_tokens"]
+            latencies.extend(
+                seconds if latency is None else latency
+                for latency, _ in results)
+            outcomes.extend(outcome for _, outcome in results if outcome)
+            # Concurrent model time overlaps, so overhead is only meaningful
+            # for one operation at a time
+            if per_iteration == 1 and stubs:
+                overheads.append(max(0.0, seconds - stats["model_seconds"]))
+
+    if scenario in ("run", "message_task", "message_chat"):
+        engine = CrewEngine(project_name=project)
+        message = {
+            "run": "Add a greeting feature",
+            "message_task": "Add a greeting feature",
+            "message_chat": "What does the greeting module do?"
+        }[scenario]
+        if scenario == "run":
+            def action():
+                return engine.run(message)
+        else:
+            def action():
+                return engine.process_message(message)
+
+        def operation():
+            action()
+            summary = engine.last_run_metrics
+            return [(None, summary["status"] if summary else None)]
+        action()  # warm-up: imports, client creation, first connection
+        start = time.perf_counter()
+        measure(operation, case["iterations"])
+    else:
+        from fastapi.testclient import TestClient
+        from src.server import app
+        client = TestClient(app)
+        client.post(
+            "/run", json={"project_name": project, "user_story": "Warm up"})
+        start = time.perf_counter()
+        if scenario == "api_run":
+            def post_run():
+                response = client.post("/run", json={
+                    "project_name": project,
+                    "user_story": "Add a greeting feature"
+                })
+                return [(None, outcome_of(response.json().get("result")))]
+            measure(post_run, case["iterations"])
+        else:
+            def submit_and_wait():
+                job_ids = [
+                    client.post("/jobs/run", json={
+                        "project_name": f"{project}{i}",
+                        "user_story": "Add a greeting"
+                    }).json()["job_id"]
+                    for i in range(case["concurrency"])
+                ]
+                jobs = {}
+                while len(jobs) < len(job_ids):
+                    time.sleep(0.01)
+                    for job_id in job_ids:
+                        job = client.get(f"/jobs/{job_id}").json()
+                        if job["status"] in DONE_STATUSES:
+                            jobs[job_id] = job
+                # Submission to completion, including time spent queued
+                # behind other jobs
+                return [
+                    (job["finished_at"] - job["created_at"],
+                     outcome_of(job["result"]))
+                    for job in jobs.values()
+                ]
+            for i in range(case["concurrency"]):
+                populate_project(os.path.join("projects", f"{project}{i}"),
+                                 case["project_size"])
+            measure(submit_and_wait, case["iterations"],
+                    per_iteration=case["concurrency"])
+    wall = time.perf_counter() - start
+    for stub in stubs:
+        stub.stop()
+
+    operations = len(latencies)
+    stub_stats = bool(stubs)
+
+    def pct(values, p):
+        return round(percentile(values, p), 4) if values else None
+
+    return dict(case, **{
+        "operations": operations,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(operations / wall, 4) if wall else None,
+        "mean_s": round(statistics.mean(latencies), 4),
+        "p50_s": pct(latencies, 50),
+        "p95_s": pct(latencies, 95),
+        "overhead_p50_s": pct(overheads, 50),
+        "overhead_p95_s": pct(overheads, 95),
+        "approval_rate": (round(outcomes.count("approved") / len(outcomes), 3)
+                          if outcomes else None),
+        "llm_requests_per_op": (round(requests / operations, 1)
+                                if stub_stats else None),
+        "prompt_tokens_per_op": (round(prompt_tokens / operations)
+                                 if stub_stats else None),
+        "peak_rss_mb": peak_rss_mb()
+    })
+
+
+# --- Driver ---
+
+def build_cases(args):
+    cases = []
+    model_latency = {
+        model: float(seconds)
+        for model, seconds in (
+            item.rsplit("=", 1) for item in args.stub_model_latency)
+    }
+    for scenario in args.scenarios:
+        # Chat never reaches the review loop, so rejection counts do not apply
+        rejections = [0] if scenario == "message_chat" else args.rejections
+        for size in args.project_sizes:
+            for rejection_count in rejections:
+                for tiers in args.tiers:
+                    tiers = None if tiers == "default" else tiers
+                    name = f"{scenario}/files={size}"
+                    name += f"/rejections={rejection_count}"
+                    if args.endpoints > 1:
+                        name += f"/endpoints={args.endpoints}"
+                    if tiers:
+                        name += f"/tiers={tiers}"
+                    cases.append({
+                        "name": name,
+                        "scenario": scenario,
+                        "project_size": size,
+                        "rejections": rejection_count,
+                        "iterations": args.iterations,
+                        "concurrency": (args.concurrency
+                                        if scenario == "api_jobs" else 1),
+                        "endpoints": args.endpoints,
+                        "latency": args.latency,
+                        "token_rate": args.token_rate,
+                        "model_latency": model_latency,
+                        "tiers": tiers,
+                        "fast_model": args.fast_model,
+                        "base_url": args.base_url
+                    })
+    return cases
+
+
+def run_in_subprocess(case):
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__),
+             "--worker", json.dumps(case)],
+            cwd=workdir, capture_output=True, text=True
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    tail = (proc.stderr or proc.stdout)[-2000:]
+    return dict(case, error=f"exit code {proc.returncode}: {tail}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline_path, current_path):
+    """Prints per-case changes in latency, throughput, approval and RSS."""
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+    print(f"{'case':<44}{'p50':>10}{'p95':>10}{'throughput':>12}"
+          f"{'approval':>10}{'rss':>9}")
+    for result in current:
+        base = baseline.get(result["name"])
+        if not base or "error" in base or "error" in result:
+            print(f"{result['name']:<44}  (no comparable baseline)")
+            continue
+
+        def change(key):
+            if not base.get(key) or result.get(key) is None:
+                return "-"
+            delta = (result[key] - base[key]) / base[key] * 100
+            return f"{delta:+.1f}%"
+        print(f"{result['name']:<44}{change('p50_s'):>10}"
+              f"{change('p95_s'):>10}{change('throughput_per_s'):>12}"
+              f"{change('approval_rate'):>10}{change('peak_rss_mb'):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    parser.add_argument("--project-sizes", nargs="+", type=int,
+                        default=[0, 200])
+    parser.add_argument("--rejections", nargs="+", type=int, default=[0, 2])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="jobs submitted at once (api_jobs)")
+    parser.add_argument("--endpoints", type=int, default=1,
+                        help="stub LLM servers to balance across")
+    parser.add_argument("--tiers", nargs="+", default=["default"],
+                        help="role tier assignments to compare, e.g. "
+                             'default "*=main" "classifier=fast,docs=fast"')
+    parser.add_argument("--fast-model",
+                        help="model for the fast tier (LLM_FAST_MODEL)")
+    parser.add_argument("--base-url",
+                        help="benchmark a real OpenAI-compatible server "
+                             "instead of the stub")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stub seconds before the first token")
+    parser.add_argument("--stub-model-latency", nargs="*", default=[],
+                        metavar="MODEL=SECONDS",
+                        help="stub time to first token for specific models")
+    parser.add_argument("--token-rate", type=float, default=500,
+                        help="stub completion tokens per second")
+    parser.add_argument("--quick", action="store_true",
+                        help="one size, no rejections, 2 iterations")
+    parser.add_argument("--output",
+                        help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", nargs=2,
+                        metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_case(json.loads(args.worker))
+        print("BENCH_RESULT " + json.dumps(result))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.quick:
+        args.project_sizes, args.rejections, args.iterations = [0], [0], 2
+
+    results = []
+    for case in build_cases(args):
+        print(f"[Bench] {case['name']} ...", file=sys.stderr)
+        result = run_in_subprocess(case)
+        if "error" in result:
+            print(f"[Bench]   failed: {result['error']}", file=sys.stderr)
+        else:
+            approval = ""
+            if result["approval_rate"] is not None:
+                approval = f"  approved {result['approval_rate']:.0%}"
+            print(f"[Bench]   p50 {result['p50_s']:.3f}s  "
+                  f"p95 {result['p95_s']:.3f}s  "
+                  f"{result['throughput_per_s']:.2f}/s{approval}  "
+                  f"rss {result['peak_rss_mb']} MB", file=sys.stderr)
+        results.append(result)
+
+    report = json.dumps({
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "results": results
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
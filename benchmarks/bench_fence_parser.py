@@ -0,0 +1,72 @@
+"""Microbenchmark: code-block extraction on multi-megabyte agent outputs.
+
+Compares the fence parser with the regex the engine used before. In the
+"indented" case the agent indented its whole answer (as the prompts
+themselves are indented), so no fence ever closes at column 0 and the lazy
+DOTALL regex rescans the rest of the output from every heading. In the
+"unclosed" case every 20th file is preceded by a fence that is never
+closed; the parser still reads each line at most twice.
+
+    python benchmarks/bench_fence_parser.py [size_mb]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.fence_parser import parse_code_blocks  # noqa: E402
+
+OLD_PATTERN = r'###\s+([^\n]+)\s+```[^\n]*\n(.*?)\n```'
+
+BLOCK = (
+    "### pkg/module_{i}.py\n```python\n"
+    + "def f(x):\n    return x * 2  # padding padding\n" * 40
+    + "```\n\nSome prose between files.\n\n"
+)
+BROKEN = "### notes.md\n```markdown\nThis fence is never closed.\n\n"
+
+
+def make_output(size_mb, case):
+    parts = []
+    size = 0
+    i = 0
+    while size < size_mb * 1024 * 1024:
+        part = BLOCK.format(i=i)
+        if case == "unclosed" and i % 20 == 10:
+            part = BROKEN + part
+        if case == "indented":
+            part = "".join("    " + line for line in part.splitlines(True))
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def old_regex(text):
+    return list(re.finditer(OLD_PATTERN, text, re.DOTALL))
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    for case in ("balanced", "unclosed", "indented"):
+        text = make_output(size_mb, case)
+        print(f"{case}: {len(text) / 1024 / 1024:.1f} MB")
+        seconds, (blocks, errors) = timed(parse_code_blocks, text)
+        print(f"  fence parser {seconds * 1000:9.1f} ms  "
+              f"{len(blocks)} blocks, {len(errors)} malformed")
+        seconds, matches = timed(old_regex, text)
+        print(f"  old regex    {seconds * 1000:9.1f} ms  "
+              f"{len(matches)} matches")
+
+
+if __name__ == '__main__':
+    main()
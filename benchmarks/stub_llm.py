@@ -0,0 +1,235 @@
+"""Local OpenAI-compatible LLM stub for benchmarks.
+
+Serves /v1/chat/completions (plain and streamed) with scripted answers that
+drive the crew through a whole run: code blocks for the developer and QA,
+a test log for the runner and a verdict for the reviewer. The reviewer
+rejects the first `rejections` reviews after each reset(), so fix iterations
+can be benchmarked; stubs created with the same review_script share that
+count. Every response waits `latency` seconds before the first
+token and then produces tokens at `token_rate` per second (roughly four
+characters per token), so orchestration overhead can be separated from
+model time.
+
+    server = StubLLMServer(latency=0.05, token_rate=500).start()
+    os.environ["OLLAMA_BASE_URL"] = server.base_url
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_CHARS = 16
+_review_lock = threading.Lock()
+
+CODE_ANSWER = """### app/greeting.py
+```python
+def greet(name):
+    return f"Hello, {name}!"
+```
+
+### tests/test_greeting.py
+```python
+from app.greeting import greet
+
+
+def test_greet():
+    assert greet("Ada") == "Hello, Ada!"
+```
+"""
+
+
+# Phrases of the developer and QA task descriptions
+CODE_REQUESTS = ("code in markdown", "Unified diffs", "new test files")
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class StubLLMServer:
+    def __init__(self, latency=0.05, token_rate=500.0, rejections=0,
+                 host="127.0.0.1", port=0, review_script=None,
+                 model_latency=None):
+        self.latency = latency
+        # Per-model time to first token, so model tiers can be compared
+        # ("openai/" prefixes are ignored)
+        self.model_latency = {
+            name.split("/", 1)[-1]: seconds
+            for name, seconds in (model_latency or {}).items()
+        }
+        self.token_rate = token_rate
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Time spent emulating the model, summed over requests
+        self.busy_seconds = 0.0
+        # Remaining rejections; several stubs may share one so a run is
+        # rejected the same wherever it lands
+        if review_script is None:
+            review_script = {"rejections": rejections}
+        self.review_script = review_script
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                # Model listing, used by the endpoint health checks
+                data = json.dumps({
+                    "object": "list",
+                    "data": [{"id": "stub", "object": "model"}]
+                }).encode()
+                found = self.path.endswith("/models")
+                self.send_response(200 if found else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub._handle(self, body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset(self, rejections=0):
+        """Clears the counters and sets how many reviews to reject next."""
+        with self._lock:
+            self.requests = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.busy_seconds = 0.0
+            self.review_script["rejections"] = rejections
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "model_seconds": round(self.busy_seconds, 3)
+            }
+
+    def reply_for(self, messages):
+        """The scripted answer for a request, chosen by what it asks for."""
+        text = "\n".join(str(m.get("content", "")) for m in messages)
+        if "Classify this input" in text:
+            question = text.split("Classify this input:", 1)[1]
+            question = question.split("\n", 1)[0].strip(" '.")
+            return "CHAT" if question.endswith("?") else "TASK"
+        if "Verdict (APPROVED or REJECTED" in text:
+            with _review_lock:
+                reject = self.review_script["rejections"] > 0
+                self.review_script["rejections"] -= 1 if reject else 0
+            if reject:
+                return ("Thought: The tests do not cover errors.\n"
+                        "Final Answer: REJECTED: add a test for empty names.")
+            return ("Thought: Looks good.\n"
+                    "Final Answer: APPROVED: code, tests and docs are fine.")
+        if "Execution logs" in text:
+            return ("Thought: Ran the suite.\n"
+                    "Final Answer: ======== 1 passed in 0.01s ========")
+        if "Documentation content" in text:
+            return ("Thought: Done.\nFinal Answer: ### README.md\n"
+                    "```markdown\n# Greeting\n\nCall greet(name).\n```")
+        if any(ask in text for ask in CODE_REQUESTS):
+            return "Thought: Writing the code.\nFinal Answer: " + CODE_ANSWER
+        if "conversational response" in text:
+            return ("Thought: I can answer.\nFinal Answer: "
+                    "The project has a greeting module with tests.")
+        return ("Thought: Planning.\nFinal Answer: Plan: add app/greeting.py "
+                "with greet(name) and a pytest test.")
+
+    def _handle(self, request, body):
+        messages = body.get("messages", [])
+        content = self.reply_for(messages)
+        prompt_tokens = estimate_tokens(json.dumps(messages))
+        completion_tokens = estimate_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        model = body.get("model", "stub")
+        start = time.perf_counter()
+        latency = self.model_latency.get(model.split("/", 1)[-1], self.latency)
+        time.sleep(latency)
+
+        if body.get("stream"):
+            request.send_response(200)
+            request.send_header("Content-Type", "text/event-stream")
+            request.send_header("Connection", "close")
+            request.end_headers()
+            for i in range(0, len(content), STREAM_CHUNK_CHARS):
+                piece = content[i:i + STREAM_CHUNK_CHARS]
+                self._pace(piece)
+                self._send_event(request, model, {"content": piece}, None)
+            self._send_event(request, model, {}, "stop", usage)
+            request.wfile.write(b"data: [DONE]\n\n")
+            request.close_connection = True
+        else:
+            self._pace(content)
+            message = {"role": "assistant", "content": content}
+            data = json.dumps({
+                "id": "stub", "object": "chat.completion",
+                "created": int(time.time()), "model": model,
+                "choices": [
+                    {"index": 0, "message": message, "finish_reason": "stop"}
+                ],
+                "usage": usage
+            }).encode()
+            request.send_response(200)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("Content-Length", str(len(data)))
+            request.end_headers()
+            request.wfile.write(data)
+
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.busy_seconds += time.perf_counter() - start
+
+    def _pace(self, text):
+        if self.token_rate:
+            time.sleep(estimate_tokens(text) / self.token_rate)
+
+    @staticmethod
+    def _send_event(request, model, delta, finish_reason, usage=None):
+        chunk = {
+            "id": "stub", "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": model,
+            "choices": [
+                {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            ]
+        }
+        if usage:
+            chunk["usage"] = usage
+        request.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        request.wfile.flush()
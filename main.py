@@ -1,6 +1,10 @@
+import argparse
 import os
 import sys
+from src.batch import BATCH_PARALLEL, BATCH_RESULTS_FILE, BatchRunner, format_batch_summary, read_stories
 from src.engine import CrewEngine
+from src.locks import ProjectBusy
+from src.metrics import format_run_summary
 
 def get_project_selection():
     """Lists existing projects and lets the user select one or create new."""
@@ -9,7 +13,8 @@ def get_project_selection():
         os.makedirs(projects_dir)
     
     # Get list of directories
-    projects = [d for d in os.listdir(projects_dir) if os.path.isdir(os.path.join(projects_dir, d))]
+    projects = [d for d in os.listdir(projects_dir)
+                if not d.startswith(".") and os.path.isdir(os.path.join(projects_dir, d))]
     
     print("\n--- Available Projects ---")
     if not projects:
@@ -61,7 +66,40 @@ def get_project_selection():
         
     return project_name, should_init_git, remote_url
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CrewAI Agent Orchestrator")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run the user stories in FILE ('-' for stdin) without prompting, then exit. "
+                             "One JSON object per line: {\"project\": ..., \"story\": ...}")
+    parser.add_argument("--results", default=BATCH_RESULTS_FILE,
+                        help="JSONL file the batch results are appended to; finished stories in it are skipped "
+                             "(default: %(default)s)")
+    parser.add_argument("--parallel", type=int, default=BATCH_PARALLEL,
+                        help="Projects worked on at once (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def run_batch(args):
+    """Runs a batch of stories non-interactively. Returns the process exit code."""
+    try:
+        if args.batch == "-":
+            items = read_stories(sys.stdin)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                items = read_stories(f)
+    except (OSError, ValueError) as e:
+        print(f"[Batch] Could not read {args.batch}: {e}")
+        return 2
+
+    runner = BatchRunner(lambda project: CrewEngine(project_name=project), args.results, args.parallel)
+    results = runner.run(items)
+    print(format_batch_summary(results))
+    return 1 if any(record["status"] == "error" for record in results) else 0
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.batch:
+        sys.exit(run_batch(args))
+
     print("## Welcome to the CrewAI Agent Orchestrator (v2) ##")
     print("----------------------------------------------------")
     
@@ -77,15 +115,31 @@ if __name__ == "__main__":
     meta = engine.get_project_metadata()
     if meta:
         print(f"[System] Version: {meta.get('version', 'unknown')} | Branch: {meta.get('branch', 'unknown')}")
+
+    interrupted = engine.journal.resumable()
+    if interrupted:
+        print(f"[System] The last run ('{interrupted['user_story']}') did not finish. Type 'resume' to continue it.")
     
     while True:
-        user_story = input("\nEnter User Story (or 'exit'): ").strip()
+        user_story = input("\nEnter User Story (or 'resume' / 'exit'): ").strip()
         if user_story.lower() == 'exit' or not user_story:
             break
-            
-        print(f"\n[System] Processing: {user_story}...")
-        result = engine.process_message(user_story)
+
+        try:
+            if user_story.lower() == 'resume':
+                result = engine.resume_run()
+                if result is None:
+                    print("[System] There is no interrupted run to resume.")
+                    continue
+            else:
+                print(f"\n[System] Processing: {user_story}...")
+                result = engine.process_message(user_story)
+        except ProjectBusy as e:
+            print(f"[System] {e}")
+            continue
         
         print("\n--- Result ---")
         print(result)
-        print("--------------")
\ No newline at end of file
+        print("--------------")
+        if engine.last_run_metrics:
+            print(format_run_summary(engine.last_run_metrics))
\ No newline at end of file
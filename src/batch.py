@@ -0,0 +1,223 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuration ---
+# Projects worked on at once; each project's stories always run one after another.
+BATCH_PARALLEL = int(os.getenv("BATCH_PARALLEL", "2"))
+BATCH_RESULTS_FILE = os.getenv("BATCH_RESULTS_FILE", "batch_results.jsonl")
+
+# Outcomes that are final; stories that ended in an error are retried on the next batch run.
+DONE_STATUSES = ("approved", "rejected")
+
+_PROJECT_RE = re.compile(r"^[\w][\w.-]*$")
+
+
+class BatchItem:
+    """One user story of a batch, for one project."""
+
+    def __init__(self, item_id, project, story):
+        self.id = item_id
+        self.project = project
+        self.story = story
+
+    def __repr__(self):
+        return f"BatchItem({self.id!r}, {self.project!r})"
+
+
+def read_stories(stream):
+    """Parses a JSONL stream of {"project": ..., "story": ...} records into BatchItems.
+
+    "user_story" is accepted for "story", and an "id" may be given; without
+    one the id is derived from the project and story, so it stays the same
+    when the file is edited. Blank lines and lines starting with # are skipped.
+    """
+    items = []
+    seen = {}
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {number}: not valid JSON ({e})")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {number}: expected a JSON object")
+        project = str(record.get("project") or "").strip()
+        story = str(record.get("story") or record.get("user_story") or "").strip()
+        if not _PROJECT_RE.match(project):
+            raise ValueError(f"Line {number}: invalid or missing project name '{project}'")
+        if not story:
+            raise ValueError(f"Line {number}: missing story")
+
+        item_id = record.get("id")
+        if item_id is None:
+            item_id = hashlib.sha1(f"{project}\n{story}".encode("utf-8")).hexdigest()[:12]
+        item_id = str(item_id)
+        # The same story twice in one project is run twice
+        seen[item_id] = seen.get(item_id, 0) + 1
+        if seen[item_id] > 1:
+            item_id = f"{item_id}#{seen[item_id]}"
+        items.append(BatchItem(item_id, project, story))
+    return items
+
+
+def load_results(path):
+    """The latest result for each item id in a results file (later lines win)."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            if isinstance(record, dict) and "id" in record:
+                results[record["id"]] = record
+    return results
+
+
+class BatchRunner:
+    """Runs a batch of user stories, several projects at a time.
+
+    Each project's stories run in order on one engine, so a project's files,
+    memory and git history are only ever changed by one run at a time. Every
+    finished story is appended to the results file as one JSON line, which
+    is also the checkpoint: stories whose result is already final there are
+    skipped. A story that ended in an error is retried, and when its
+    project's run journal holds that story's interrupted run, the retry
+    resumes it instead of starting over.
+    """
+
+    def __init__(self, engine_factory, results_path=BATCH_RESULTS_FILE, parallel=BATCH_PARALLEL):
+        self.engine_factory = engine_factory
+        self.results_path = results_path
+        self.parallel = max(1, parallel)
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, items):
+        """Processes the items. Returns the result records written by this run."""
+        done = {
+            item_id for item_id, record in load_results(self.results_path).items()
+            if record.get("status") in DONE_STATUSES
+        }
+        lanes = OrderedDict()
+        for item in items:
+            if item.id not in done:
+                lanes.setdefault(item.project, []).append(item)
+        skipped = len(items) - sum(len(lane) for lane in lanes.values())
+        if skipped:
+            print(f"[Batch] Skipping {skipped} stor{'y' if skipped == 1 else 'ies'} already done in {self.results_path}")
+        print(f"[Batch] {len(items) - skipped} stories across {len(lanes)} project(s), {self.parallel} at a time")
+
+        results = []
+        executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="batch")
+        try:
+            futures = [executor.submit(self._run_lane, project, lane) for project, lane in lanes.items()]
+            for future in futures:
+                results.extend(future.result())
+        except KeyboardInterrupt:
+            # Lanes stop after their current story; its run journal keeps it resumable.
+            print("\n[Batch] Interrupted; finishing the stories in progress...")
+            self._stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return results
+
+    def _run_lane(self, project, items):
+        results = []
+        try:
+            engine = self.engine_factory(project)
+        except Exception as e:
+            for item in items:
+                results.append(self._record(item, _error_record(item, f"Could not open project: {e}")))
+            return results
+        for item in items:
+            if self._stop.is_set():
+                break
+            results.append(self._record(item, self._run_item(engine, item)))
+        return results
+
+    def _run_item(self, engine, item):
+        print(f"[Batch] {item.project}: {item.story}")
+        started_at = _now()
+        start = time.perf_counter()
+        interrupted = engine.journal.resumable()
+        resumed = bool(interrupted and interrupted.get("user_story") == item.story)
+        try:
+            result = engine.resume_run() if resumed else engine.run(item.story)
+        except Exception as e:
+            record = _error_record(item, str(e))
+            record.update(started_at=started_at, seconds=round(time.perf_counter() - start, 3), resumed=resumed)
+            return record
+
+        summary = engine.last_run_metrics or {}
+        return {
+            "id": item.id,
+            "project": item.project,
+            "story": item.story,
+            "status": summary.get("status") or "error",
+            "verdict": _verdict(result),
+            "iterations": summary.get("iterations", 0),
+            "seconds": round(time.perf_counter() - start, 3),
+            "resumed": resumed,
+            "started_at": started_at,
+            "finished_at": _now(),
+            "totals": summary.get("totals", {}),
+            "result": result
+        }
+
+    def _record(self, item, record):
+        with self._write_lock:
+            with open(self.results_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+        print(f"[Batch] {item.project}: {record['status']} ({item.story})")
+        return record
+
+
+def _verdict(result):
+    """The reviewer's verdict line, e.g. "APPROVED" or "REJECTED: tests fail" (else the first line)."""
+    lines = [line.strip() for line in str(result or "").splitlines() if line.strip()]
+    verdict = next((line for line in lines if "APPROVED" in line.upper() or "REJECTED" in line.upper()), None)
+    return (verdict or (lines[0] if lines else ""))[:200]
+
+
+def _error_record(item, error):
+    return {
+        "id": item.id,
+        "project": item.project,
+        "story": item.story,
+        "status": "error",
+        "verdict": "",
+        "iterations": 0,
+        "seconds": 0.0,
+        "resumed": False,
+        "started_at": None,
+        "finished_at": _now(),
+        "error": error
+    }
+
+
+def format_batch_summary(results):
+    counts = {}
+    for record in results:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    seconds = sum(record.get("seconds") or 0 for record in results)
+    parts = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "nothing to do"
+    return f"[Batch] Done: {parts} ({seconds:.0f}s of crew time)"
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+
+from src.metrics import get_metrics
+from src.pytest_output import condense_output
+from src.tokens import count_tokens, truncate_to_tokens
+
+# --- Configuration ---
+# Prompt token limit for roles not listed in CONTEXT_BUDGETS (0 turns the budget off).
+CONTEXT_BUDGET_DEFAULT = int(os.getenv("CONTEXT_BUDGET_DEFAULT", "12000"))
+# Per-role limits, "role=tokens,...". Keep them below the model's context window minus the answer.
+CONTEXT_BUDGETS = os.getenv("CONTEXT_BUDGETS", "classifier=2000,pm_chat=6000,docs=6000,reviewer=8000")
+# Size a summarised context section is cut to.
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "400"))
+# Truncation never cuts a section below this.
+CONTEXT_MIN_SECTION_TOKENS = 200
+
+# crewai joins the outputs of a task's context tasks with this divider.
+DIVIDER = "\n\n----------\n\n"
+
+# Stages whose output is cut first. Code is kept longest: a reviewer can judge a
+# feature from its code with a summarised plan, but not the other way round.
+REDUCTION_ORDER = ("document", "plan", "execute", "test", "fix", "develop")
+
+_OUTLINE_RE = re.compile(r"^\s*(#+\s|[-*+]\s|\d+[.)]\s|\*\*)")
+
+
+def outline(text):
+    """Extractive summary of prose: the first line plus headings and list items."""
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return text
+    kept = [lines[0]] + [line for line in lines[1:] if _OUTLINE_RE.match(line)]
+    return "\n".join(kept)
+
+
+def summarize_section(stage, text, max_tokens=CONTEXT_SUMMARY_TOKENS):
+    """A shorter form of a context section, chosen by the stage that produced it.
+
+    Execution logs keep their failures, prose keeps its outline; code and
+    tests have no summary and are only ever truncated.
+    """
+    if stage == "execute":
+        summary = condense_output(text, "") or text
+    elif stage in ("plan", "document"):
+        summary = outline(text)
+    else:
+        return text
+    return truncate_to_tokens(summary, max_tokens, marker="\n... [summarised]")
+
+
+def prompt_tokens(messages):
+    if isinstance(messages, str):
+        return count_tokens(messages)
+    return sum(count_tokens(str(message.get("content") or "")) for message in messages)
+
+
+def parse_budgets(value):
+    budgets = {}
+    for item in (value or "").split(","):
+        role, sep, tokens = item.partition("=")
+        if sep and role.strip():
+            budgets[role.strip()] = int(tokens)
+    return budgets
+
+
+class ContextBudget:
+    """Keeps every prompt within its role's token limit.
+
+    Only the context section of a task prompt (the outputs of the tasks it
+    depends on) is reduced, in REDUCTION_ORDER: first each section is
+    replaced by its summary, then sections are truncated until the prompt
+    fits. System prompts, the task description and tool results are left
+    alone. Every prompt's size, its limit and what was trimmed are recorded
+    in the metrics.
+    """
+
+    def __init__(self, budgets=CONTEXT_BUDGETS, default=CONTEXT_BUDGET_DEFAULT):
+        self.budgets = parse_budgets(budgets) if isinstance(budgets, str) else dict(budgets)
+        self.default = default
+        self._warned = set()
+
+    def limit_for(self, role):
+        return self.budgets.get(role, self.default)
+
+    def fit(self, messages, role, task=None):
+        """Returns messages, with the context reduced if the prompt is over the role's limit."""
+        limit = self.limit_for(role)
+        total = prompt_tokens(messages)
+        task_id = str(task.id) if getattr(task, "id", None) is not None else None
+        trimmed = {}
+        if limit and total > limit and not isinstance(messages, str):
+            messages, trimmed = self._reduce(messages, task, total - limit)
+            total -= sum(trimmed.values())
+        if limit and total > limit and role not in self._warned:
+            self._warned.add(role)
+            print(f"[Budget] {role} prompt is ~{total} tokens, over its {limit} limit, with no context left to trim")
+        get_metrics().record_prompt(role, total, limit, trimmed, task_id)
+        return messages
+
+    def _reduce(self, messages, task, excess):
+        sources = getattr(task, "context", None)
+        if not isinstance(sources, list):
+            return messages, {}
+        sources = [source for source in sources if getattr(source, "output", None) is not None]
+        texts = [source.output.raw for source in sources]
+        context = DIVIDER.join(texts)
+        index = next(
+            (i for i, message in enumerate(messages) if context and context in str(message.get("content") or "")), None
+        )
+        if index is None:
+            return messages, {}
+
+        metrics = get_metrics()
+        stages = [metrics.stage_of(source.id) or "other" for source in sources]
+        order = sorted(range(len(texts)), key=lambda i: (
+            REDUCTION_ORDER.index(stages[i]) if stages[i] in REDUCTION_ORDER else len(REDUCTION_ORDER)
+        ))
+        trimmed = {}
+
+        def replace(i, new_text):
+            nonlocal excess
+            saved = count_tokens(texts[i]) - count_tokens(new_text)
+            if saved > 0:
+                texts[i] = new_text
+                trimmed[stages[i]] = trimmed.get(stages[i], 0) + saved
+                excess -= saved
+
+        for i in order:
+            if excess <= 0:
+                break
+            replace(i, summarize_section(stages[i], texts[i]))
+        for i in order:
+            if excess <= 0:
+                break
+            size = count_tokens(texts[i])
+            replace(i, truncate_to_tokens(texts[i], max(CONTEXT_MIN_SECTION_TOKENS, size - excess)))
+
+        if trimmed:
+            messages = [dict(message) for message in messages]
+            messages[index]["content"] = messages[index]["content"].replace(context, DIVIDER.join(texts), 1)
+        return messages, trimmed
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_context_budget():
+    """Returns the process-wide context budget."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = ContextBudget()
+        return _budget
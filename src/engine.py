@@ -1,22 +1,47 @@
 import os
 import json
-import re
 import subprocess
 import logging
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from crewai import Agent, Task, Crew, Process, LLM
+from crewai.tasks.task_output import TaskOutput
 from crewai_tools import FileReadTool, FileWriterTool, SerperDevTool, DirectoryReadTool
 from src.tools import CodeExecutionTool, SyntaxCheckTool
+from src.file_tree import FileTreeIndex
+from src.memory_store import MemoryStore
+from src.llm import RoleLLM
+from src.llm_cache import get_response_cache
+from src.context_budget import get_context_budget
+from src.llm_config import LLM_STREAM, get_model_config
+from src.llm_router import LLMRouter, get_endpoint_pool, routing_session
+from src.intent import IntentDecision, INTENT_CONFIDENCE, classify_heuristic, normalize_intent
+from src.scheduler import TaskGraph, CREW_MAX_PARALLEL_TASKS, format_timing_report
+from src.fileio import resolve_inside, write_if_changed
+from src.patching import PatchError, apply_patches, is_unified_diff, parse_patches
+from src.fence_parser import parse_code_blocks
+from src.git_pipeline import get_git_pipeline
+from src.metrics import get_metrics
+from src.run_journal import RunJournal
+from src.locks import PROJECT_LOCK_WAIT, get_project_lock
+from src.events import publish
 
 load_dotenv()
 
 # --- Configuration ---
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "https://llm.drivakosv.gr/v1")
-MODEL_NAME = "openai/qwen3:8b" 
+# Models, endpoints and sampling per role are configured in src/llm_config.py.
 API_KEY = os.getenv("OPENAI_API_KEY")
+# "diff": fix iterations emit unified diffs against the files on disk; "full": whole files.
+FIX_MODE = os.getenv("FIX_MODE", "diff").lower()
+FIX_CONTEXT_MAX_FILES = 20
+
+# Stages reported to progress callbacks, in crew task order.
+RUN_STAGES = ["plan", "develop", "test", "execute", "document", "review"]
+FIX_STAGES = ["fix", "test", "execute", "review"]
 
 class CrewEngine:
-    def __init__(self, project_name="default_project", init_git=False, remote_url=None):
+    def __init__(self, project_name="default_project", init_git=False, remote_url=None, lock_timeout=PROJECT_LOCK_WAIT):
         self.project_name = project_name
         self.base_dir = os.path.join("projects", project_name)
         self.output_dir = os.path.join(self.base_dir, "code")
@@ -30,9 +55,14 @@ class CrewEngine:
         self.file_writer = FileWriterTool()
         self.file_reader = FileReadTool()
         self.dir_reader = DirectoryReadTool(directory=self.output_dir)
-        self.code_tool = CodeExecutionTool(working_dir=self.output_dir)
+        self.code_tool = CodeExecutionTool(working_dir=self.output_dir, log_dir=os.path.join(self.base_dir, ".logs"))
         self.syntax_tool = SyntaxCheckTool(working_dir=self.output_dir)
         self.search_tool = None
+        self.file_tree = FileTreeIndex(self.base_dir)
+        self.memory_store = MemoryStore(self.memory_file)
+        self.journal = RunJournal(self.base_dir)
+        # Held while the project's files, memory or git history change; shared with other engines and processes
+        self.lock = get_project_lock(self.base_dir)
         
         if os.getenv("SERPER_API_KEY"):
             try:
@@ -40,19 +70,66 @@ class CrewEngine:
             except Exception as e:
                 print(f"[Engine] Warning: Could not initialize SerperDevTool: {e}")
         
-        # Initialize LLM
-        self.llm = LLM(
-            model=MODEL_NAME,
-            base_url=OLLAMA_BASE_URL,
+        # LLM client is created on first use so read-only callers (e.g. memory lookups) skip it
+        self._routers = {}  # ModelSpec key -> LLMRouter
+        self._role_llms = {}
+        self.response_cache = get_response_cache()
+        self.context_budget = get_context_budget()
+        self.last_intent = None
+        self.last_schedule = None
+        self.metrics = get_metrics()
+        self.last_run_metrics = None
+        
+        # Only takes the lock when there is something to set up; request handlers pass a short lock_timeout
+        if init_git and self._git_setup_needed(remote_url):
+            with self.lock.hold(lock_timeout, purpose="git init"):
+                self._initialize_git_repo(remote_url)
+
+    def _router_for(self, spec):
+        """Lazily sets up this engine's clients for one model spec; roles with the same spec share them."""
+        key = spec.key()
+        if key not in self._routers:
+            # Engines share each endpoint's keep-alive connections, in-flight limit and health state
+            self._routers[key] = LLMRouter(
+                get_endpoint_pool(spec.endpoints), lambda base_url: self._create_llm(spec, base_url)
+            )
+        return self._routers[key]
+
+    @property
+    def llm(self):
+        """The main tier's LLM client for its first endpoint."""
+        return self._router_for(get_model_config().for_tier("main")).primary
+
+    def _create_llm(self, spec, base_url):
+        return LLM(
+            model=spec.model,
+            base_url=base_url,
             api_key=API_KEY,
             extra_headers={
                 "User-Agent": "Mozilla/5.0",
                 "Authorization": f"Bearer {API_KEY}"
-            }
+            },
+            **spec.sampling
         )
-        
-        if init_git:
-            self._initialize_git_repo(remote_url)
+
+    def _llm_for(self, role):
+        """Returns the LLM view used by one agent role (for its model tier, context budget, caching, attribution and routing)."""
+        if role not in self._role_llms:
+            router = self._router_for(get_model_config().for_role(role))
+            self._role_llms[role] = RoleLLM(
+                router.primary, role=role, cache=self.response_cache,
+                project=self.project_name, router=router, budget=self.context_budget, stream=LLM_STREAM
+            )
+        return self._role_llms[role]
+
+    def _git_setup_needed(self, remote_url=None):
+        """True unless the repository (and the origin remote, when one is given) already exists."""
+        if not os.path.exists(os.path.join(self.base_dir, ".git")):
+            return True
+        if not remote_url:
+            return False
+        result = subprocess.run(["git", "remote"], cwd=self.base_dir, capture_output=True, text=True)
+        return "origin" not in result.stdout.split()
 
     def _initialize_git_repo(self, remote_url=None):
         """Initializes a git repository and creates metadata."""
@@ -96,6 +173,7 @@ class CrewEngine:
                 if "origin" not in result.stdout:
                     subprocess.run(["git", "remote", "add", "origin", remote_url], cwd=self.base_dir, check=True, capture_output=True)
                     subprocess.run(["git", "push", "-u", "origin", "main"], cwd=self.base_dir, check=True, capture_output=True)
+                    self._git_pipeline().invalidate()
             except Exception as e:
                 print(f"[Engine] Error adding remote: {e}")
 
@@ -110,78 +188,35 @@ class CrewEngine:
         return None
 
     def _commit_changes(self, user_story):
-        """Increments version and commits changes."""
+        """Commits the run's changes with a version bump; only the push runs in the background.
+
+        Called while the run holds the project lock, so a run queued behind
+        this one cannot add its files to this commit.
+        """
         if not os.path.exists(os.path.join(self.base_dir, ".git")):
             return
+        self._git_pipeline().commit(f"feat: {user_story} (v{{version}})")
 
-        try:
-            # Update Version
-            metadata = self.get_project_metadata()
-            version = "unknown"
-            if metadata:
-                v_parts = metadata.get("version", "0.1.0").split('.')
-                if len(v_parts) == 3:
-                    v_parts[-1] = str(int(v_parts[-1]) + 1) # Patch increment
-                metadata["version"] = ".".join(v_parts)
-                version = metadata["version"]
-                
-                with open(self.metadata_file, 'w') as f:
-                    json.dump(metadata, f, indent=4)
-
-            # Git Commit
-            subprocess.run(["git", "add", "."], cwd=self.base_dir, check=True, capture_output=True)
-            commit_msg = f"feat: {user_story} (v{version})"
-            subprocess.run(["git", "commit", "-m", commit_msg], cwd=self.base_dir, check=True, capture_output=True)
-            
-            # Push Changes
-            self._push_changes()
-
-        except Exception as e:
-            print(f"[Engine] Error committing changes: {e}")
-
-    def _push_changes(self):
-        """Pushes changes to remote if configured."""
-        try:
-            # Check if remote exists
-            result = subprocess.run(["git", "remote"], cwd=self.base_dir, capture_output=True, text=True)
-            if "origin" in result.stdout:
-                 # Get current branch
-                branch_res = subprocess.run(["git", "branch", "--show-current"], cwd=self.base_dir, capture_output=True, text=True)
-                branch = branch_res.stdout.strip()
-                
-                subprocess.run(["git", "push", "origin", branch], cwd=self.base_dir, check=True, capture_output=True)
-        except Exception as e:
-            print(f"[Engine] Push warning: Could not push to remote. {e}")
+    def _git_pipeline(self):
+        return get_git_pipeline(self.base_dir, self.metadata_file)
 
     def _get_file_tree(self):
         """Generates a string representation of the project file structure."""
-        tree_str = "\n## Current File Structure:\n"
-        start_path = self.base_dir
-        
-        for root, dirs, files in os.walk(start_path):
-            # Modify dirs in-place to skip hidden directories and specific folders
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d != "__pycache__" and d != "venv"]
-            
-            level = root.replace(start_path, '').count(os.sep)
-            indent = '  ' * level
-            if level > 0:
-                base_name = os.path.basename(root)
-                tree_str += f"{indent}{base_name}/\n"
-            
-            subindent = '  ' * (level + 1)
-            for f in files:
-                if not f.startswith('.'):
-                    tree_str += f"{subindent}{f}\n"
-                    
-        return tree_str
+        return self.file_tree.render()
+
+    def _get_memory_context(self, query=None):
+        """Builds the memory context and appends file structure.
 
-    def _get_memory_context(self):
-        """Reads the memory file and appends file structure to provide context."""
+        With a query, only a token-budgeted selection of memory relevant to it
+        is included; without one, the full memory file is returned.
+        """
         context = ""
-        if os.path.exists(self.memory_file):
+        if query is not None:
+            context = self.memory_store.build_context(query)
+        elif os.path.exists(self.memory_file):
             with open(self.memory_file, 'r', encoding='utf-8') as f:
                 context = f.read()
-        else:
+        if not context:
             context = "No previous features implemented yet."
             
         # Append File Tree
@@ -194,24 +229,85 @@ class CrewEngine:
         with open(self.memory_file, 'a', encoding='utf-8') as f:
             f.write(entry)
 
-    def process_message(self, user_input):
-        """Decides whether to chat or run a task based on user input."""
-        intent = self._classify_intent(user_input)
-        
-        if intent == "CHAT":
-            return self._chat_with_pm(user_input)
-        else:
-            return self.run(user_input)
+    def _make_task_callback(self, progress_callback, stages, iteration=0, written_files=None, tasks=None):
+        """Reports the first stage and returns a task callback that advances to the next one.
+
+        With written_files, each task's code blocks are also saved as soon as
+        the task completes, so later tasks (e.g. the runner) find them on disk.
+        With tasks (in the order of stages), each completed task is then
+        recorded in the run journal.
+        """
+        state = {"index": 0}
+        lock = threading.Lock()
+
+        def report():
+            if progress_callback and state["index"] < len(stages):
+                progress_callback({
+                    "stage": stages[state["index"]],
+                    "step": state["index"] + 1,
+                    "total": len(stages),
+                    "iteration": iteration
+                })
+
+        def on_task_complete(output):
+            # Independent tasks may finish concurrently on crew worker threads.
+            with lock:
+                if written_files is not None:
+                    try:
+                        saved = self._save_files_from_text(str(output))
+                        written_files.update(saved)
+                        if saved:
+                            publish("files", paths=sorted(saved), iteration=iteration)
+                    except OSError as e:
+                        print(f"[Engine] Error saving files: {e}")
+                if tasks is not None:
+                    stage = next((s for s, task in zip(stages, tasks) if task.output is output), None)
+                    if stage:
+                        self.journal.record_task(stage, iteration, str(output), written_files or ())
+                state["index"] += 1
+                report()
+
+        report()
+        return on_task_complete
+
+    def process_message(self, user_input, progress_callback=None, lock_timeout=PROJECT_LOCK_WAIT):
+        """Decides whether to chat or run a task based on user input.
+
+        Chats do not lock the project; a task run waits up to lock_timeout for it (see run).
+        """
+        self.last_run_metrics = None
+        # The classification, the chat or run that follows and all of its tasks share one endpoint
+        with routing_session(self.project_name):
+            intent = self._classify_intent(user_input)
+
+            if intent == "CHAT":
+                self._make_task_callback(progress_callback, ["chat"])
+                return self._chat_with_pm(user_input)
+            else:
+                return self.run(user_input, progress_callback=progress_callback, lock_timeout=lock_timeout)
 
     def _classify_intent(self, user_input):
-        """Classifies the user input as 'CHAT' or 'TASK'."""
+        """Classifies the user input as 'CHAT' or 'TASK'.
+
+        Obvious inputs are decided locally; only uncertain ones cost an LLM call.
+        """
+        decision = classify_heuristic(user_input)
+        if decision.confidence < INTENT_CONFIDENCE:
+            decision = self._classify_intent_with_llm(user_input, decision)
+
+        self.last_intent = decision
+        print(f"[Engine] Intent: {decision.intent} (via {decision.source}, confidence {decision.confidence:.2f})")
+        return decision.intent
+
+    def _classify_intent_with_llm(self, user_input, fallback):
+        """Asks the LLM to classify the input, falling back to the local guess if its answer is unusable."""
         classifier = Agent(
             role='Intent Classifier',
             goal='Classify user input.',
             backstory="You are a classifier. You distinguish between conversational questions/requests for info versus tasks that require code changes.",
             allow_delegation=False,
             verbose=False,
-            llm=self.llm
+            llm=self._llm_for("classifier")
         )
         
         task = Task(
@@ -221,12 +317,14 @@ class CrewEngine:
         )
         
         crew = Crew(agents=[classifier], tasks=[task], verbose=False)
-        result = crew.kickoff()
-        return str(result).strip().upper()
+        intent = normalize_intent(crew.kickoff())
+        if intent is None:
+            return IntentDecision(fallback.intent, fallback.confidence, "heuristic")
+        return IntentDecision(intent, 1.0, "llm")
 
     def _chat_with_pm(self, user_input):
         """Runs a chat session with the Product Manager using context."""
-        memory_context = self._get_memory_context()
+        memory_context = self._get_memory_context(user_input)
         
         # Prepare tools for PM if available
         pm_tools = []
@@ -247,7 +345,7 @@ class CrewEngine:
             verbose=True,
             allow_delegation=False,
             tools=pm_tools,
-            llm=self.llm
+            llm=self._llm_for("pm_chat")
         )
         
         task = Task(
@@ -259,12 +357,104 @@ class CrewEngine:
         crew = Crew(agents=[pm_agent], tasks=[task], verbose=True)
         return str(crew.kickoff())
 
-    def run(self, user_story):
-        """Executes the Crew for a specific user story with memory context."""
-        
-        memory_context = self._get_memory_context()
+    def run(self, user_story, progress_callback=None, resume=False, lock_timeout=PROJECT_LOCK_WAIT):
+        """Executes the Crew for a specific user story with memory context.
+
+        Every completed task is recorded in the run journal. With resume, the
+        tasks the journal already holds are not run again (see resume_run).
+        The project is locked for the whole run; if another run (in this or
+        another process) holds it for longer than lock_timeout seconds,
+        ProjectBusy is raised.
+        """
+        with self._project_locked(f"run: {user_story}", lock_timeout, progress_callback):
+            return self._run(user_story, progress_callback, resume)
+
+    def _run(self, user_story, progress_callback, resume):
+        run_metrics = self.metrics.start_run(self.project_name)
+        status = "error"
+        error = "Run interrupted"
+        if resume:
+            self.journal.resume()
+        else:
+            self.journal.start(user_story)
+        try:
+            with routing_session(self.project_name):
+                result = self._run_crews(user_story, progress_callback, run_metrics)
+            if not result.startswith(("Crew execution failed", "Fix cycle execution failed")):
+                status = "rejected" if "REJECTED" in result.upper() else "approved"
+            error = result
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.last_run_metrics = run_metrics.finish(status)
+            if status == "error":
+                self.journal.finish("failed", error)
+            else:
+                self.journal.finish("completed")
+
+    def resume_run(self, progress_callback=None, lock_timeout=PROJECT_LOCK_WAIT):
+        """Continues the project's interrupted run after its last completed task.
+
+        Returns None if the last run finished (or there is none).
+        """
+        with self._project_locked("resume", lock_timeout, progress_callback):
+            journal = self.journal.resumable()
+            if journal is None:
+                return None
+            print(f"[Engine] Resuming '{journal['user_story']}' after {len(journal['tasks'])} completed task(s)...")
+            return self.run(journal["user_story"], progress_callback, resume=True)
+
+    @contextmanager
+    def _project_locked(self, purpose, timeout, progress_callback=None):
+        """Holds the project lock; while waiting for it, a "waiting" stage is reported.
+
+        The report is repeated while waiting, so a cancelled job's callback
+        stops the wait (by raising) instead of the job getting the lock later.
+        """
+        waiting = {"stage": "waiting", "step": 0, "total": 0, "iteration": 0}
+        waited = []
+
+        def report():
+            if progress_callback:
+                progress_callback(waiting)
+
+        def on_wait(holder):
+            waited.append(holder)
+            print(f"[Engine] Project '{self.project_name}' is busy ({(holder or {}).get('purpose', 'another run')}); waiting...")
+            report()
+
+        with self.lock.hold(timeout, purpose, on_wait, on_poll=report):
+            if waited:
+                report()  # cancelled just as the lock came free: stop before the journal is touched
+            yield
+
+    def _restore_outputs(self, stages, tasks, iteration):
+        """Gives tasks the outputs the run journal holds for them; returns the stages and tasks still to run."""
+        outputs = self.journal.outputs(iteration)
+        pending_stages, pending_tasks = [], []
+        for stage, task in zip(stages, tasks):
+            if stage in outputs:
+                task.output = TaskOutput(
+                    description=task.description,
+                    expected_output=task.expected_output,
+                    agent=task.agent.role,
+                    raw=outputs[stage]
+                )
+            else:
+                pending_stages.append(stage)
+                pending_tasks.append(task)
+        if len(pending_tasks) < len(tasks):
+            print(f"[Engine] Restored {len(tasks) - len(pending_tasks)} task output(s) from the run journal.")
+        return pending_stages, pending_tasks
+
+    def _run_crews(self, user_story, progress_callback, run_metrics):
+        """Runs the main crew and the fix iterations; every task is tracked in run_metrics."""
+        memory_context = self._get_memory_context(user_story)
         
         # --- Prepare Tools ---
+        self.code_tool.failed_tests = []  # from the previous run
         pm_tools = []
         dev_tools = [self.file_writer, self.syntax_tool] # Developer gets syntax checker
         
@@ -287,7 +477,7 @@ class CrewEngine:
             verbose=True,
             allow_delegation=False,
             tools=pm_tools,
-            llm=self.llm,
+            llm=self._llm_for("pm"),
             max_iter=10
         )
 
@@ -303,14 +493,14 @@ class CrewEngine:
             Relative paths should be based on the project root.
             
             1. Write the code to files using the format above.
-            2. Use the 'Syntax Checker' tool on your new files to check for errors.
+            2. Use the 'Syntax Checker' tool on your new files to check for errors (pass them all in one call, e.g. 'main.py utils.py').
             3. Fix any syntax errors BEFORE finishing. 
             
             Use your Search Tool if you run into errors or need documentation.""",
             verbose=True,
             allow_delegation=False,
             tools=dev_tools,
-            llm=self.llm,
+            llm=self._llm_for("developer"),
             max_iter=10
         )
 
@@ -321,7 +511,7 @@ class CrewEngine:
             verbose=True,
             allow_delegation=False,
             tools=[self.file_writer],
-            llm=self.llm,
+            llm=self._llm_for("qa"),
             max_iter=10
         )
         
@@ -341,7 +531,7 @@ class CrewEngine:
             verbose=True,
             allow_delegation=False,
             tools=[self.code_tool, self.dir_reader],
-            llm=self.llm,
+            llm=self._llm_for("runner"),
             max_iter=5 # Strict limit for DevOps to prevent loops
         )
         
@@ -352,7 +542,7 @@ class CrewEngine:
             verbose=True,
             allow_delegation=False,
             tools=[self.file_writer],
-            llm=self.llm,
+            llm=self._llm_for("docs"),
             max_iter=5
         )
 
@@ -366,7 +556,7 @@ class CrewEngine:
             verbose=True,
             allow_delegation=True,
             tools=[self.syntax_tool], # Reviewer gets syntax checker
-            llm=self.llm,
+            llm=self._llm_for("reviewer"),
             max_iter=10
         )
 
@@ -374,7 +564,7 @@ class CrewEngine:
         task_plan = Task(
             description=f"""
             Plan the feature: '{user_story}'. 
-            Consider the existing memory: {memory_context}.
+            Consider the existing project memory and file structure from your background.
             
             **Brainstorming Phase:**
             1. Generate 3 distinct implementation approaches (e.g., different libraries, patterns, or algorithms).
@@ -405,18 +595,19 @@ class CrewEngine:
             context=[task_plan]
         )
 
+        # QA works from the plan so it can run alongside development.
         task_qa = Task(
-            description="Write tests.",
+            description="Write tests for the planned feature, based on the modules, functions and behaviour described in the plan.",
             expected_output="Test code in markdown.",
             agent=qa_agent,
-            context=[task_dev]
+            context=[task_plan]
         )
         
         task_runner = Task(
             description="Execute the tests using 'pytest' or run the main script. Report the STDOUT and STDERR.",
             expected_output="Execution logs and pass/fail status.",
             agent=runner_agent,
-            context=[task_qa],
+            context=[task_dev, task_qa],
             max_execution_time=300 # 5 minute limit
         )
         
@@ -440,21 +631,44 @@ class CrewEngine:
             context=[task_plan, task_dev, task_qa, task_runner, task_docs]
         )
 
-        crew = Crew(
-            agents=[pm_agent, dev_agent, qa_agent, runner_agent, docs_agent, reviewer_agent],
-            tasks=[task_plan, task_dev, task_qa, task_runner, task_docs, task_review],
-            process=Process.sequential,
-            verbose=True
+        # Files written by the agents so far (including those of a resumed run);
+        # each task's files are saved as it completes.
+        written_files = set((self.journal.load() or {}).get("written_files", []))
+
+        # A resumed run only runs the tasks the journal has no output for
+        stages, tasks = self._restore_outputs(
+            RUN_STAGES, [task_plan, task_dev, task_qa, task_runner, task_docs, task_review], 0
         )
+        if tasks:
+            # Tasks whose context dependencies are met run concurrently
+            graph = TaskGraph(tasks, names=stages)
+            for stage, task in zip(graph.names, graph.tasks):
+                run_metrics.track(task, stage)
+            crew = Crew(
+                agents=[pm_agent, dev_agent, qa_agent, runner_agent, docs_agent, reviewer_agent],
+                tasks=graph.schedule(CREW_MAX_PARALLEL_TASKS),
+                process=Process.sequential,
+                verbose=True,
+                task_callback=self._make_task_callback(progress_callback, stages, written_files=written_files, tasks=tasks)
+            )
 
-        try:
-            result = crew.kickoff()
-        except Exception as e:
-            error_msg = f"Crew execution failed: {str(e)}"
-            print(f"\n[Engine] Error: {error_msg}")
-            return error_msg
+            try:
+                result = crew.kickoff()
+            except Exception as e:
+                error_msg = f"Crew execution failed: {str(e)}"
+                print(f"\n[Engine] Error: {error_msg}")
+                return error_msg
+
+            self.last_schedule = graph.timing_report()
+            if self.last_schedule:
+                print(f"\n[Engine] Schedule: {format_timing_report(self.last_schedule)}")
+        else:
+            result = task_review.output.raw
+        self._publish_verdict(result, 0)
 
-        self._save_files_from_output(crew)
+        # The tests the runner's last pytest call reported as failed, re-run first in the next iteration
+        failed_tests = list(self.code_tool.failed_tests)
+        patch_errors = []
 
         # --- Iterative Feedback Loop ---
         max_iterations = 3
@@ -466,33 +680,78 @@ class CrewEngine:
             
             # Feedback from the previous review
             feedback = str(result)
-            
-            # New Tasks for the Fix Cycle
-            task_fix = Task(
-                description=f"""
-                The previous submission was REJECTED.
-                
-                **Reviewer Feedback:**
-                {feedback}
-                
-                Fix the code and/or tests to address the feedback.
-                Output the FULL updated files using '### filename' format.
-                """,
-                expected_output="Fixed source code in markdown.",
-                agent=dev_agent,
-                max_execution_time=300
-            )
+            if patch_errors:
+                feedback += "\n\n**Patches from the last iteration that could not be applied:**\n" + "\n".join(
+                    f"- {error}" for error in patch_errors
+                )
+            patch_errors = []
 
-            task_qa_fix = Task(
-                description="Update or add tests for the fixed code.",
-                expected_output="Updated test code in markdown.",
-                agent=qa_agent,
-                context=[task_fix],
-                max_execution_time=300
-            )
+            # New Tasks for the Fix Cycle
+            if FIX_MODE == "diff":
+                task_fix = Task(
+                    description=f"""
+                    The previous submission was REJECTED.
+                    
+                    **Reviewer Feedback:**
+                    {feedback}
+                    
+                    **Current Files:**
+                    {self._render_files(written_files)}
+                    
+                    Fix the code and/or tests to address the feedback.
+                    Do NOT repeat unchanged files. For each file you change, output a unified diff
+                    against the current file in a ```diff block, with '--- a/<path>' and '+++ b/<path>'
+                    headers and '@@' hunks with 3 lines of context. Only brand-new files may be
+                    output in full using '### filename' format.
+                    """,
+                    expected_output="Unified diffs of the fixed files.",
+                    agent=dev_agent,
+                    callback=self._make_patch_callback(patch_errors, written_files),
+                    max_execution_time=300
+                )
+
+                task_qa_fix = Task(
+                    description="Update or add tests for the fixed code. Change existing test files with unified diffs in ```diff blocks; output only new test files in full using '### filename' format.",
+                    expected_output="Unified diffs or new test files in markdown.",
+                    agent=qa_agent,
+                    context=[task_fix],
+                    callback=self._make_patch_callback(patch_errors, written_files),
+                    max_execution_time=300
+                )
+            else:
+                task_fix = Task(
+                    description=f"""
+                    The previous submission was REJECTED.
+                    
+                    **Reviewer Feedback:**
+                    {feedback}
+                    
+                    Fix the code and/or tests to address the feedback.
+                    Output the FULL updated files using '### filename' format.
+                    """,
+                    expected_output="Fixed source code in markdown.",
+                    agent=dev_agent,
+                    max_execution_time=300
+                )
+
+                task_qa_fix = Task(
+                    description="Update or add tests for the fixed code.",
+                    expected_output="Updated test code in markdown.",
+                    agent=qa_agent,
+                    context=[task_fix],
+                    max_execution_time=300
+                )
             
+            if failed_tests:
+                runner_description = (
+                    f"Run the updated tests. First re-run only the tests that failed last time: "
+                    f"'pytest {' '.join(failed_tests)}'. If they now pass, run the full suite once with 'pytest'. "
+                    f"If they still fail, report the failures without running the full suite."
+                )
+            else:
+                runner_description = "Run the updated tests."
             task_runner_fix = Task(
-                description="Run the updated tests.",
+                description=runner_description,
                 expected_output="Execution logs.",
                 agent=runner_agent,
                 context=[task_qa_fix],
@@ -511,21 +770,32 @@ class CrewEngine:
                 max_execution_time=300
             )
             
-            fix_crew = Crew(
-                agents=[dev_agent, qa_agent, runner_agent, reviewer_agent],
-                tasks=[task_fix, task_qa_fix, task_runner_fix, task_review_fix],
-                process=Process.sequential,
-                verbose=True
+            stages, fix_tasks = self._restore_outputs(
+                FIX_STAGES, [task_fix, task_qa_fix, task_runner_fix, task_review_fix], iteration
             )
-            
-            try:
-                result = fix_crew.kickoff()
-            except Exception as e:
-                error_msg = f"Fix cycle execution failed: {str(e)}"
-                print(f"\n[Engine] Error: {error_msg}")
-                return error_msg
-
-            self._save_files_from_output(fix_crew)
+            for stage, task in zip(stages, fix_tasks):
+                run_metrics.track(task, stage, iteration)
+
+            if fix_tasks:
+                fix_crew = Crew(
+                    agents=[dev_agent, qa_agent, runner_agent, reviewer_agent],
+                    tasks=fix_tasks,
+                    process=Process.sequential,
+                    verbose=True,
+                    task_callback=self._make_task_callback(progress_callback, stages, iteration, written_files, fix_tasks)
+                )
+
+                try:
+                    result = fix_crew.kickoff()
+                except Exception as e:
+                    error_msg = f"Fix cycle execution failed: {str(e)}"
+                    print(f"\n[Engine] Error: {error_msg}")
+                    return error_msg
+            else:
+                result = task_review_fix.output.raw
+            self._publish_verdict(result, iteration)
+
+            failed_tests = list(self.code_tool.failed_tests)
         
         if "REJECTED" in str(result).upper():
             print("\n[Engine] Maximum iterations reached. Final result is still REJECTED.")
@@ -540,23 +810,86 @@ class CrewEngine:
         
         return str(result)
 
-    def _save_files_from_output(self, crew):
-        """Parses output from all tasks and saves files to the project code directory."""
-        for task in crew.tasks:
-            if not task.output: continue
-            
-            # Markdown Parsing
-            pattern = r'###\s+([^\n]+)\s+```[^\n]*\n(.*?)\n```'
-            matches = re.finditer(pattern, str(task.output), re.DOTALL)
-            
-            for match in matches:
-                filename = match.group(1).strip()
-                content = match.group(2)
-                
-                # Remove redundant paths if agent added them
-                clean_filename = filename.replace('output/', '').replace('code/', '')
-                full_path = os.path.join(self.output_dir, clean_filename)
-                
-                os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+    @staticmethod
+    def _publish_verdict(result, iteration):
+        text = str(result).strip()
+        publish("verdict", iteration=iteration, verdict="REJECTED" if "REJECTED" in text.upper() else "APPROVED",
+                summary=text.splitlines()[0][:500] if text else "")
+
+    def _make_patch_callback(self, errors, written_files):
+        """Returns a task callback that applies the diffs in a fix task's output as soon as it completes.
+
+        Applying them before the next task starts lets the runner test the
+        patched files. Patches that fail are reported in errors and noted in
+        the task output so the reviewer sees them. Full-file blocks in the
+        same output are saved by the crew's task callback, which runs after.
+        """
+        def on_fix_complete(output):
+            text = str(getattr(output, "raw", output))
+            try:
+                patches = parse_patches(text)
+                for patch in patches:
+                    patch.path = self._clean_filename(patch.path)
+                changed = apply_patches(patches, self.output_dir)
+            except (PatchError, ValueError, OSError) as e:
+                errors.append(str(e))
+                print(f"[Engine] Patch not applied: {e}")
+                if isinstance(getattr(output, "raw", None), str):
+                    output.raw += f"\n\nNOTE: these changes were NOT applied ({e})."
+                return
+            if changed:
+                print(f"[Engine] Applied patches to: {', '.join(changed)}")
+                publish("files", paths=sorted(changed), patched=True)
+            written_files.update(changed)
+
+        return on_fix_complete
+
+    def _render_files(self, paths):
+        """Current contents of the given code files, in '### filename' format, for fix prompts."""
+        paths = sorted(p for p in paths if os.path.isfile(os.path.join(self.output_dir, p)))
+        if not paths:
+            for root, dirs, files in os.walk(self.output_dir):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+                for name in sorted(files):
+                    if name.endswith(('.py', '.md', '.txt', '.toml', '.cfg', '.json')):
+                        paths.append(os.path.relpath(os.path.join(root, name), self.output_dir))
+        blocks = []
+        for path in paths[:FIX_CONTEXT_MAX_FILES]:
+            try:
+                with open(os.path.join(self.output_dir, path), 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            blocks.append(f"### {path}\n```\n{content}\n```")
+        return "\n\n".join(blocks) if blocks else "No files written yet."
+
+    @staticmethod
+    def _clean_filename(filename):
+        # Remove redundant paths if agent added them
+        return filename.strip().replace('output/', '').replace('code/', '')
+
+    def _save_files_from_text(self, text):
+        """Saves every '### filename' code block in text; diff blocks are left to the patcher.
+
+        Returns the files written; files whose content is unchanged are skipped.
+        """
+        written = []
+        blocks, errors = parse_code_blocks(text)
+        for error in errors:
+            print(f"[Engine] Malformed output: {error}")
+
+        for block in blocks:
+            if not block.filename:
+                continue
+            if block.language in ("diff", "patch") or is_unified_diff(block.content):
+                continue
+
+            clean_filename = self._clean_filename(block.filename)
+            try:
+                full_path = resolve_inside(self.output_dir, clean_filename)
+            except ValueError as e:
+                print(f"[Engine] Skipping file: {e}")
+                continue
+            if write_if_changed(full_path, block.content):
+                written.append(clean_filename)
+        return written
@@ -0,0 +1,229 @@
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from src.metrics import get_metrics
+
+# --- Configuration ---
+# Events kept per job so a client that connects late (or reconnects) can catch up. When it is full,
+# the oldest token events are dropped first, so stage and progress events outlive the streamed text.
+EVENT_BUFFER = int(os.getenv("EVENT_BUFFER", "5000"))
+# Seconds between keep-alive comments on an idle event stream connection.
+EVENT_HEARTBEAT = float(os.getenv("EVENT_HEARTBEAT", "15"))
+# Longest task/tool output sent in one event (the full result is in the job).
+EVENT_TEXT_LIMIT = 20000
+
+_stream = contextvars.ContextVar("event_stream", default=None)
+
+
+class EventStream:
+    """Ordered events of one job, read by any number of subscribers.
+
+    Every event is a dict with an increasing "seq", its "type" and "time".
+    Readers ask for the events after the last seq they saw, which also lets
+    a reconnecting client resume where it left off. Threads wait with read(),
+    event loop code (the SSE endpoint) with wait().
+    """
+
+    def __init__(self, limit=EVENT_BUFFER):
+        self.limit = limit
+        self.closed = False
+        self._events = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._waiters = set()  # (loop, asyncio.Event) of async readers
+
+    def publish(self, kind, /, **data):
+        with self._cond:
+            if self.closed:
+                return
+            self._seq += 1
+            self._events.append({"seq": self._seq, "type": kind, "time": round(time.time(), 3), **data})
+            if len(self._events) > self.limit:
+                self._evict()
+            self._notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._notify()
+
+    def read(self, after=0, timeout=None):
+        """Events with seq > after, waiting up to timeout for one. [] means none yet (or the stream is over)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._ready(after), timeout)
+            return self._after(after)
+
+    async def wait(self, after=0, timeout=None):
+        """read() for the event loop: waits without holding a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self._ready(after):
+                return self._after(after)
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._waiters.discard(waiter)
+        with self._cond:
+            return self._after(after)
+
+    def _ready(self, after):
+        return self.closed or bool(self._events and self._events[-1]["seq"] > after)
+
+    def _after(self, after):
+        return [event for event in self._events if event["seq"] > after]
+
+    def _evict(self):
+        # Tokens go first: a reconnecting client needs the stages more than old streamed text
+        drop = next((i for i, event in enumerate(self._events) if event["type"] == "token"), 0)
+        del self._events[drop]
+
+    def _notify(self):
+        self._cond.notify_all()
+        for loop, ready in self._waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass  # the client's loop is gone
+
+
+async def sse(stream, after=0, heartbeat=EVENT_HEARTBEAT):
+    """Yields a stream's events after seq `after` in Server-Sent Events format until the stream is closed."""
+    yield "retry: 2000\n\n"
+    while True:
+        events = await stream.wait(after, heartbeat)
+        if not events:
+            if stream.closed:
+                return
+            yield ": keep-alive\n\n"
+            continue
+        for event in coalesce_tokens(events):
+            after = event["seq"]
+            yield f"id: {after}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def coalesce_tokens(events):
+    """Joins runs of token events of the same LLM call into one event (with the seq of the last)."""
+    merged = []
+    for event in events:
+        last = merged[-1] if merged else None
+        if event["type"] == "token" and last and last["type"] == "token" and last["call_id"] == event["call_id"]:
+            merged[-1] = dict(event, text=last["text"] + event["text"])
+        else:
+            merged.append(event)
+    return merged
+
+
+@contextmanager
+def streaming_to(stream):
+    """Sends the events of everything run inside the block (crew tasks included) to stream."""
+    install()
+    token = _stream.set(stream)
+    try:
+        yield stream
+    finally:
+        flush()
+        _stream.reset(token)
+
+
+def flush():
+    """Waits for queued event handlers, so a job's last events are published before it is reported done."""
+    try:
+        from crewai.events import crewai_event_bus
+        crewai_event_bus.flush(timeout=5.0)
+    except ImportError:
+        pass
+
+
+def publish(kind, /, **data):
+    """Publishes an event to the current job's stream; a no-op outside streaming_to."""
+    stream = _stream.get()
+    if stream is not None:
+        stream.publish(kind, **data)
+
+
+def _clip(text):
+    text = "" if text is None else str(text)
+    return text if len(text) <= EVENT_TEXT_LIMIT else text[:EVENT_TEXT_LIMIT] + "\n... [truncated]"
+
+
+def _stage(event):
+    return get_metrics().stage_of(getattr(event, "task_id", None))
+
+
+def _agent(event):
+    """The role of the agent behind an event (not every event type fills in agent_role)."""
+    if getattr(event, "agent_role", None):
+        return event.agent_role
+    agent = getattr(event, "from_agent", None) or getattr(getattr(event, "task", None), "agent", None)
+    if agent is None:
+        agent = getattr(getattr(event, "from_task", None), "agent", None)
+    return getattr(agent, "role", None)
+
+
+# --- crewai event bus handlers ---
+# Sync handlers run with a copy of the emitting thread's context (stream chunks in
+# that thread itself), so _stream is the stream of the job the event belongs to.
+
+def on_task_started(event):
+    publish("task_started", stage=_stage(event), agent=_agent(event), task=event.task_name)
+
+
+def on_task_completed(event, error=None):
+    output = getattr(getattr(event, "output", None), "raw", None)
+    publish("task_completed", stage=_stage(event), agent=_agent(event),
+            output=_clip(output), error=str(error) if error else None)
+
+
+def on_tool(event, status):
+    publish("tool", stage=_stage(event), agent=_agent(event), tool=event.tool_name, status=status,
+            args=_clip(event.tool_args) if status == "started" else None,
+            output=_clip(getattr(event, "output", None)) if status == "finished" else None,
+            error=str(getattr(event, "error", "")) if status == "error" else None)
+
+
+def on_token(event):
+    # Called for every chunk in the LLM call's thread: only streamed jobs pay for more than a lookup
+    stream = _stream.get()
+    if stream is not None and event.chunk:
+        stream.publish("token", agent=_agent(event), call_id=event.call_id, text=event.chunk)
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """Subscribes the handlers to crewai's event bus (once)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        try:
+            from crewai.events import crewai_event_bus
+            from crewai.events.types.llm_events import LLMStreamChunkEvent
+            from crewai.events.types.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+            from crewai.events.types.tool_usage_events import (
+                ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent
+            )
+        except ImportError as e:
+            print(f"[Events] Event bus unavailable, only job progress is streamed: {e}")
+            _installed = True
+            return
+
+        crewai_event_bus.on(TaskStartedEvent)(lambda source, event: on_task_started(event))
+        crewai_event_bus.on(TaskCompletedEvent)(lambda source, event: on_task_completed(event))
+        crewai_event_bus.on(TaskFailedEvent)(lambda source, event: on_task_completed(event, error=event.error))
+        crewai_event_bus.on(ToolUsageStartedEvent)(lambda source, event: on_tool(event, "started"))
+        crewai_event_bus.on(ToolUsageFinishedEvent)(lambda source, event: on_tool(event, "finished"))
+        crewai_event_bus.on(ToolUsageErrorEvent)(lambda source, event: on_tool(event, "error"))
+        crewai_event_bus.on(LLMStreamChunkEvent)(lambda source, event: on_token(event))
+        _installed = True
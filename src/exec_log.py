@@ -0,0 +1,40 @@
+import datetime
+import os
+import re
+import threading
+
+from src.fileio import atomic_write, ignored_dir
+
+# --- Configuration ---
+# Tool output longer than this is condensed before it reaches the LLM; the captured output stays on disk.
+EXEC_LOG_CONDENSE_CHARS = int(os.getenv("EXEC_LOG_CONDENSE_CHARS", "2000"))
+EXEC_LOG_KEEP = int(os.getenv("EXEC_LOG_KEEP", "50"))
+
+_counter = 0
+_counter_lock = threading.Lock()
+
+
+def save_log(log_dir, command, text):
+    """Writes a command's captured output to log_dir and prunes old logs. Returns the log's path.
+
+    This is the output the tool captured, i.e. the start and end of each
+    stream when it was longer than CODE_EXEC_MAX_OUTPUT.
+    """
+    global _counter
+    ignored_dir(log_dir)  # keeps the logs out of the project's auto-commits
+
+    with _counter_lock:
+        _counter += 1
+        sequence = _counter
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', command).strip('-')[:40] or "command"
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(log_dir, f"{stamp}-{os.getpid()}-{sequence:04d}-{slug}.log")
+    atomic_write(path, f"$ {command}\n{text}")
+
+    logs = sorted(name for name in os.listdir(log_dir) if name.endswith(".log"))
+    for name in logs[:max(0, len(logs) - EXEC_LOG_KEEP)]:
+        try:
+            os.remove(os.path.join(log_dir, name))
+        except OSError:
+            pass
+    return path
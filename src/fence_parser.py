@@ -0,0 +1,142 @@
+import re
+
+_HEADING_RE = re.compile(r'^\s*###\s+(.+?)\s*$')
+_FENCE_RE = re.compile(r'^(\s*)(`{3,}|~{3,})\s*([^`\s]*)[^`]*$')
+_CLOSE_RE = re.compile(r'^\s*(`{3,}|~{3,})\s*$')
+
+
+class CodeBlock:
+    def __init__(self, filename, language, content, line):
+        self.filename = filename  # from a '### filename' heading right above the fence, else None
+        self.language = language
+        self.content = content
+        self.line = line  # 1-based line of the opening fence
+
+    def __repr__(self):
+        return f"CodeBlock({self.filename!r}, {self.language!r}, line={self.line})"
+
+
+class FenceParser:
+    """Line-based markdown code-fence parser that runs in linear time.
+
+    A fence closes only with a bare fence of the same character that is at
+    least as long as the opening one, so ```` blocks may contain ```. Inside
+    a block, a fence with a language tag (```bash) opens a nested block
+    whose bare closing fence does not end the outer one; this keeps README
+    edits with their own code examples in one piece.
+
+    Malformed fences are reported and read as text, so one broken block does
+    not swallow the files after it. A fence with no possible closing fence
+    after it is caught as it is met. Fences left open by unbalanced nesting
+    are only known at the end; the output is then read again from the first
+    of them, with them as text, and a last time without nesting if that
+    still leaves a block open. Every line is read at most three times.
+    """
+
+    def __init__(self, text):
+        self.lines = text.split("\n")
+        self.errors = []
+        self._closers = _closers_after(self.lines)
+        self._as_text = set()  # indices of fences found to be unclosed
+
+    def parse(self):
+        """Returns the complete blocks, in order; malformed ones are recorded in errors."""
+        blocks = []
+        start = 0
+        for nesting in (True, True, False):
+            rescan = self._scan(start, nesting, blocks)
+            if rescan is None:
+                break
+            start = rescan
+        return blocks
+
+    def _scan(self, start, nesting, blocks):
+        """Parses lines[start:]. Returns where to read again from if a block was left open, else None."""
+        heading = None
+        block = None  # (char, length, indent, filename, language)
+        stack = []  # indices of the open fences, outermost first
+        content = []
+        for index in range(start, len(self.lines)):
+            line = self.lines[index]
+            if block is None:
+                if "```" not in line and "~~~" not in line and "###" not in line:
+                    if line.strip():
+                        heading = None
+                    continue
+                fence = _FENCE_RE.match(line) if index not in self._as_text else None
+                if fence:
+                    indent, marker, language = fence.groups()
+                    if self._closers[index].get(marker[0], 0) >= len(marker):
+                        block = (marker[0], len(marker), len(indent), heading, language.lower())
+                        stack, content = [index], []
+                    else:
+                        self._unclosed(index, heading)
+                        self._as_text.add(index)
+                    heading = None
+                    continue
+                heading_match = _HEADING_RE.match(line)
+                if heading_match:
+                    heading = _clean_heading(heading_match.group(1))
+                elif line.strip():
+                    heading = None
+                continue
+
+            char, length, indent, filename, language = block
+            if char * 3 in line:
+                closing = _CLOSE_RE.match(line)
+                if closing and closing.group(1)[0] == char and len(closing.group(1)) >= length:
+                    if len(stack) == 1:
+                        blocks.append(CodeBlock(filename, language, "\n".join(content), stack[0] + 1))
+                        block = None
+                        continue
+                    stack.pop()
+                elif not closing and nesting and index not in self._as_text:
+                    nested = _FENCE_RE.match(line)
+                    if nested and nested.group(3) and nested.group(2)[0] == char and len(nested.group(2)) == length:
+                        stack.append(index)
+            # Drop the indentation the opening fence had (agents often indent whole answers)
+            if indent and line[:indent].strip() == "":
+                line = line[indent:]
+            content.append(line)
+
+        if block is None:
+            return None
+        for index in stack:
+            self._unclosed(index, block[3] if index == stack[0] else None)
+            self._as_text.add(index)
+        return stack[0]
+
+    def _unclosed(self, index, filename):
+        name = f" for '{filename}'" if filename else ""
+        self.errors.append(f"Line {index + 1}: code block{name} is never closed; ignored.")
+
+
+def _closers_after(lines):
+    """For each fence line, the longest bare ` and ~ fences that come after it (one backward pass)."""
+    longest = {"`": 0, "~": 0}
+    closers = {}
+    for index in range(len(lines) - 1, -1, -1):
+        line = lines[index]
+        if "```" not in line and "~~~" not in line:
+            continue
+        closers[index] = dict(longest)
+        closing = _CLOSE_RE.match(line)
+        if closing:
+            marker = closing.group(1)
+            longest[marker[0]] = max(longest[marker[0]], len(marker))
+    return closers
+
+
+def _clean_heading(text):
+    # "### `main.py`", "### **main.py**", "### File: main.py"
+    text = text.strip().strip("`*_ ")
+    if text.lower().startswith("file:"):
+        text = text[5:].strip().strip("`*_ ")
+    return text or None
+
+
+def parse_code_blocks(text):
+    """Parses a complete output. Returns (blocks, errors)."""
+    parser = FenceParser(text)
+    blocks = parser.parse()
+    return blocks, parser.errors
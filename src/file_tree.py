@@ -0,0 +1,227 @@
+import os
+import re
+
+# --- Configuration ---
+TREE_MAX_DEPTH = int(os.getenv("TREE_MAX_DEPTH", "6"))
+TREE_MAX_ENTRIES = int(os.getenv("TREE_MAX_ENTRIES", "400"))
+TREE_COLLAPSE_THRESHOLD = int(os.getenv("TREE_COLLAPSE_THRESHOLD", "60"))
+
+# Always skipped, on top of any .gitignore rules (hidden entries are skipped too).
+DEFAULT_IGNORES = ["__pycache__/", "venv/", "node_modules/"]
+
+
+def _translate(pattern):
+    """Translates a gitignore glob into a regex matched against a relative path."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        if c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(c)
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex += f"[{body}]"
+                i = end
+        else:
+            regex += re.escape(c)
+        i += 1
+    return re.compile(regex + r"\Z")
+
+
+class IgnoreRules:
+    """Ordered gitignore rules; the last matching rule decides."""
+
+    def __init__(self, rules=None):
+        self.rules = list(rules or [])  # (base_dir, regex, negate, dir_only, anchored)
+
+    def extend(self, base_dir, lines):
+        """Returns new rules with the patterns from a .gitignore in base_dir appended."""
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                rules.append((base_dir, _translate(line), negate, dir_only, anchored))
+        return IgnoreRules(rules)
+
+    def ignored(self, rel_path, is_dir):
+        result = False
+        name = rel_path.rsplit("/", 1)[-1]
+        for base_dir, regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base_dir:
+                if not rel_path.startswith(base_dir + "/"):
+                    continue
+                candidate = rel_path[len(base_dir) + 1:]
+            else:
+                candidate = rel_path
+            if regex.match(candidate if anchored else name):
+                result = not negate
+        return result
+
+
+class _DirNode:
+    __slots__ = ("signature", "files", "dirs", "collapsed", "lines", "children", "rules", "rules_key")
+
+    def __init__(self):
+        self.signature = None
+        self.rules = None
+        self.rules_key = None
+        self.files = []
+        self.dirs = []
+        self.collapsed = False
+        self.lines = []
+        self.children = {}
+
+
+class FileTreeIndex:
+    """Incrementally maintained, .gitignore-aware view of a project's files.
+
+    Directory listings are cached against each directory's mtime (and that of
+    its .gitignore), so a refresh only re-lists directories that changed and
+    only re-renders the branches above them. Output is bounded by depth, by
+    the total number of entries and by collapsing very large directories.
+    """
+
+    def __init__(self, root, max_depth=TREE_MAX_DEPTH, max_entries=TREE_MAX_ENTRIES,
+                 collapse_threshold=TREE_COLLAPSE_THRESHOLD):
+        self.root = root
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.collapse_threshold = collapse_threshold
+        self.base_rules = IgnoreRules().extend("", DEFAULT_IGNORES)
+        self._root_node = _DirNode()
+        self.rescanned = 0  # directories re-listed by the last refresh
+
+    def render(self):
+        """Returns the tree in the engine's prompt format."""
+        self.refresh()
+        lines = self._root_node.lines
+        tree_str = "\n## Current File Structure:\n"
+        if len(lines) > self.max_entries:
+            hidden = len(lines) - self.max_entries
+            lines = lines[:self.max_entries] + [f"  ... ({hidden} more entries not shown)"]
+        if lines:
+            tree_str += "\n".join(lines) + "\n"
+        return tree_str
+
+    def refresh(self):
+        """Brings the cache up to date with the filesystem."""
+        self.rescanned = 0
+        self._refresh(self._root_node, self.root, "", 0, self.base_rules, False)
+
+    def _refresh(self, node, path, rel_path, level, rules, force):
+        """Updates node in place; returns True when its rendered lines changed."""
+        gitignore = os.path.join(path, ".gitignore")
+        try:
+            signature = (os.stat(path).st_mtime_ns, self._mtime(gitignore))
+        except OSError:
+            changed = bool(node.lines) or node.signature is not None
+            node.__init__()
+            return changed
+
+        rules_key = (signature[1], id(rules))
+        if node.rules_key != rules_key:
+            node.rules = self._rules_for(gitignore, rel_path, rules, signature[1])
+            node.rules_key = rules_key
+        rules = node.rules
+        # A changed .gitignore (here or above) can change what every descendant shows.
+        rules_changed = force or node.signature is None or signature[1] != node.signature[1]
+        listing_changed = rules_changed or signature != node.signature
+        if listing_changed:
+            self._scan(node, path, rel_path, rules)
+            node.signature = signature
+            self.rescanned += 1
+
+        subtree_changed = listing_changed
+        if not node.collapsed and level < self.max_depth:
+            for name in node.dirs:
+                child = node.children.setdefault(name, _DirNode())
+                child_rel = f"{rel_path}/{name}" if rel_path else name
+                if self._refresh(child, os.path.join(path, name), child_rel, level + 1, rules, rules_changed):
+                    subtree_changed = True
+
+        if subtree_changed:
+            self._render_node(node, level)
+        return subtree_changed
+
+    def _rules_for(self, gitignore, rel_path, rules, gitignore_mtime):
+        if gitignore_mtime is None:
+            return rules
+        try:
+            with open(gitignore, 'r', encoding='utf-8', errors='replace') as f:
+                return rules.extend(rel_path, f.readlines())
+        except OSError:
+            return rules
+
+    def _scan(self, node, path, rel_path, rules):
+        files, dirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    entry_rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+                    if rules.ignored(entry_rel, is_dir):
+                        continue
+                    (dirs if is_dir else files).append(entry.name)
+        except OSError:
+            pass
+
+        node.files = sorted(files)
+        node.dirs = sorted(dirs)
+        node.collapsed = len(files) + len(dirs) > self.collapse_threshold
+        node.children = {name: child for name, child in node.children.items() if name in node.dirs}
+
+    def _render_node(self, node, level):
+        """Rebuilds node.lines from its own listing and its children's cached lines."""
+        subindent = '  ' * (level + 1)
+        if node.collapsed:
+            node.lines = [f"{subindent}... ({len(node.files)} files, {len(node.dirs)} directories collapsed)"]
+            return
+
+        lines = [f"{subindent}{f}" for f in node.files]
+        for name in node.dirs:
+            if level >= self.max_depth:
+                lines.append(f"{subindent}{name}/ ...")
+                continue
+            lines.append(f"{subindent}{name}/")
+            lines.extend(node.children[name].lines)
+        node.lines = lines
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import tempfile
+
+
+def _read_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once at import: os.umask can only be read by setting it, which is not thread-safe later on
+_UMASK = _read_umask()
+
+
+def atomic_write(path, content, encoding='utf-8'):
+    """Writes content to path via a temp file in the same directory and an atomic rename."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(content)
+        # mkstemp creates the file as 0600: keep the target's mode, or give a new file the usual one
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def ignored_dir(path):
+    """Creates directory path if needed, with a .gitignore that keeps its contents out of commits."""
+    ignore_file = os.path.join(path, ".gitignore")
+    if not os.path.exists(ignore_file):
+        atomic_write(ignore_file, "*\n")
+    return path
+
+
+def write_if_changed(path, content, encoding='utf-8'):
+    """Atomically writes content unless the file already holds exactly it. Returns True if written."""
+    data = content.encode(encoding)
+    try:
+        with open(path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    except OSError:
+        pass
+    atomic_write(path, content, encoding)
+    return True
+
+
+def resolve_inside(root, relative_path):
+    """Joins relative_path onto root, refusing paths that escape it."""
+    root = os.path.abspath(root)
+    full_path = os.path.abspath(os.path.join(root, relative_path))
+    if full_path != root and not full_path.startswith(root + os.sep):
+        raise ValueError(f"Path '{relative_path}' is outside the project directory.")
+    return full_path
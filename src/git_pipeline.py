@@ -0,0 +1,262 @@
+import atexit
+import json
+import os
+import subprocess
+import threading
+import time
+
+from src.fileio import atomic_write
+from src.locks import get_project_lock
+
+# --- Configuration ---
+GIT_PUSH_TIMEOUT = float(os.getenv("GIT_PUSH_TIMEOUT", "60"))
+GIT_PUSH_RETRIES = int(os.getenv("GIT_PUSH_RETRIES", "5"))
+GIT_RETRY_BACKOFF = float(os.getenv("GIT_RETRY_BACKOFF", "2"))
+GIT_RETRY_BACKOFF_MAX = float(os.getenv("GIT_RETRY_BACKOFF_MAX", "120"))
+# How long the process waits at exit for a pending push; if it is not done, the next start retries it.
+GIT_EXIT_WAIT = float(os.getenv("GIT_EXIT_WAIT", "30"))
+
+QUEUE_FILE = "orchestrator-queue.json"
+
+
+class GitError(Exception):
+    pass
+
+
+def bump_version(metadata_file):
+    """Increments the patch number in the project metadata. Returns the new version, or "unknown"."""
+    try:
+        with open(metadata_file, 'r') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return "unknown"
+    v_parts = metadata.get("version", "0.1.0").split('.')
+    if len(v_parts) == 3 and v_parts[-1].isdigit():
+        v_parts[-1] = str(int(v_parts[-1]) + 1)
+    metadata["version"] = ".".join(v_parts)
+    atomic_write(metadata_file, json.dumps(metadata, indent=4))
+    return metadata["version"]
+
+
+class GitPipeline:
+    """Commits one project repository and pushes it from a background thread.
+
+    A run's commit is made straight away, inside the run's project lock, so it
+    holds exactly that run's changes; only the push is left to the background
+    thread. A pending push is recorded in a queue file inside .git, so a push
+    that was still pending when the process exited is picked up by the next
+    pipeline for the same repository. All commits made since the last
+    successful push go out with a single push, retried with exponential
+    backoff. The remote and branch are looked up once.
+    """
+
+    def __init__(self, repo_dir, metadata_file=None):
+        self.repo_dir = os.path.abspath(repo_dir)
+        self.metadata_file = metadata_file
+        self.queue_file = os.path.join(self.repo_dir, ".git", QUEUE_FILE)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._busy = False
+        self._remote = None
+        self._branch = None
+        self._commits_made = 0  # commits made here; a push only covers those made before it started
+        self._state = self._load_state()
+
+    # --- Queue ---
+
+    def _load_state(self):
+        try:
+            with open(self.queue_file, 'r') as f:
+                return {"push": bool(json.load(f).get("push"))}
+        except (OSError, ValueError, AttributeError):
+            return {"push": False}
+
+    def _save_state(self):
+        try:
+            atomic_write(self.queue_file, json.dumps(self._state))
+        except OSError as e:
+            print(f"[Git] Could not persist queue: {e}")
+
+    def commit(self, message):
+        """Bumps the version and commits the working tree now ('{version}' in message is filled in).
+
+        The push is queued for the background thread. Returns True if a commit was made.
+        """
+        with get_project_lock(self.repo_dir).hold(timeout=None, purpose="git commit"):
+            committed = self._bump_and_commit(message)
+            push = committed and bool(self.remote())
+            with self._cond:
+                self._commits_made += 1
+                # Another process sharing the repository may have pushed (or left a push) meanwhile
+                self._state = self._load_state()
+                if push and not self._state["push"]:
+                    self._state["push"] = True
+                    self._save_state()
+                if self._state["push"]:
+                    self._start()
+            return committed
+
+    def resume(self):
+        """Starts a push left pending by an earlier process, if any."""
+        with self._cond:
+            if self._state["push"]:
+                print(f"[Git] Resuming the pending push for {self.repo_dir}")
+                self._start()
+
+    def pending(self):
+        with self._cond:
+            return 1 if self._state["push"] else 0
+
+    def wait(self, timeout=None):
+        """Blocks until the pending push is done (or timeout). Returns True if nothing is pending."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return not self._state["push"]
+
+    def _start(self):
+        # Called with the lock held
+        if self._busy:
+            self._cond.notify_all()
+            return
+        self._busy = True
+        self._thread = threading.Thread(target=self._worker, name="git-pipeline", daemon=True)
+        self._thread.start()
+
+    # --- Worker ---
+
+    def _worker(self):
+        try:
+            while True:
+                with self._cond:
+                    if not self._state["push"]:
+                        # Decided under the lock, so a commit after this point starts a new worker
+                        self._stop()
+                        return
+                if not self._push_with_retry():
+                    with self._cond:
+                        self._stop()
+                        return
+        except BaseException:
+            with self._cond:
+                self._stop()
+            raise
+
+    def _stop(self):
+        self._busy = False
+        self._cond.notify_all()
+
+    def _bump_and_commit(self, message):
+        try:
+            version = bump_version(self.metadata_file) if self.metadata_file else "unknown"
+            return self._commit(message.replace("{version}", version))
+        except (GitError, OSError) as e:
+            print(f"[Git] Error committing changes: {e}")
+            return False
+
+    def _commit(self, message):
+        self._git("add", "-A")
+        # 'git commit' fails when there is nothing to commit; that is not an error here
+        result = self._git("commit", "-q", "-m", message, check=False)
+        if result.returncode != 0:
+            if "nothing to commit" in result.stdout + result.stderr:
+                return False
+            raise GitError(result.stderr.strip() or result.stdout.strip())
+        print(f"[Git] Committed: {message}")
+        return True
+
+    def _push_with_retry(self):
+        delay = GIT_RETRY_BACKOFF
+        for attempt in range(1, GIT_PUSH_RETRIES + 1):
+            with self._cond:
+                commits_made = self._commits_made
+            try:
+                self._push()
+            except (GitError, OSError, subprocess.TimeoutExpired) as e:
+                print(f"[Git] Push attempt {attempt}/{GIT_PUSH_RETRIES} failed: {e}")
+                # The remote or branch may have been changed behind our back
+                self.invalidate()
+                if attempt < GIT_PUSH_RETRIES:
+                    with self._cond:
+                        self._cond.wait(delay)
+                    delay = min(delay * 2, GIT_RETRY_BACKOFF_MAX)
+                continue
+            with self._cond:
+                # A commit made during the push still needs one
+                if self._commits_made == commits_made:
+                    self._state["push"] = False
+                    self._save_state()
+            return True
+        print("[Git] Push warning: giving up for now; it will be retried with the next commit.")
+        return False
+
+    def _push(self):
+        remote = self.remote()
+        if not remote:
+            return
+        branch = self.branch()
+        if not branch:
+            raise GitError("detached HEAD, nothing to push")
+        start = time.perf_counter()
+        self._git("push", remote, branch, timeout=GIT_PUSH_TIMEOUT)
+        print(f"[Git] Pushed {branch} to {remote} in {time.perf_counter() - start:.1f}s")
+
+    # --- Cached lookups ---
+
+    def remote(self):
+        """The remote to push to ('origin' if present, else the first one), or "" when there is none."""
+        if self._remote is None:
+            remotes = self._git("remote", check=False).stdout.split()
+            self._remote = "origin" if "origin" in remotes else (remotes[0] if remotes else "")
+        return self._remote
+
+    def branch(self):
+        if self._branch is None:
+            self._branch = self._git("branch", "--show-current", check=False).stdout.strip()
+        return self._branch
+
+    def invalidate(self):
+        """Forgets the cached remote and branch (call after changing either)."""
+        self._remote = None
+        self._branch = None
+
+    def _git(self, *args, check=True, timeout=None):
+        result = subprocess.run(
+            ["git", *args], cwd=self.repo_dir, capture_output=True, text=True,
+            stdin=subprocess.DEVNULL, timeout=timeout
+        )
+        if check and result.returncode != 0:
+            raise GitError(f"git {args[0]} failed: {result.stderr.strip() or result.stdout.strip()}")
+        return result
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_git_pipeline(repo_dir, metadata_file=None):
+    """Returns the process-wide pipeline for repo_dir, resuming a push left pending by an earlier process."""
+    key = os.path.abspath(repo_dir)
+    with _pipelines_lock:
+        pipeline = _pipelines.get(key)
+        if pipeline is None:
+            pipeline = GitPipeline(key, metadata_file)
+            _pipelines[key] = pipeline
+            pipeline.resume()
+        return pipeline
+
+
+@atexit.register
+def _drain_on_exit():
+    deadline = time.monotonic() + GIT_EXIT_WAIT
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    for pipeline in pipelines:
+        if pipeline.pending():
+            print("[Git] Waiting for the pending push...")
+            if not pipeline.wait(max(0, deadline - time.monotonic())):
+                print("[Git] Push still pending; it will be retried next time.")
@@ -0,0 +1,85 @@
+import os
+import re
+
+# --- Configuration ---
+# Local decisions below this confidence fall back to the LLM classifier.
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.8"))
+
+TASK_VERBS = {
+    "add", "build", "change", "convert", "create", "delete", "deploy", "develop", "extend",
+    "fix", "generate", "implement", "improve", "install", "integrate", "make", "migrate",
+    "modify", "move", "optimize", "optimise", "refactor", "remove", "rename", "replace",
+    "rewrite", "set", "setup", "support", "update", "upgrade", "write"
+}
+QUESTION_WORDS = {
+    "how", "what", "why", "when", "where", "which", "who", "whom", "whose",
+    "is", "are", "was", "were", "does", "do", "did", "should", "explain", "describe", "tell", "list", "show"
+}
+GREETINGS = {"hi", "hello", "hey", "thanks", "thank", "ok", "okay", "cool", "great", "bye"}
+# Polite wrappers that do not change what is being asked for ("can you add ..." is a task).
+POLITE_PREFIXES = (
+    "please", "can you", "could you", "would you", "will you", "i want you to", "i need you to",
+    "i'd like you to", "i would like you to", "let's", "lets", "go ahead and", "kindly"
+)
+
+_WORD_RE = re.compile(r"[a-z']+")
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+_INTENT_RE = re.compile(r"\b(CHAT|TASK)\b")
+
+
+class IntentDecision:
+    def __init__(self, intent, confidence, source):
+        self.intent = intent
+        self.confidence = confidence
+        self.source = source  # "heuristic" or "llm"
+
+    def to_dict(self):
+        return {"intent": self.intent, "confidence": self.confidence, "source": self.source}
+
+    def __repr__(self):
+        return f"IntentDecision({self.intent!r}, {self.confidence:.2f}, {self.source!r})"
+
+
+def classify_heuristic(user_input):
+    """Keyword/verb classifier for obvious inputs. Low confidence means 'ask the LLM'."""
+    text = user_input.strip().lower()
+    words = _WORD_RE.findall(text)
+    if not words:
+        return IntentDecision("CHAT", 0.5, "heuristic")
+
+    if words[0] in GREETINGS and len(words) <= 4:
+        return IntentDecision("CHAT", 0.95, "heuristic")
+
+    polite = False
+    for prefix in POLITE_PREFIXES:
+        if text.startswith(prefix + " "):
+            text = text[len(prefix):].strip()
+            words = _WORD_RE.findall(text)
+            polite = True
+            break
+    if not words:
+        return IntentDecision("CHAT", 0.5, "heuristic")
+
+    first = words[0]
+    has_task_verb = any(w in TASK_VERBS for w in words)
+
+    # Imperatives: "add a login page", "please fix the tests", "can you create ...?"
+    if first in TASK_VERBS:
+        return IntentDecision("TASK", 0.85 if polite else 0.95, "heuristic")
+
+    # Questions: "how do I ...", "what does main.py do?", "explain the auth flow"
+    if first in QUESTION_WORDS and not polite:
+        return IntentDecision("CHAT", 0.75 if has_task_verb else 0.95, "heuristic")
+    if text.endswith("?") and not has_task_verb:
+        return IntentDecision("CHAT", 0.85, "heuristic")
+
+    if has_task_verb:
+        return IntentDecision("TASK", 0.65, "heuristic")
+    return IntentDecision("CHAT", 0.55, "heuristic")
+
+
+def normalize_intent(raw):
+    """Maps free-form classifier output to 'CHAT'/'TASK', or None if it names neither."""
+    text = _THINK_RE.sub("", str(raw)).upper()
+    match = _INTENT_RE.search(text)
+    return match.group(1) if match else None
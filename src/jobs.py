@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.events import EventStream, streaming_to
+
+# --- Configuration ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised from a progress report once cancellation has been requested."""
+
+
+class Job:
+    """A unit of crew work (run or message) tracked by the JobManager."""
+
+    def __init__(self, project_name, kind, payload):
+        self.id = uuid.uuid4().hex
+        self.project_name = project_name
+        self.kind = kind
+        self.payload = payload
+        self.status = "queued"
+        self.progress = {"stage": None, "step": 0, "total": 0, "iteration": 0}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        # Live events (progress, tasks, tokens, tools, files, verdicts) for streaming clients
+        self.events = EventStream()
+        self.events.publish("status", status=self.status)
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def request_cancel(self):
+        self._cancel_event.set()
+
+    def update_progress(self, progress):
+        """Progress callback handed to the engine. Aborts the crew if cancelled.
+
+        Repeated reports (e.g. while waiting for the project lock) only check
+        for cancellation; an event is published when the progress changes.
+        """
+        progress = dict(self.progress, **progress)
+        if progress != self.progress:
+            self.progress = progress
+            self.events.publish("progress", **progress)
+        if self.cancel_requested:
+            raise JobCancelled(f"Job {self.id} was cancelled.")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "project": self.project_name,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs crew work on a bounded thread pool and keeps track of job state."""
+
+    def __init__(self, max_workers=JOB_WORKERS, history_limit=JOB_HISTORY_LIMIT):
+        self.max_workers = max_workers
+        self.history_limit = history_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, project_name, kind, payload, fn):
+        """Queues fn(job) for execution and returns the Job immediately."""
+        job = Job(project_name, kind, payload)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._execute, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, project_name=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if project_name:
+            jobs = [j for j in jobs if j.project_name == project_name]
+        return jobs
+
+    def cancel(self, job_id):
+        """Cancels a queued job outright, or flags a running one to stop at the next task boundary."""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+
+        job.request_cancel()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, "cancelled")
+        elif job.status == "running":
+            job.status = "cancelling"
+        return job
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _execute(self, job, fn):
+        if job.cancel_requested:
+            self._finish(job, "cancelled")
+            return
+
+        job.status = "running"
+        job.started_at = time.time()
+        job.events.publish("status", status=job.status)
+        try:
+            with streaming_to(job.events):
+                result = fn(job)
+        except JobCancelled:
+            self._finish(job, "cancelled")
+            return
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "cancelled" if job.cancel_requested else "failed")
+            return
+
+        job.result = result
+        # The engine reports crew failures as strings, so a cancelled crew lands here too.
+        self._finish(job, "cancelled" if job.cancel_requested else "succeeded")
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        job.events.publish("done", **job.to_dict())
+        job.events.close()
+
+    def _prune(self):
+        """Drops the oldest finished jobs once the history limit is exceeded."""
+        excess = len(self._jobs) - self.history_limit
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:excess]:
+            del self._jobs[job_id]
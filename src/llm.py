@@ -0,0 +1,147 @@
+import asyncio
+from contextlib import ExitStack, nullcontext
+from typing import Any
+from pydantic import PrivateAttr
+from crewai.llms.base_llm import BaseLLM, call_stop_override, call_stream_override
+
+# Sampling settings that change what a model returns for the same messages.
+SAMPLING_FIELDS = ("temperature", "top_p", "max_tokens", "seed", "presence_penalty", "frequency_penalty")
+
+
+class RoleLLM(BaseLLM):
+    """Per-role view of a shared LLM client.
+
+    Agents get one of these instead of the raw client so that calls can be
+    attributed to a role (intent classifier, PM, developer, ...) and served
+    from the response cache when that role has caching enabled. With a
+    backend, every call that reaches the model first takes one of that
+    backend's in-flight slots, queued fairly against other projects. With a
+    router, calls are spread over the router's endpoints instead and fail
+    over between them; the delegate then only supplies the model settings.
+    With a context budget, prompts over the role's token limit have their
+    task context reduced before anything else sees them.
+    """
+
+    llm_type: str = "role"
+    role: str = "default"
+    project: str = "default"
+    _delegate: Any = PrivateAttr(default=None)
+    _cache: Any = PrivateAttr(default=None)
+    _backend: Any = PrivateAttr(default=None)
+    _router: Any = PrivateAttr(default=None)
+    _budget: Any = PrivateAttr(default=None)
+
+    def __init__(self, delegate, role, cache=None, backend=None, project="default", router=None, budget=None,
+                 **kwargs):
+        super().__init__(model=str(delegate.model), role=role, project=project, **kwargs)
+        self._delegate = delegate
+        self._cache = cache
+        self._backend = backend
+        self._router = router
+        self._budget = budget
+
+    @property
+    def delegate(self):
+        return self._delegate
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        if self._budget:
+            messages = self._budget.fit(messages, self.role, from_task)
+        cache = self._cache if self._cache and self._cache.enabled_for(self.role) else None
+        if response_model is not None:
+            cache = None
+
+        key = None
+        if cache:
+            key = cache.make_key(self.model, messages, self.sampling_params(), tools)
+            cached = cache.get(key, self.role)
+            if cached is not None:
+                return cached
+
+        def invoke(llm):
+            with self._forward_overrides(llm):
+                return llm.call(
+                    messages,
+                    tools=tools,
+                    callbacks=callbacks,
+                    available_functions=available_functions,
+                    from_task=from_task,
+                    from_agent=from_agent,
+                    response_model=response_model
+                )
+
+        if self._router:
+            result = self._router.call(invoke, self.project, self._task_id(from_task))
+        else:
+            with self._slot(from_task):
+                result = invoke(self._delegate)
+
+        # Only plain text is replayable; tool calls and structured outputs are not.
+        if cache and isinstance(result, str):
+            cache.put(key, result, self.role)
+        return result
+
+    async def acall(self, messages, tools=None, callbacks=None, available_functions=None,
+                    from_task=None, from_agent=None, response_model=None):
+        if self._budget:
+            messages = self._budget.fit(messages, self.role, from_task)
+
+        async def invoke(llm):
+            with self._forward_overrides(llm):
+                return await llm.acall(
+                    messages,
+                    tools=tools,
+                    callbacks=callbacks,
+                    available_functions=available_functions,
+                    from_task=from_task,
+                    from_agent=from_agent,
+                    response_model=response_model
+                )
+
+        if self._router:
+            return await self._router.acall(invoke, self.project, self._task_id(from_task))
+        if self._backend:
+            # Waiting for a slot blocks, so it must not run on the event loop
+            await asyncio.to_thread(self._backend.acquire, self.project, self._task_id(from_task))
+        try:
+            return await invoke(self._delegate)
+        finally:
+            if self._backend:
+                self._backend.release()
+
+    def sampling_params(self):
+        params = {name: getattr(self._delegate, name, None) for name in SAMPLING_FIELDS}
+        params["stop"] = sorted(self.stop_sequences)
+        return params
+
+    def supports_function_calling(self):
+        return self._delegate.supports_function_calling()
+
+    def supports_stop_words(self):
+        return self._delegate.supports_stop_words()
+
+    def supports_multimodal(self):
+        return self._delegate.supports_multimodal()
+
+    def get_context_window_size(self):
+        return self._delegate.get_context_window_size()
+
+    def _slot(self, from_task):
+        if self._backend is None:
+            return nullcontext()
+        return self._backend.slot(self.project, self._task_id(from_task))
+
+    @staticmethod
+    def _task_id(task):
+        return str(task.id) if getattr(task, "id", None) is not None else None
+
+    def _forward_overrides(self, llm):
+        """Applies the stop words and streaming mode set on this wrapper to the client making the call."""
+        stack = ExitStack()
+        if self.stop_sequences:
+            stack.enter_context(call_stop_override(llm, list(self.stop_sequences)))
+        stream = self._effective_stream()
+        if stream is not None:
+            stack.enter_context(call_stream_override(llm, bool(stream)))
+        return stack
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# --- Configuration ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+# Roles whose calls are deterministic enough to replay. The runner and anything
+# that depends on tool results (files on disk, test runs) should stay out.
+LLM_CACHE_ROLES = os.getenv("LLM_CACHE_ROLES", "classifier,pm_chat")
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of LLM text responses.
+
+    Keys hash the model, messages, tool schemas and sampling parameters.
+    Entries expire after ttl seconds and the least recently used ones are
+    evicted once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, directory=LLM_CACHE_DIR, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                 ttl=LLM_CACHE_TTL, roles=LLM_CACHE_ROLES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        if isinstance(roles, str):
+            roles = [r.strip() for r in roles.split(",") if r.strip()]
+        self.roles = set(roles)
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk, computed lazily
+        self.hits = {}
+        self.misses = {}
+
+    def enabled_for(self, role):
+        return "*" in self.roles or role in self.roles
+
+    @staticmethod
+    def make_key(model, messages, params=None, tools=None):
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params or {}, "tools": tools},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, role="default"):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(self.misses, role)
+            return None
+
+        if self.ttl > 0 and time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            self._count(self.misses, role)
+            return None
+
+        try:
+            os.utime(path)  # mtime doubles as last-used time for LRU eviction
+        except OSError:
+            pass
+        self._count(self.hits, role)
+        return entry.get("response")
+
+    def put(self, key, response, role="default"):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"created": time.time(), "role": role, "response": response})
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += len(data)
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        """Removes expired entries, then least recently used ones until under max_bytes."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue  # being written by put()
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, path in entries:
+            # mtime is refreshed on hits, so an old mtime means old and unused
+            expired = self.ttl > 0 and now - mtime > self.ttl
+            if not expired and total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+        with self._lock:
+            self._size = total
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                self._remove(os.path.join(root, name))
+        with self._lock:
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "bytes": self._size if self._size is not None else self._disk_usage(),
+                "roles": sorted(self.roles)
+            }
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _count(self, counter, role):
+        with self._lock:
+            counter[role] = counter.get(role, 0) + 1
+
+    def _disk_usage(self):
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide cache, or None when LLM_CACHE_ENABLED is off."""
+    global _shared_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
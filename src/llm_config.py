@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+
+from src.llm import SAMPLING_FIELDS
+from src.llm_router import parse_endpoints
+
+# --- Configuration ---
+# One base URL, or several separated by commas to balance calls across inference hosts.
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "https://llm.drivakosv.gr/v1")
+MODEL_NAME = os.getenv("MODEL_NAME", "openai/qwen3:8b")
+# Model for the "fast" tier (light roles); empty uses MODEL_NAME with the fast tier's sampling settings.
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "")
+# Optional JSON file with tiers and role assignments (see ModelConfig).
+LLM_MODELS_FILE = os.getenv("LLM_MODELS_FILE", "llm_models.json")
+# Quick reassignment on top of the file, e.g. "classifier=main,docs=main" or "*=main".
+LLM_ROLE_TIERS = os.getenv("LLM_ROLE_TIERS", "")
+# Stream completions token by token, so clients of a job's event stream see output as it is generated.
+LLM_STREAM = os.getenv("LLM_STREAM", "true").lower() in ("1", "true", "yes")
+
+# Every role the engine builds an agent for.
+ROLES = ("classifier", "pm_chat", "pm", "developer", "qa", "runner", "docs", "reviewer")
+
+# "main" is the default model; "fast" answers deterministically and is meant for a smaller model.
+DEFAULT_TIERS = {
+    "main": {},
+    "fast": {"temperature": 0.0}
+}
+# Short, low-stakes answers: an intent label, a chat reply, a README.
+DEFAULT_ROLE_TIERS = {"classifier": "fast", "pm_chat": "fast", "docs": "fast"}
+
+SPEC_FIELDS = ("model", "endpoints") + SAMPLING_FIELDS
+
+
+class ModelSpec:
+    """The model, endpoints and sampling settings one role's LLM is built with."""
+
+    def __init__(self, model, endpoints, sampling=None, tier=None):
+        self.model = model
+        self.endpoints = list(endpoints)
+        self.sampling = {name: value for name, value in (sampling or {}).items() if value is not None}
+        self.tier = tier
+
+    def key(self):
+        """Identifies the clients this spec needs; roles with equal keys share them."""
+        return (self.model, tuple(self.endpoints), tuple(sorted(self.sampling.items())))
+
+    def to_dict(self):
+        return {"tier": self.tier, "model": self.model, "endpoints": self.endpoints, **self.sampling}
+
+    def __repr__(self):
+        return f"ModelSpec({self.model!r}, tier={self.tier!r})"
+
+
+def parse_role_tiers(value):
+    """Parses "role=tier,role=tier" into a dict."""
+    assignments = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        role, sep, tier = item.partition("=")
+        if not sep or not role.strip() or not tier.strip():
+            raise ValueError(f"Invalid role tier assignment '{item.strip()}' (expected role=tier)")
+        assignments[role.strip()] = tier.strip()
+    return assignments
+
+
+class ModelConfig:
+    """Maps agent roles to models.
+
+    Tiers are named sets of settings (model, endpoints, sampling fields);
+    each role is assigned a tier by name, or a dict with a "tier" plus
+    per-role overrides. Unset fields fall back to MODEL_NAME, OLLAMA_BASE_URL
+    and the server's own sampling defaults. The JSON file has the form
+
+        {"tiers": {"fast": {"model": "openai/qwen3:1.7b", "temperature": 0}},
+         "roles": {"classifier": "fast", "developer": {"tier": "main", "temperature": 0.2}}}
+
+    and is merged over the built-in tiers and assignments.
+    """
+
+    def __init__(self, tiers=None, roles=None, default_model=MODEL_NAME, default_endpoints=None):
+        self.default_model = default_model
+        self.default_endpoints = list(default_endpoints or parse_endpoints(OLLAMA_BASE_URL))
+        self.tiers = {name: dict(settings) for name, settings in DEFAULT_TIERS.items()}
+        if LLM_FAST_MODEL:
+            self.tiers["fast"]["model"] = LLM_FAST_MODEL
+        for name, settings in (tiers or {}).items():
+            self.tiers[name] = {**self.tiers.get(name, {}), **self._check(settings, f"tier '{name}'")}
+        self.roles = dict(DEFAULT_ROLE_TIERS)
+        self.assign(roles or {})
+
+    def assign(self, roles):
+        """Updates role assignments; the role "*" reassigns every role."""
+        for role, entry in roles.items():
+            if isinstance(entry, dict):
+                entry = {"tier": entry.get("tier", "main"),
+                         **self._check({k: v for k, v in entry.items() if k != "tier"}, f"role '{role}'")}
+            tier = entry["tier"] if isinstance(entry, dict) else entry
+            if tier not in self.tiers:
+                raise ValueError(f"Role '{role}' uses unknown tier '{tier}' (known: {', '.join(sorted(self.tiers))})")
+            for name in (ROLES if role == "*" else [role]):
+                self.roles[name] = entry
+
+    def for_role(self, role):
+        entry = self.roles.get(role, "main")
+        overrides = dict(entry) if isinstance(entry, dict) else {"tier": entry}
+        return self.for_tier(overrides.pop("tier"), overrides)
+
+    def for_tier(self, tier, overrides=None):
+        settings = {**self.tiers[tier], **(overrides or {})}
+        endpoints = settings.get("endpoints") or self.default_endpoints
+        if isinstance(endpoints, str):
+            endpoints = parse_endpoints(endpoints)
+        return ModelSpec(
+            settings.get("model") or self.default_model,
+            endpoints,
+            {name: settings.get(name) for name in SAMPLING_FIELDS},
+            tier
+        )
+
+    def describe(self):
+        return {role: self.for_role(role).to_dict() for role in ROLES}
+
+    @staticmethod
+    def _check(settings, where):
+        unknown = set(settings) - set(SPEC_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown setting(s) {', '.join(sorted(unknown))} in {where}")
+        return dict(settings)
+
+    @classmethod
+    def load(cls, path=LLM_MODELS_FILE, role_tiers=LLM_ROLE_TIERS):
+        """Builds the config from the JSON file (if it exists) and the LLM_ROLE_TIERS overrides."""
+        data = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                raise ValueError(f"Could not read {path}: {e}")
+            print(f"[LLMConfig] Loaded model tiers from {path}")
+        config = cls(tiers=data.get("tiers"), roles=data.get("roles"))
+        config.assign(parse_role_tiers(role_tiers))
+        return config
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_model_config():
+    """Returns the process-wide role -> model configuration."""
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = ModelConfig.load()
+        return _config
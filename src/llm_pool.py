@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import httpx
+from crewai.llms.base_llm import BaseLLM
+
+from src.metrics import get_metrics
+
+# --- Configuration ---
+# Requests allowed in flight per LLM base URL; match Ollama's OLLAMA_NUM_PARALLEL. 0 means unlimited.
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "4"))
+# Longest a call may wait for a slot before it fails (seconds; 0 waits forever).
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "600"))
+LLM_POOL_CONNECTIONS = int(os.getenv("LLM_POOL_CONNECTIONS", "16"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "120"))
+
+
+class FairLimiter:
+    """Bounds in-flight requests and hands free slots to waiting keys (projects) in round-robin order.
+
+    A project that queues many calls cannot starve another one: each release
+    serves the next project in turn, and within a project calls are FIFO.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.inflight = 0
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()  # key -> deque of waiting Events
+
+    @property
+    def queued(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def acquire(self, key="default", timeout=None):
+        """Blocks until a slot is free. Returns the seconds spent waiting; raises TimeoutError."""
+        start = time.monotonic()
+        with self._lock:
+            if not self.limit or (self.inflight < self.limit and not self._queues):
+                self.inflight += 1
+                return 0.0
+            event = threading.Event()
+            self._queues.setdefault(key, deque()).append(event)
+
+        if not event.wait(timeout or None):
+            with self._lock:
+                if not event.is_set():
+                    queue = self._queues.get(key)
+                    queue.remove(event)
+                    if not queue:
+                        del self._queues[key]
+                    raise TimeoutError(f"No LLM slot became free within {timeout:.0f}s")
+        return time.monotonic() - start
+
+    def release(self):
+        with self._lock:
+            if not self._queues:
+                self.inflight -= 1
+                return
+            # The slot passes straight to the next waiter, so inflight is unchanged
+            key, queue = next(iter(self._queues.items()))
+            event = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            event.set()
+
+
+class Backend:
+    """Shared state for one LLM base URL: a keep-alive connection pool and the in-flight limit."""
+
+    def __init__(self, base_url, max_inflight=LLM_MAX_INFLIGHT):
+        self.base_url = base_url
+        self.label = urlparse(base_url).netloc or base_url
+        self.limiter = FairLimiter(max_inflight)
+        self._http_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def http_client(self):
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=max(LLM_POOL_CONNECTIONS, self.limiter.limit),
+                        max_keepalive_connections=LLM_POOL_CONNECTIONS,
+                        keepalive_expiry=LLM_KEEPALIVE_SECONDS
+                    ),
+                    timeout=None  # the OpenAI client sets a timeout on every request
+                )
+            return self._http_client
+
+    def attach(self, llm):
+        """Points an OpenAI-compatible crewai LLM's sync client at the shared connection pool.
+
+        Other LLM types keep their own transport. The async client is left
+        alone: an httpx.AsyncClient cannot be shared between event loops.
+        """
+        if not isinstance(llm, BaseLLM) or not hasattr(llm, "_get_client_params"):
+            return llm
+        try:
+            from openai import OpenAI
+            llm._client = OpenAI(**llm._get_client_params(), http_client=self.http_client)
+        except (ImportError, ValueError, TypeError) as e:
+            print(f"[LLMPool] Using a private connection for {self.label}: {e}")
+        return llm
+
+    def acquire(self, project="default", task_id=None):
+        """Takes one of the backend's in-flight slots; the wait is recorded in the metrics."""
+        metrics = get_metrics()
+        metrics.llm_queued.inc(self.label)
+        try:
+            wait = self.limiter.acquire(project, LLM_QUEUE_TIMEOUT)
+        finally:
+            metrics.llm_queued.dec(self.label)
+        metrics.record_queue_wait(wait, self.label, project, task_id)
+        metrics.llm_inflight.inc(self.label)
+        return wait
+
+    def release(self):
+        get_metrics().llm_inflight.dec(self.label)
+        self.limiter.release()
+
+    @contextmanager
+    def slot(self, project="default", task_id=None):
+        wait = self.acquire(project, task_id)
+        try:
+            yield wait
+        finally:
+            self.release()
+
+    def close(self):
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(base_url):
+    """Returns the process-wide Backend for base_url, shared by every engine."""
+    key = (base_url or "").rstrip("/")
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = Backend(key)
+            _backends[key] = backend
+        return backend
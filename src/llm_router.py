@@ -0,0 +1,285 @@
+import asyncio
+import contextvars
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from src.llm_pool import get_backend
+from src.metrics import get_metrics
+
+# --- Configuration ---
+# Seconds between health probes of each endpoint; probes only run when there is more than one.
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+LLM_HEALTH_TIMEOUT = float(os.getenv("LLM_HEALTH_TIMEOUT", "5"))
+# Seconds an endpoint is skipped after a failed call or probe (a passing probe ends it early).
+LLM_FAILOVER_COOLDOWN = float(os.getenv("LLM_FAILOVER_COOLDOWN", "30"))
+# A run leaves its endpoint once that endpoint has this many more calls waiting than the best one.
+LLM_STICKY_SLACK = int(os.getenv("LLM_STICKY_SLACK", "4"))
+
+LATENCY_SMOOTHING = 0.3  # weight of the newest call in the moving average
+DEFAULT_LATENCY = 1.0  # assumed for endpoints that have not answered yet
+MAX_SESSIONS = 1024
+
+_session = contextvars.ContextVar("llm_session", default=None)
+
+
+def parse_endpoints(value):
+    """Splits a comma/whitespace separated list of base URLs."""
+    return [url.rstrip("/") for url in re.split(r"[,\s]+", value or "") if url]
+
+
+def current_session():
+    return _session.get()
+
+
+@contextmanager
+def routing_session(project):
+    """Routes every LLM call made inside the block (and its task threads) to the same endpoint.
+
+    Nested blocks keep the outer session, so a chat message that turns into a
+    run stays where its classification ran.
+    """
+    if _session.get() is not None:
+        yield _session.get()
+        return
+    token = _session.set(f"{project}/{uuid.uuid4().hex[:8]}")
+    try:
+        yield _session.get()
+    finally:
+        _session.reset(token)
+
+
+def is_endpoint_failure(error):
+    """True for errors that blame the endpoint (unreachable, timed out, 5xx) rather than the request."""
+    while error is not None:
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return True
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int) and status >= 500:
+            return True
+        error = error.__cause__
+    return False
+
+
+class Endpoint:
+    """Routing state for one backend: smoothed call latency and when it may be used again."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.latency = None
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def label(self):
+        return self.backend.label
+
+    def available(self, now):
+        return now >= self.down_until
+
+    def load(self):
+        limiter = self.backend.limiter
+        return limiter.inflight + limiter.queued
+
+    def score(self, default_latency):
+        """Rough time a new call would take here: latency scaled by how busy the slots are."""
+        latency = self.latency if self.latency is not None else default_latency
+        capacity = self.backend.limiter.limit or 1
+        return latency * (1 + self.load() / capacity)
+
+
+class EndpointPool:
+    """Spreads LLM calls over several base URLs.
+
+    Each call goes to the endpoint with the lowest expected completion time
+    (observed latency times queue depth), except that calls from the same
+    routing session stay on one endpoint so its prompt cache stays warm.
+    Endpoints that fail a call or a health probe are skipped for a cooldown.
+    """
+
+    def __init__(self, base_urls):
+        if not base_urls:
+            raise ValueError("At least one LLM endpoint is required")
+        self.endpoints = [Endpoint(get_backend(url)) for url in base_urls]
+        self._sessions = OrderedDict()  # session -> Endpoint
+        self._lock = threading.Lock()
+        self._health_thread = None
+        metrics = get_metrics()
+        for endpoint in self.endpoints:
+            metrics.llm_endpoint_up.set(1, endpoint.label)
+
+    def route(self, session=None, exclude=()):
+        """Picks the endpoint for the next call. Endpoints in exclude are only used if nothing else is left."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+            healthy = [e for e in candidates if e.available(now)]
+            if not healthy:
+                # Everything is cooling down: try whichever failed longest ago
+                return min(candidates, key=lambda e: e.down_until)
+            known = [e.latency for e in self.endpoints if e.latency is not None]
+            default_latency = sum(known) / len(known) if known else DEFAULT_LATENCY
+            best = min(healthy, key=lambda e: e.score(default_latency))
+
+            chosen = best
+            sticky = self._sessions.get(session) if session else None
+            if sticky in healthy and sticky.backend.limiter.queued - best.backend.limiter.queued < LLM_STICKY_SLACK:
+                chosen = sticky
+            if session:
+                self._sessions[session] = chosen
+                self._sessions.move_to_end(session)
+                while len(self._sessions) > MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            return chosen
+
+    def report_success(self, endpoint, seconds):
+        with self._lock:
+            if endpoint.latency is None:
+                endpoint.latency = seconds
+            else:
+                endpoint.latency += LATENCY_SMOOTHING * (seconds - endpoint.latency)
+            self._mark_up(endpoint)
+
+    def report_failure(self, endpoint, error):
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.down_until = time.monotonic() + LLM_FAILOVER_COOLDOWN
+        print(f"[LLMRouter] {endpoint.label} failed ({error}); skipping it for {LLM_FAILOVER_COOLDOWN:.0f}s")
+        get_metrics().llm_endpoint_up.set(0, endpoint.label)
+
+    def _mark_up(self, endpoint):
+        # Called with the lock held
+        if endpoint.failures:
+            print(f"[LLMRouter] {endpoint.label} is back")
+        endpoint.failures = 0
+        endpoint.down_until = 0.0
+        get_metrics().llm_endpoint_up.set(1, endpoint.label)
+
+    # --- Health checks ---
+
+    def check_health(self):
+        """Probes every endpoint's /models listing once."""
+        for endpoint in self.endpoints:
+            try:
+                response = endpoint.backend.http_client.get(
+                    f"{endpoint.backend.base_url}/models", timeout=LLM_HEALTH_TIMEOUT
+                )
+                healthy = response.status_code < 500
+                reason = f"HTTP {response.status_code}"
+            except Exception as e:
+                healthy, reason = False, e
+            if healthy:
+                with self._lock:
+                    self._mark_up(endpoint)
+            elif endpoint.available(time.monotonic()):
+                self.report_failure(endpoint, f"health check: {reason}")
+
+    def start_health_checks(self):
+        """Starts the background prober (once). A single endpoint has nothing to fail over to, so it is not probed."""
+        with self._lock:
+            if self._health_thread or len(self.endpoints) < 2 or LLM_HEALTH_INTERVAL <= 0:
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, name="llm-health", daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            time.sleep(LLM_HEALTH_INTERVAL)
+            self.check_health()
+
+
+class LLMRouter:
+    """One engine's clients for every endpoint in a pool.
+
+    call() and acall() run a model call on the routed endpoint inside one of
+    its in-flight slots. If the endpoint fails, it is reported to the pool
+    and the call is retried on the next endpoint until all have been tried.
+    """
+
+    def __init__(self, pool, make_client):
+        self.pool = pool
+        self._make_client = make_client  # base_url -> LLM
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, endpoint):
+        with self._lock:
+            llm = self._clients.get(endpoint.backend.base_url)
+            if llm is None:
+                llm = endpoint.backend.attach(self._make_client(endpoint.backend.base_url))
+                self._clients[endpoint.backend.base_url] = llm
+            return llm
+
+    @property
+    def primary(self):
+        """The client for the first endpoint; used for model settings that do not depend on the host."""
+        return self.client(self.pool.endpoints[0])
+
+    def call(self, invoke, project="default", task_id=None):
+        """Runs invoke(llm) on the routed endpoint, failing over to the others."""
+        tried = []
+        while True:
+            endpoint = self.pool.route(current_session() or project, exclude=tried)
+            with endpoint.backend.slot(project, task_id):
+                start = time.monotonic()
+                try:
+                    result = invoke(self.client(endpoint))
+                except Exception as e:
+                    if not self._failover(endpoint, e, tried):
+                        raise
+                    continue
+            self.pool.report_success(endpoint, time.monotonic() - start)
+            return result
+
+    async def acall(self, invoke, project="default", task_id=None):
+        """Async call(): invoke(llm) must return an awaitable."""
+        tried = []
+        while True:
+            endpoint = self.pool.route(current_session() or project, exclude=tried)
+            # Waiting for a slot blocks, so it must not run on the event loop
+            await asyncio.to_thread(endpoint.backend.acquire, project, task_id)
+            try:
+                start = time.monotonic()
+                try:
+                    result = await invoke(self.client(endpoint))
+                except Exception as e:
+                    if not self._failover(endpoint, e, tried):
+                        raise
+                    continue
+            finally:
+                endpoint.backend.release()
+            self.pool.report_success(endpoint, time.monotonic() - start)
+            return result
+
+    def _failover(self, endpoint, error, tried):
+        """Records a failed call. Returns True if another endpoint should be tried."""
+        if not is_endpoint_failure(error):
+            return False
+        self.pool.report_failure(endpoint, error)
+        tried.append(endpoint)
+        if len(tried) >= len(self.pool.endpoints):
+            return False
+        get_metrics().llm_failovers.inc(endpoint.label)
+        return True
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_endpoint_pool(base_urls):
+    """Returns the process-wide pool for this list of base URLs, with health checks running."""
+    key = tuple(url.rstrip("/") for url in base_urls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = EndpointPool(list(key))
+            _pools[key] = pool
+    pool.start_health_checks()
+    return pool
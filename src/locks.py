@@ -0,0 +1,187 @@
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from src.fileio import ignored_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Configuration ---
+# Seconds a run (CLI, batch, queued job) waits for another run on the same project to finish.
+PROJECT_LOCK_WAIT = float(os.getenv("PROJECT_LOCK_WAIT", "1800"))
+# Seconds a synchronous API request waits before it is rejected with 409 Conflict.
+PROJECT_LOCK_REQUEST_WAIT = float(os.getenv("PROJECT_LOCK_REQUEST_WAIT", "0"))
+PROJECT_LOCK_POLL = 0.2
+
+LOCK_DIR = ".runs"
+LOCK_FILE = "project.lock"
+
+
+class ProjectBusy(Exception):
+    """Raised when a project's lock is held by another run for longer than the caller waits."""
+
+    def __init__(self, project_dir, holder=None):
+        self.project_dir = project_dir
+        self.holder = holder or {}
+        detail = ""
+        if self.holder:
+            detail = f" ({self.holder.get('purpose') or 'busy'} since {self.holder.get('since')}, pid {self.holder.get('pid')})"
+        super().__init__(f"Project '{os.path.basename(project_dir)}' is busy{detail}. Try again later.")
+
+
+class ProjectLock:
+    """Advisory lock on one project directory, held while its files, memory or git history change.
+
+    Across processes (e.g. several uvicorn workers) it is an flock (LockFileEx
+    on Windows) on .runs/project.lock, released by the OS if the holder dies.
+    Within a process every caller shares one ProjectLock per directory (see
+    get_project_lock); it is re-entrant per thread, so a locked run can call
+    other locked methods. The holder's pid and purpose are written to the
+    lock file so a rejected caller can say who has the project.
+    """
+
+    def __init__(self, project_dir):
+        self.project_dir = os.path.abspath(project_dir)
+        self.path = os.path.join(self.project_dir, LOCK_DIR, LOCK_FILE)
+        self._local = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self, timeout=PROJECT_LOCK_WAIT, purpose="", on_wait=None, on_poll=None):
+        """Takes the lock, waiting up to timeout seconds (None waits forever).
+
+        on_wait is called once if the lock is not free straight away, and
+        on_poll every PROJECT_LOCK_POLL seconds while waiting; either may raise
+        to stop waiting (e.g. when a job is cancelled). Raises ProjectBusy when
+        the timeout passes.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        if not self._local.acquire(blocking=False):
+            waited = True
+            if on_wait:
+                on_wait(self.holder())
+            while not self._local.acquire(timeout=_poll_interval(deadline)):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise ProjectBusy(self.project_dir, self.holder())
+                if on_poll:
+                    on_poll()
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            self._file = self._open()
+            while not _try_lock(self._file):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise ProjectBusy(self.project_dir, self.holder())
+                if not waited:
+                    waited = True
+                    if on_wait:
+                        on_wait(self.holder())
+                time.sleep(_poll_interval(deadline))
+                if on_poll:
+                    on_poll()
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._local.release()
+            raise
+        self._depth = 1
+        self._write_holder(purpose)
+
+    def release(self):
+        if self._depth == 1:
+            try:
+                self._file.seek(0)
+                self._file.truncate()
+                self._file.flush()
+                _unlock(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._depth -= 1
+        self._local.release()
+
+    @contextmanager
+    def hold(self, timeout=PROJECT_LOCK_WAIT, purpose="", on_wait=None, on_poll=None):
+        self.acquire(timeout, purpose, on_wait, on_poll)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def holder(self):
+        """The pid, host, purpose and start time recorded by the current holder, or None."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.loads(f.read() or "null")
+        except (OSError, ValueError):
+            return None
+
+    def _open(self):
+        ignored_dir(os.path.dirname(self.path))
+        # Opened without truncating: the file may be locked (and described) by another process
+        return open(self.path, 'a+', encoding='utf-8')
+
+    def _write_holder(self, purpose):
+        try:
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.write(json.dumps({
+                "pid": os.getpid(),
+                "host": socket.gethostname(),
+                "purpose": purpose,
+                "since": datetime.datetime.now().isoformat(timespec="seconds")
+            }))
+            self._file.flush()
+        except OSError:
+            pass  # only informational (Windows does not allow writing to the locked region)
+
+
+def _poll_interval(deadline):
+    if deadline is None:
+        return PROJECT_LOCK_POLL
+    return max(0.0, min(PROJECT_LOCK_POLL, deadline - time.monotonic()))
+
+
+def _try_lock(f):
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def get_project_lock(project_dir):
+    """Returns the process-wide lock for a project directory."""
+    key = os.path.abspath(project_dir)
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = ProjectLock(key)
+        return lock
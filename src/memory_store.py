@@ -0,0 +1,169 @@
+import math
+import os
+import re
+from collections import Counter
+from src.tokens import count_tokens, truncate_to_tokens
+
+# --- Configuration ---
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))
+MEMORY_SUMMARY_SHARE = 0.3  # fraction of the budget reserved for the rolling summary
+
+ENTRY_HEADING = "## Implemented Feature:"
+
+_TERM_RE = re.compile(r"[a-z0-9_]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "with", "we", "i", "you"
+}
+
+
+def tokenize(text):
+    return [t for t in _TERM_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class MemoryEntry:
+    def __init__(self, index, title, body):
+        self.index = index
+        self.title = title
+        self.body = body
+
+    def render(self):
+        return f"{ENTRY_HEADING} {self.title}\n\n{self.body}"
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.lengths) / len(documents)) if documents else 0.0
+        doc_freq = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query_terms):
+        results = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+
+class MemoryStore:
+    """Feature-level view of memory.md with relevance-ranked, token-budgeted retrieval.
+
+    The file is split into one entry per implemented feature and indexed with
+    BM25. The index is rebuilt only when the file's size or mtime changes.
+    """
+
+    def __init__(self, memory_file, token_budget=MEMORY_TOKEN_BUDGET):
+        self.memory_file = memory_file
+        self.token_budget = token_budget
+        self._signature = None
+        self.preamble = ""
+        self.entries = []
+        self._index = None
+
+    def load(self):
+        """Re-reads and re-indexes memory.md if it changed since the last call."""
+        try:
+            st = os.stat(self.memory_file)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+
+        if signature == self._signature:
+            return self.entries
+        self._signature = signature
+
+        text = ""
+        if signature is not None:
+            with open(self.memory_file, 'r', encoding='utf-8') as f:
+                text = f.read()
+        self.preamble, self.entries = self._parse(text)
+        # Titles are counted twice so that a matching feature name outranks passing mentions.
+        self._index = BM25Index([tokenize(f"{e.title} {e.title} {e.body}") for e in self.entries])
+        return self.entries
+
+    def search(self, query, limit=None):
+        """Returns entries ranked by relevance to query, most recent first on ties."""
+        self.load()
+        scores = self._index.scores(tokenize(query or ""))
+        ranked = sorted(self.entries, key=lambda e: (scores[e.index], e.index), reverse=True)
+        ranked = [e for e in ranked if scores[e.index] > 0]
+        return ranked[:limit] if limit else ranked
+
+    def summary(self, max_tokens):
+        """Rolling summary: the list of implemented features, newest first, within max_tokens."""
+        self.load()
+        if not self.entries:
+            return ""
+        header = f"**Implemented features ({len(self.entries)}):**\n"
+        lines = []
+        used = count_tokens(header)
+        for entry in reversed(self.entries):
+            line = f"- {entry.title}"
+            cost = count_tokens(line)
+            if used + cost > max_tokens:
+                remaining = len(self.entries) - len(lines)
+                lines.append(f"- ... and {remaining} earlier features")
+                break
+            lines.append(line)
+            used += cost
+        return header + "\n".join(lines)
+
+    def build_context(self, query, token_budget=None):
+        """Assembles summary + most relevant entries for query, capped at token_budget."""
+        budget = self.token_budget if token_budget is None else token_budget
+        self.load()
+        if not self.entries:
+            return self.preamble.strip()
+
+        parts = []
+        if self.preamble.strip():
+            parts.append(truncate_to_tokens(self.preamble.strip(), budget // 10))
+        parts.append(self.summary(int(budget * MEMORY_SUMMARY_SHARE)))
+        remaining = budget - sum(count_tokens(p) for p in parts)
+
+        # Relevant entries first; the latest feature is always worth showing if there is room.
+        candidates = self.search(query)
+        latest = self.entries[-1]
+        if latest not in candidates:
+            candidates.append(latest)
+
+        details = []
+        for entry in candidates:
+            if remaining <= 0:
+                break
+            text = truncate_to_tokens(entry.render(), remaining)
+            if not text:
+                break
+            details.append(text)
+            remaining -= count_tokens(text)
+
+        if details:
+            parts.append("**Relevant past features:**\n\n" + "\n\n---\n\n".join(details))
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def _parse(text):
+        chunks = re.split(r'^' + re.escape(ENTRY_HEADING), text, flags=re.MULTILINE)
+        preamble = chunks[0]
+        entries = []
+        for chunk in chunks[1:]:
+            title, _, body = chunk.partition("\n")
+            body = body.strip()
+            if body.endswith("---"):
+                body = body[:-3].rstrip()
+            entries.append(MemoryEntry(len(entries), title.strip(), body))
+        return preamble, entries
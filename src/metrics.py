@@ -0,0 +1,398 @@
+import datetime
+import os
+import threading
+import time
+
+# --- Configuration ---
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+METRIC_PREFIX = "agent_orchestrator"
+SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+UNTRACKED_STAGE = "other"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            entry = self._values.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def count(self, *label_values):
+        entry = self._values.get(label_values)
+        return entry[-1] if entry else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, entry):
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', f'{bound:g}')])} {count}")
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', '+Inf')])} {entry[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {entry[-2]:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {entry[-1]}")
+        return lines
+
+
+class TaskStats:
+    """What one crew task cost: wall time, LLM calls and tokens, tool calls."""
+
+    def __init__(self, stage, iteration, role):
+        self.stage = stage
+        self.iteration = iteration
+        self.role = role
+        self.seconds = None
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self.queue_seconds = 0.0
+        self.ttft_seconds = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.trimmed_tokens = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+
+    def to_dict(self):
+        return {
+            "stage": self.stage,
+            "iteration": self.iteration,
+            "role": self.role,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "llm_calls": self.llm_calls,
+            "llm_seconds": round(self.llm_seconds, 3),
+            "queue_seconds": round(self.queue_seconds, 3),
+            "ttft_seconds": round(sum(self.ttft_seconds) / len(self.ttft_seconds), 3) if self.ttft_seconds else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "trimmed_tokens": self.trimmed_tokens,
+            "tool_calls": self.tool_calls,
+            "tool_errors": self.tool_errors
+        }
+
+
+class RunMetrics:
+    """Per-run collector; the engine registers each crew task it creates with its stage and fix iteration."""
+
+    def __init__(self, registry, project_name):
+        self.registry = registry
+        self.project_name = project_name
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.iterations = 0
+        self.status = None
+        self._tasks = []  # (task, TaskStats)
+
+    def track(self, task, stage, iteration=0):
+        agent = getattr(task, "agent", None)
+        stats = TaskStats(stage, iteration, getattr(agent, "role", None) or "unknown")
+        self._tasks.append((task, stats))
+        self.iterations = max(self.iterations, iteration)
+        self.registry._register_task(task, self, stats)
+        return stats
+
+    def finish(self, status):
+        """Records task wall times and the run outcome. Returns the summary."""
+        self.registry.flush_events()
+        self.seconds = time.perf_counter() - self.started
+        self.status = status
+        for task, stats in self._tasks:
+            start = getattr(task, "start_time", None)
+            end = getattr(task, "end_time", None)
+            if isinstance(start, datetime.datetime) and isinstance(end, datetime.datetime):
+                stats.seconds = (end - start).total_seconds()
+                self.registry.task_seconds.observe(stats.seconds, stats.stage, stats.role)
+            self.registry._unregister_task(task)
+        self.registry.runs.inc(status)
+        self.registry.run_seconds.observe(self.seconds, status)
+        self.registry.fix_iterations.inc(amount=self.iterations)
+        return self.summary()
+
+    def summary(self):
+        tasks = [stats.to_dict() for _, stats in self._tasks]
+        return {
+            "project": self.project_name,
+            "status": self.status,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "iterations": self.iterations,
+            "tasks": tasks,
+            "totals": {
+                name: sum(task[name] for task in tasks)
+                for name in ("llm_calls", "queue_seconds", "prompt_tokens", "completion_tokens", "trimmed_tokens",
+                             "tool_calls", "tool_errors")
+            }
+        }
+
+
+class MetricsRegistry:
+    """Process-wide metrics fed by crewai's event bus and exported in Prometheus text format.
+
+    LLM and tool events carry the id of the task they ran for; tasks that a
+    RunMetrics tracks are attributed to its stage, role and fix iteration,
+    anything else (chat, intent classification) to the 'other' stage.
+    """
+
+    def __init__(self):
+        self.llm_calls = Counter(f"{METRIC_PREFIX}_llm_calls_total", "LLM calls.", ("stage", "role", "status"))
+        self.llm_seconds = Histogram(f"{METRIC_PREFIX}_llm_call_seconds", "LLM call latency.", ("stage", "role"))
+        self.llm_ttft = Histogram(
+            f"{METRIC_PREFIX}_llm_time_to_first_token_seconds",
+            "Time to the first streamed token (the full latency for non-streamed calls).", ("stage", "role")
+        )
+        self.llm_queue_wait = Histogram(
+            f"{METRIC_PREFIX}_llm_queue_wait_seconds", "Time LLM calls waited for a backend slot.", ("backend", "project")
+        )
+        self.llm_inflight = Gauge(f"{METRIC_PREFIX}_llm_inflight", "LLM requests in flight.", ("backend",))
+        self.llm_queued = Gauge(f"{METRIC_PREFIX}_llm_queued", "LLM calls waiting for a slot.", ("backend",))
+        self.llm_endpoint_up = Gauge(
+            f"{METRIC_PREFIX}_llm_endpoint_up", "1 if the LLM endpoint is taking calls, 0 while it cools down.", ("backend",)
+        )
+        self.llm_failovers = Counter(
+            f"{METRIC_PREFIX}_llm_failovers_total", "LLM calls retried on another endpoint after this one failed.", ("backend",)
+        )
+        self.tokens = Counter(f"{METRIC_PREFIX}_llm_tokens_total", "LLM tokens.", ("stage", "role", "kind"))
+        self.prompt_size = Histogram(
+            f"{METRIC_PREFIX}_llm_prompt_tokens", "Estimated prompt size as sent, after the context budget.", ("role",),
+            buckets=TOKEN_BUCKETS
+        )
+        self.context_budget = Gauge(f"{METRIC_PREFIX}_context_budget_tokens", "Prompt token limit per role.", ("role",))
+        self.context_trimmed = Counter(
+            f"{METRIC_PREFIX}_context_trimmed_tokens_total", "Context tokens removed to fit the budget, by source stage.",
+            ("role", "source")
+        )
+        self.tool_calls = Counter(f"{METRIC_PREFIX}_tool_calls_total", "Tool calls.", ("stage", "tool", "status"))
+        self.tool_seconds = Histogram(f"{METRIC_PREFIX}_tool_call_seconds", "Tool call duration.", ("stage", "tool"))
+        self.task_seconds = Histogram(f"{METRIC_PREFIX}_task_seconds", "Crew task wall time.", ("stage", "role"))
+        self.runs = Counter(f"{METRIC_PREFIX}_runs_total", "Completed runs by outcome.", ("status",))
+        self.run_seconds = Histogram(f"{METRIC_PREFIX}_run_seconds", "Run wall time.", ("status",))
+        self.fix_iterations = Counter(f"{METRIC_PREFIX}_fix_iterations_total", "Fix iterations started.")
+        self._lock = threading.Lock()
+        self._tasks = {}  # task id -> (RunMetrics, TaskStats)
+        self._calls = {}  # call id -> [started timestamp, first chunk timestamp]
+        self._installed = False
+
+    def start_run(self, project_name):
+        return RunMetrics(self, project_name)
+
+    def _register_task(self, task, run, stats):
+        with self._lock:
+            self._tasks[str(task.id)] = (run, stats)
+
+    def _unregister_task(self, task):
+        with self._lock:
+            self._tasks.pop(str(task.id), None)
+
+    def _stats_for(self, task_id):
+        with self._lock:
+            entry = self._tasks.get(str(task_id)) if task_id else None
+        return entry[1] if entry else None
+
+    def _stage_of(self, stats):
+        return stats.stage if stats else UNTRACKED_STAGE
+
+    def stage_of(self, task_id):
+        """The stage a tracked task was registered with, or None."""
+        stats = self._stats_for(task_id)
+        return stats.stage if stats else None
+
+    def record_prompt(self, role, tokens, limit, trimmed=None, task_id=None):
+        """Records one prompt's size against its role's budget; trimmed maps source stage -> tokens removed."""
+        self.prompt_size.observe(tokens, role)
+        self.context_budget.set(limit, role)
+        for source, count in (trimmed or {}).items():
+            self.context_trimmed.inc(role, source, amount=count)
+        stats = self._stats_for(task_id)
+        if stats and trimmed:
+            with self._lock:
+                stats.trimmed_tokens += sum(trimmed.values())
+
+    def record_queue_wait(self, seconds, backend, project, task_id=None):
+        self.llm_queue_wait.observe(seconds, backend, project)
+        stats = self._stats_for(task_id)
+        if stats:
+            with self._lock:
+                stats.queue_seconds += seconds
+
+    # --- Event handlers (called from the event bus' worker threads) ---
+
+    def on_llm_started(self, event):
+        with self._lock:
+            self._calls[event.call_id] = [event.timestamp, None]
+
+    def on_llm_chunk(self, event):
+        # Runs synchronously for every chunk: keep it to a dictionary lookup
+        call = self._calls.get(event.call_id)
+        if call is not None and call[1] is None:
+            call[1] = event.timestamp
+
+    def on_llm_completed(self, event, failed=False):
+        with self._lock:
+            started, first_chunk = self._calls.pop(event.call_id, (None, None))
+        stats = self._stats_for(event.task_id)
+        stage, role = self._stage_of(stats), event.agent_role or (stats.role if stats else "unknown")
+        self.llm_calls.inc(stage, role, "error" if failed else "ok")
+        if failed or started is None:
+            return
+        seconds = (event.timestamp - started).total_seconds()
+        ttft = (first_chunk - started).total_seconds() if first_chunk else seconds
+        self.llm_seconds.observe(seconds, stage, role)
+        self.llm_ttft.observe(ttft, stage, role)
+
+        usage = getattr(event, "usage", None) or {}
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+        completion = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+        self.tokens.inc(stage, role, "prompt", amount=prompt)
+        self.tokens.inc(stage, role, "completion", amount=completion)
+        if stats:
+            with self._lock:
+                stats.llm_calls += 1
+                stats.llm_seconds += seconds
+                stats.ttft_seconds.append(ttft)
+                stats.prompt_tokens += prompt
+                stats.completion_tokens += completion
+
+    def on_tool_finished(self, event, failed=False):
+        stats = self._stats_for(event.task_id)
+        stage = self._stage_of(stats)
+        self.tool_calls.inc(stage, event.tool_name, "error" if failed else "ok")
+        started, finished = getattr(event, "started_at", None), getattr(event, "finished_at", None)
+        if started and finished:
+            self.tool_seconds.observe((finished - started).total_seconds(), stage, event.tool_name)
+        if stats:
+            with self._lock:
+                stats.tool_calls += 1
+                stats.tool_errors += 1 if failed else 0
+
+    def install(self):
+        """Subscribes to crewai's event bus (once)."""
+        if self._installed:
+            return
+        try:
+            from crewai.events import crewai_event_bus
+            from crewai.events.types.llm_events import (
+                LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, LLMStreamChunkEvent
+            )
+            from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent
+        except ImportError as e:
+            print(f"[Metrics] Event bus unavailable, metrics disabled: {e}")
+            return
+
+        crewai_event_bus.on(LLMCallStartedEvent)(lambda source, event: self.on_llm_started(event))
+        crewai_event_bus.on(LLMStreamChunkEvent)(lambda source, event: self.on_llm_chunk(event))
+        crewai_event_bus.on(LLMCallCompletedEvent)(lambda source, event: self.on_llm_completed(event))
+        crewai_event_bus.on(LLMCallFailedEvent)(lambda source, event: self.on_llm_completed(event, failed=True))
+        crewai_event_bus.on(ToolUsageFinishedEvent)(lambda source, event: self.on_tool_finished(event))
+        crewai_event_bus.on(ToolUsageErrorEvent)(lambda source, event: self.on_tool_finished(event, failed=True))
+        self._installed = True
+
+    def flush_events(self):
+        """Waits for queued event handlers so a run's summary includes its last calls."""
+        if not self._installed:
+            return
+        from crewai.events import crewai_event_bus
+        crewai_event_bus.flush(timeout=5.0)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in (self.llm_calls, self.llm_seconds, self.llm_ttft, self.llm_queue_wait, self.llm_inflight,
+                       self.llm_queued, self.llm_endpoint_up, self.llm_failovers, self.tokens, self.prompt_size,
+                       self.context_budget, self.context_trimmed, self.tool_calls,
+                       self.tool_seconds, self.task_seconds, self.runs, self.run_seconds, self.fix_iterations):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def format_run_summary(summary):
+    """Per-task table of a run summary, for the CLI."""
+    lines = [
+        f"Run {summary['status']} in {summary['seconds']:.1f}s ({summary['iterations']} fix iteration(s))",
+        f"{'stage':<10}{'iter':>5}{'seconds':>9}{'llm':>5}{'wait':>7}{'ttft':>7}{'prompt':>9}{'compl':>8}{'tools':>6}  role"
+    ]
+    for task in summary["tasks"]:
+        seconds = f"{task['seconds']:.1f}" if task["seconds"] is not None else "-"
+        ttft = f"{task['ttft_seconds']:.2f}" if task["ttft_seconds"] is not None else "-"
+        lines.append(
+            f"{task['stage']:<10}{task['iteration']:>5}{seconds:>9}{task['llm_calls']:>5}{task['queue_seconds']:>7.2f}{ttft:>7}"
+            f"{task['prompt_tokens']:>9}{task['completion_tokens']:>8}{task['tool_calls']:>6}  {task['role']}"
+        )
+    totals = summary["totals"]
+    trimmed = f" ({totals['trimmed_tokens']} context tokens trimmed)" if totals.get("trimmed_tokens") else ""
+    lines.append(
+        f"Total: {totals['llm_calls']} LLM calls ({totals['queue_seconds']:.1f}s queued), {totals['prompt_tokens']} prompt + "
+        f"{totals['completion_tokens']} completion tokens{trimmed}, {totals['tool_calls']} tool calls"
+    )
+    return "\n".join(lines)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics():
+    """Returns the process-wide registry, subscribed to the event bus unless METRICS_ENABLED is off."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+            if METRICS_ENABLED:
+                _registry.install()
+        return _registry
@@ -0,0 +1,180 @@
+import os
+import re
+from src.fileio import atomic_write, resolve_inside
+
+_HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_BARE_HUNK_RE = re.compile(r'^@@.*@@')
+_DIFF_START_RE = re.compile(r'^--- \S', re.MULTILINE)
+
+
+class PatchError(Exception):
+    """Raised when a diff cannot be parsed or does not apply to the files on disk."""
+
+
+class Hunk:
+    def __init__(self, old_start, old_lines, new_lines):
+        self.old_start = old_start  # 1-based, 0 for "insert at top"
+        self.old_lines = old_lines
+        self.new_lines = new_lines
+
+
+class FilePatch:
+    def __init__(self, path, hunks, is_new=False, is_deleted=False):
+        self.path = path
+        self.hunks = hunks
+        self.is_new = is_new
+        self.is_deleted = is_deleted
+
+
+def is_unified_diff(text):
+    """True if text looks like a unified diff rather than file content."""
+    return bool(_DIFF_START_RE.search(text)) and "\n+++ " in text and "\n@@" in text
+
+
+def _clean_diff_path(raw):
+    path = raw.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def parse_patches(text):
+    """Extracts every file patch from free-form text containing unified diffs."""
+    lines = text.splitlines()
+    patches = []
+    i = 0
+    while i < len(lines):
+        if not (lines[i].startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")):
+            i += 1
+            continue
+
+        old_path = _clean_diff_path(lines[i][4:])
+        new_path = _clean_diff_path(lines[i + 1][4:])
+        patch = FilePatch(new_path or old_path, [], is_new=old_path is None, is_deleted=new_path is None)
+        if patch.path is None:
+            raise PatchError("Diff header names no file.")
+        i += 2
+
+        while i < len(lines) and (_HUNK_RE.match(lines[i]) or _BARE_HUNK_RE.match(lines[i])):
+            hunk, i = _parse_hunk(lines, i)
+            patch.hunks.append(hunk)
+        if not patch.hunks and not patch.is_deleted:
+            raise PatchError(f"Diff for '{patch.path}' has no hunks.")
+        patches.append(patch)
+    return patches
+
+
+def _parse_hunk(lines, i):
+    header = _HUNK_RE.match(lines[i])
+    if header:
+        old_start = int(header.group(1))
+        old_count = int(header.group(2)) if header.group(2) is not None else 1
+        new_count = int(header.group(4)) if header.group(4) is not None else 1
+    else:
+        # "@@ ... @@" without line numbers: locate by context, read until the body ends
+        old_start, old_count, new_count = None, None, None
+    i += 1
+
+    old_lines, new_lines = [], []
+    while i < len(lines):
+        if old_count is not None and len(old_lines) >= old_count and len(new_lines) >= new_count:
+            break
+        line = lines[i]
+        if line.startswith("\\"):  # "\ No newline at end of file"
+            i += 1
+            continue
+        if line == "":
+            if old_count is None:
+                break
+            # Models often drop the leading space of blank context lines
+            old_lines.append("")
+            new_lines.append("")
+        elif line[0] == " ":
+            old_lines.append(line[1:])
+            new_lines.append(line[1:])
+        elif line[0] == "-" and not line.startswith("--- "):
+            old_lines.append(line[1:])
+        elif line[0] == "+" and not line.startswith("+++ "):
+            new_lines.append(line[1:])
+        elif line[0] == "-" or line[0] == "+":
+            if old_count is None:
+                break
+            (old_lines if line[0] == "-" else new_lines).append(line[1:])
+        else:
+            break
+        i += 1
+    return Hunk(old_start, old_lines, new_lines), i
+
+
+def _find(lines, needle, hint, start):
+    """Index where needle occurs in lines at or after start, closest to hint."""
+    if not needle:
+        return max(start, min(hint, len(lines)))
+    for normalize in (lambda s: s, lambda s: s.rstrip()):
+        target = [normalize(l) for l in needle]
+        matches = [
+            pos for pos in range(start, len(lines) - len(needle) + 1)
+            if [normalize(l) for l in lines[pos:pos + len(needle)]] == target
+        ]
+        if matches:
+            return min(matches, key=lambda pos: abs(pos - hint))
+    return None
+
+
+def apply_hunks(content, hunks, path="file"):
+    """Returns content with hunks applied in order, or raises PatchError."""
+    lines = content.splitlines()
+    trailing_newline = content.endswith("\n") or not content
+    offset = 0
+    cursor = 0
+    for number, hunk in enumerate(hunks, 1):
+        hint = (hunk.old_start - 1 if hunk.old_start else 0) + offset if hunk.old_start is not None else cursor
+        pos = _find(lines, hunk.old_lines, max(hint, 0), cursor)
+        if pos is None:
+            raise PatchError(f"Hunk {number} does not apply to '{path}'.")
+        lines[pos:pos + len(hunk.old_lines)] = hunk.new_lines
+        offset += len(hunk.new_lines) - len(hunk.old_lines)
+        cursor = pos + len(hunk.new_lines)
+    result = "\n".join(lines)
+    return result + "\n" if trailing_newline and lines else result
+
+
+def apply_patches(patches, root):
+    """Applies all patches under root, all-or-nothing.
+
+    Every patch is applied in memory first; files are only written (each via
+    an atomic rename) once all of them apply cleanly. Returns the relative
+    paths that changed.
+    """
+    pending = {}
+    for patch in patches:
+        full_path = resolve_inside(root, patch.path)
+        if patch.is_new:
+            original = ""  # the file is made from the added lines, replacing any that exists
+        elif full_path in pending:
+            original = pending[full_path][1] or ""
+        elif os.path.exists(full_path):
+            with open(full_path, 'r', encoding='utf-8') as f:
+                original = f.read()
+        else:
+            raise PatchError(f"File '{patch.path}' does not exist.")
+
+        content = apply_hunks(original, patch.hunks, patch.path)
+        if patch.is_deleted:
+            if patch.hunks and content.strip():
+                raise PatchError(f"Deletion of '{patch.path}' does not match its content.")
+            pending[full_path] = (patch.path, None)
+        else:
+            pending[full_path] = (patch.path, content)
+
+    changed = []
+    for full_path, (rel_path, content) in pending.items():
+        if content is None:
+            if os.path.exists(full_path):
+                os.remove(full_path)
+        else:
+            atomic_write(full_path, content)
+        changed.append(rel_path)
+    return changed
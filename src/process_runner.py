@@ -0,0 +1,202 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+# --- Configuration ---
+CODE_EXEC_TIMEOUT = float(os.getenv("CODE_EXEC_TIMEOUT", "120"))
+# Bytes kept per stream (half from the start, half from the end); 0 disables the cap.
+CODE_EXEC_MAX_OUTPUT = int(os.getenv("CODE_EXEC_MAX_OUTPUT", "65536"))
+# Child resource limits; 0 disables a limit.
+CODE_EXEC_CPU_SECONDS = int(os.getenv("CODE_EXEC_CPU_SECONDS", "300"))
+CODE_EXEC_MEMORY_MB = int(os.getenv("CODE_EXEC_MEMORY_MB", "4096"))
+
+KILL_GRACE_SECONDS = 2
+READ_CHUNK = 8192
+
+
+def omitted_marker(omitted):
+    return f"\n... [{omitted} bytes omitted] ...\n"
+
+
+class CappedBuffer:
+    """Keeps the first and last limit/2 bytes of a stream and counts what was dropped in between."""
+
+    def __init__(self, limit=CODE_EXEC_MAX_OUTPUT):
+        self.limit = limit
+        self.head = bytearray()
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        if not self.limit:
+            self.head.extend(data)
+            return
+        head_room = self.limit // 2 - len(self.head)
+        if head_room > 0:
+            self.head.extend(data[:head_room])
+            data = data[head_room:]
+        if not data:
+            return
+        self.tail.append(bytes(data))
+        self.tail_size += len(data)
+        tail_limit = self.limit - self.limit // 2
+        while self.tail_size - len(self.tail[0]) >= tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def truncated(self):
+        return bool(self.limit) and self.total > self.limit
+
+    def text(self):
+        tail = b"".join(self.tail)
+        if self.limit:
+            tail = tail[-(self.limit - self.limit // 2):]
+        omitted = self.total - len(self.head) - len(tail)
+        if omitted > 0:
+            data = bytes(self.head).decode("utf-8", errors="replace") + omitted_marker(omitted)
+            return data + tail.decode("utf-8", errors="replace")
+        return (bytes(self.head) + tail).decode("utf-8", errors="replace")
+
+
+class ProcessResult:
+    def __init__(self, returncode, stdout, stderr, seconds, timed_out=False, truncated=False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.seconds = seconds
+        self.timed_out = timed_out
+        self.truncated = truncated
+
+
+def resource_limits(cpu_seconds=CODE_EXEC_CPU_SECONDS, memory_mb=CODE_EXEC_MEMORY_MB):
+    """The rlimits to apply to a child, as {name: value}."""
+    limits = {}
+    if cpu_seconds:
+        limits["RLIMIT_CPU"] = cpu_seconds
+    if memory_mb:
+        limits["RLIMIT_AS"] = memory_mb * 1024 * 1024
+    return limits
+
+
+def apply_limits(limits):
+    """Applies rlimits to the current process (the exec wrapper calls it before running the command)."""
+    try:
+        import resource
+    except ImportError:
+        return
+    for name, value in limits.items():
+        kind = getattr(resource, name, None)
+        if kind is None:
+            continue
+        soft, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        try:
+            resource.setrlimit(kind, (value, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def _drain(stream, buffer):
+    try:
+        for chunk in iter(lambda: stream.read(READ_CHUNK), b""):
+            buffer.write(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        stream.close()
+
+
+def _kill_group(process):
+    """Terminates the child's whole process group: SIGTERM, then SIGKILL after a grace period.
+
+    The SIGKILL is sent even if the child itself has exited by then, so
+    anything it spawned that ignores SIGTERM does not outlive the timeout.
+    """
+    if os.name != "posix":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    try:
+        process.wait(timeout=KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _limited(command, limits):
+    """Argv that runs a shell command with rlimits applied: this file, run as a script, sets them and execs sh.
+
+    This avoids preexec_fn, which is not safe in a multi-threaded process.
+    """
+    return [sys.executable, "-I", os.path.abspath(__file__), json.dumps(limits), command]
+
+
+def run_command(command, cwd, timeout=CODE_EXEC_TIMEOUT, max_output=CODE_EXEC_MAX_OUTPUT, limits=None):
+    """Runs a shell command with streamed, capped capture and a hard wall-clock timeout.
+
+    The child gets its own process group so that a timeout also kills
+    anything it spawned. Output is read as it is produced; only the head and
+    tail of each stream are kept.
+    """
+    limits = resource_limits() if limits is None else limits
+    posix = os.name == "posix"
+    out, err = CappedBuffer(max_output), CappedBuffer(max_output)
+
+    limited = posix and bool(limits)
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        _limited(command, limits) if limited else command,
+        shell=not limited,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=posix
+    )
+    readers = [
+        threading.Thread(target=_drain, args=(process.stdout, out), daemon=True),
+        threading.Thread(target=_drain, args=(process.stderr, err), daemon=True)
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        process.wait(timeout=timeout or None)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_group(process)
+        process.wait()
+    # A grandchild that left the process group may still hold the pipes open; don't wait on it forever.
+    for reader in readers:
+        reader.join(KILL_GRACE_SECONDS)
+
+    return ProcessResult(
+        process.returncode,
+        out.text(),
+        err.text(),
+        time.perf_counter() - start,
+        timed_out,
+        out.truncated or err.truncated
+    )
+
+
+if __name__ == "__main__":
+    # Exec wrapper used by run_command: python process_runner.py <limits json> <command>
+    apply_limits(json.loads(sys.argv[1]))
+    os.execv("/bin/sh", ["/bin/sh", "-c", sys.argv[2]])
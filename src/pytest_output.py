@@ -0,0 +1,192 @@
+import os
+import re
+
+# "FAILED tests/test_x.py::test_y - AssertionError" / "ERROR test_x.py" lines from pytest's summary
+_FAILED_RE = re.compile(r'^(?:FAILED|ERROR)\s+(\S+?\.py(?:::\S+)?)(?:\s+-\s.*)?$', re.MULTILINE)
+
+
+def failed_test_ids(output):
+    """Node IDs of the tests pytest reported as failed or errored, in report order."""
+    seen = []
+    for match in _FAILED_RE.finditer(str(output)):
+        node_id = match.group(1)
+        if node_id not in seen:
+            seen.append(node_id)
+    return seen
+
+
+_SECTION_RE = re.compile(r'^={3,} (.+?) ={3,}$')
+_ENTRY_RE = re.compile(r'^_{3,} (.+?) _{3,}$')
+_CAPTURED_RE = re.compile(r'^-{3,} .+ -{3,}$')
+_LOCATION_RE = re.compile(r'^(\S+\.py):(\d+):(?: .*)?$')
+_COUNTS_RE = re.compile(r'^=*\s*((?:\d+ [a-z]+(?:, )?)+) in [\d.]+s')
+_FRAME_RE = re.compile(r'^\s*File "(.+)", line (\d+), in (.+)$')
+
+
+class Failure:
+    def __init__(self, name, outcome="FAILED"):
+        self.name = name
+        self.outcome = outcome  # "FAILED", or "ERROR" for errors in setup/teardown or collection
+        self.location = None  # deepest "path.py:line: ExceptionType" frame
+        self.source = None  # the '>' line pytest points at in that frame
+        self.details = []  # 'E' lines: exception message and assertion diff
+
+    def render(self, max_lines):
+        # Same prefix as pytest's short summary, so failed_test_ids() reads condensed output too
+        lines = [f"{self.outcome} {self.name}"]
+        if self.location:
+            lines.append(f"    {self.location}")
+        if self.source:
+            lines.append(f"    {self.source}")
+        details = self.details[:max_lines]
+        lines.extend(f"    {line}" for line in details)
+        if len(self.details) > len(details):
+            lines.append(f"    ... ({len(self.details) - len(details)} more lines)")
+        return lines
+
+
+def parse_pytest_failures(output):
+    """Parses pytest's FAILURES and ERRORS sections into Failure records."""
+    failures = []
+    section = None
+    current = None
+    frame_source = None
+    skipping_capture = False
+    for line in output.splitlines():
+        header = _SECTION_RE.match(line)
+        if header:
+            section = header.group(1).strip()
+            current = None
+            continue
+        if section not in ("FAILURES", "ERRORS"):
+            continue
+
+        entry = _ENTRY_RE.match(line)
+        if entry:
+            current = Failure(entry.group(1), "ERROR" if section == "ERRORS" else "FAILED")
+            failures.append(current)
+            frame_source = None
+            skipping_capture = False
+            continue
+        if current is None:
+            continue
+        if _CAPTURED_RE.match(line):
+            skipping_capture = True
+            continue
+        if skipping_capture:
+            continue
+
+        if line.startswith(">"):
+            frame_source = line
+            # A new frame: details from shallower frames are superseded
+            current.details = []
+        elif line.startswith("E "):
+            current.details.append(line.rstrip())
+        else:
+            location = _LOCATION_RE.match(line)
+            if location:
+                current.location = line.strip()
+                current.source = frame_source
+    return failures
+
+
+def parse_traceback(output, root=None):
+    """Condenses the last Python traceback in output to its deepest project frame and the exception.
+
+    Returns a list of lines, or None if there is no traceback.
+    """
+    lines = output.splitlines()
+    start = None
+    for i, line in enumerate(lines):
+        if line.startswith("Traceback (most recent call last):"):
+            start = i
+    if start is None:
+        return None
+
+    frames = []
+    exception = None
+    i = start + 1
+    while i < len(lines):
+        frame = _FRAME_RE.match(lines[i])
+        if frame:
+            code = lines[i + 1].strip() if i + 1 < len(lines) and lines[i + 1].startswith("    ") else ""
+            frames.append((frame.group(1), frame.group(2), frame.group(3), code))
+            i += 1
+            continue
+        if lines[i] and not lines[i].startswith(" "):
+            exception = lines[i].strip()
+            break
+        i += 1
+
+    def in_project(path):
+        if "site-packages" in path or "/lib/python" in path:
+            return False
+        return root is None or os.path.abspath(path).startswith(os.path.abspath(root))
+
+    result = []
+    project_frames = [f for f in frames if in_project(f[0])]
+    shown = project_frames[-1:] + ([frames[-1]] if frames and frames[-1] not in project_frames[-1:] else [])
+    for path, line_no, function, code in shown:
+        if root and os.path.isabs(path) and in_project(path):
+            path = os.path.relpath(path, root)
+        result.append(f"  {path}:{line_no} in {function}")
+        if code:
+            result.append(f"    {code}")
+    if exception:
+        result.append(exception)
+    return result
+
+
+def condense_output(stdout, stderr, root=None, max_failures=10, max_lines=8):
+    """Compact, failure-focused summary of a test or script run.
+
+    Its size grows with the number of failures, not with the volume of the
+    log: counts, failing test IDs (as "FAILED <node id>" lines, like pytest's
+    short summary), and for each of the first max_failures the deepest frame,
+    the failing line and the assertion/exception details.
+    Returns None if the output holds neither pytest results nor a traceback.
+    """
+    output = f"{stdout}\n{stderr}"
+    lines = []
+
+    counts = None
+    for line in output.splitlines():
+        match = _COUNTS_RE.match(line)
+        if match:
+            counts = match.group(1)
+    if counts:
+        lines.append(f"Result: {counts}")
+
+    failures = parse_pytest_failures(output)
+    failed_ids = failed_test_ids(output)
+    if failures:
+        lines.append(f"Failures ({len(failures)}):")
+        for failure in failures[:max_failures]:
+            failure.name = _match_node_id(failure.name, failed_ids)
+            lines.extend(failure.render(max_lines))
+        rest = failures[max_failures:]
+        if rest:
+            lines.append(f"Not shown ({len(rest)}):")
+            lines.extend(f"{f.outcome} {_match_node_id(f.name, failed_ids)}" for f in rest)
+    elif failed_ids:
+        lines.append("Failed:")
+        lines.extend(f"FAILED {node_id}" for node_id in failed_ids)
+
+    if not failures:
+        traceback = parse_traceback(output, root)
+        if traceback:
+            lines.append("Traceback (deepest project frame):")
+            lines.extend(traceback)
+
+    return "\n".join(lines) if lines else None
+
+
+def _match_node_id(name, node_ids):
+    """Maps a FAILURES entry title ('TestX.test_y', 'ERROR collecting a.py') to its node ID."""
+    if name.startswith("ERROR collecting "):
+        return name[len("ERROR collecting "):]
+    suffix = "::" + name.replace(".", "::")
+    for node_id in node_ids:
+        if node_id.endswith(suffix):
+            return node_id
+    return name
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- Configuration ---
+ENGINE_CACHE_SIZE = int(os.getenv("ENGINE_CACHE_SIZE", "16"))
+ENGINE_IDLE_TTL = float(os.getenv("ENGINE_IDLE_TTL", "1800"))  # seconds
+
+
+class EngineRegistry:
+    """Keeps long-lived CrewEngine instances keyed by project name.
+
+    Entries are evicted least-recently-used once max_size is exceeded, dropped
+    after idle_ttl seconds without use, and rebuilt when the project's layout
+    on disk no longer matches what the engine was created against.
+    """
+
+    def __init__(self, factory, max_size=ENGINE_CACHE_SIZE, idle_ttl=ENGINE_IDLE_TTL, projects_dir="projects"):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.projects_dir = projects_dir
+        self._entries = OrderedDict()  # project_name -> [engine, fingerprint, last_used]
+        self._lock = threading.Lock()
+        self._building = {}  # project_name -> lock held while that project's engine is built
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_name):
+        """Returns the cached engine for project_name, building one if needed."""
+        now = time.monotonic()
+        fingerprint = self._fingerprint(project_name)
+
+        with self._lock:
+            self._expire(now)
+            engine = self._hit(project_name, fingerprint, now)
+            if engine is not None:
+                return engine
+            build_lock = self._building.setdefault(project_name, threading.Lock())
+
+        # Built outside the registry lock, so a slow build only holds up callers for the same project
+        with build_lock:
+            with self._lock:
+                # Another caller may have built it while we waited
+                engine = self._hit(project_name, self._fingerprint(project_name), now)
+                if engine is not None:
+                    return engine
+                self.misses += 1
+            engine = self.factory(project_name)
+            with self._lock:
+                # Building the engine creates its directories, so _store fingerprints again.
+                self._store(project_name, engine, time.monotonic())
+            return engine
+
+    def _hit(self, project_name, fingerprint, now):
+        entry = self._entries.get(project_name)
+        if entry is None or entry[1] != fingerprint:
+            return None
+        entry[2] = now
+        self._entries.move_to_end(project_name)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, project_name, engine):
+        """Registers an engine built elsewhere (e.g. with git initialisation)."""
+        with self._lock:
+            self._store(project_name, engine, time.monotonic())
+
+    def invalidate(self, project_name):
+        with self._lock:
+            self._entries.pop(project_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "projects": list(self._entries.keys())
+            }
+
+    def _store(self, project_name, engine, now):
+        self._entries[project_name] = [engine, self._fingerprint(project_name), now]
+        self._entries.move_to_end(project_name)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _expire(self, now):
+        if self.idle_ttl <= 0:
+            return
+        stale = [name for name, entry in self._entries.items() if now - entry[2] > self.idle_ttl]
+        for name in stale:
+            del self._entries[name]
+
+    def _fingerprint(self, project_name):
+        """Cheap stat-based identity of the parts of a project an engine binds to.
+
+        An engine holds tools pointed at the project's directories, so it is
+        rebuilt when those directories are removed or replaced, or when a git
+        repository appears or disappears. Contents (memory, metadata, code) are
+        read fresh on every call and do not invalidate the entry.
+        """
+        base_dir = os.path.join(self.projects_dir, project_name)
+        signature = []
+        for path in (base_dir, os.path.join(base_dir, "code")):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_dev, st.st_ino))
+            except OSError:
+                signature.append(None)
+        signature.append(os.path.isdir(os.path.join(base_dir, ".git")))
+        return tuple(signature)
@@ -0,0 +1,115 @@
+import datetime
+import json
+import os
+import threading
+import uuid
+
+from src.fileio import atomic_write, ignored_dir
+
+JOURNAL_DIR = ".runs"
+JOURNAL_FILE = "journal.json"
+# Runs in these states stopped before the end and can be resumed.
+RESUMABLE_STATUSES = ("running", "failed")
+
+
+class RunJournal:
+    """On-disk record of the latest run of a project, so an interrupted run can be resumed.
+
+    Every completed crew task's output is written as soon as the task
+    finishes, together with the fix iteration it belonged to and the files
+    written so far. The journal is rewritten atomically each time, so it is
+    intact whenever the process dies. It lives in .runs/ under the project,
+    which is kept out of the project's commits.
+    """
+
+    def __init__(self, base_dir):
+        self.directory = os.path.join(base_dir, JOURNAL_DIR)
+        self.path = os.path.join(self.directory, JOURNAL_FILE)
+        self._lock = threading.Lock()
+        self._data = None
+
+    def load(self):
+        """Returns the journal's contents, or None if there is none (or it is unreadable).
+
+        Always read from disk: another process may have run the project since.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def resumable(self):
+        """The interrupted run's journal, or None if the last run finished."""
+        data = self.load()
+        return data if data and data.get("status") in RESUMABLE_STATUSES else None
+
+    def start(self, user_story):
+        """Begins a new run, replacing the previous journal."""
+        now = _now()
+        with self._lock:
+            self._data = {
+                "run_id": uuid.uuid4().hex,
+                "user_story": user_story,
+                "status": "running",
+                "started_at": now,
+                "updated_at": now,
+                "iteration": 0,
+                "tasks": [],
+                "written_files": [],
+                "error": None,
+                "resumed": 0
+            }
+            self._save()
+
+    def resume(self):
+        """Marks the interrupted run as running again. Returns its journal."""
+        with self._lock:
+            self._data = self.load()
+            self._data["status"] = "running"
+            self._data["error"] = None
+            self._data["resumed"] = self._data.get("resumed", 0) + 1
+            self._save()
+            return json.loads(json.dumps(self._data))
+
+    def record_task(self, stage, iteration, output, written_files=()):
+        with self._lock:
+            if self._data is None:
+                return
+            self._data["tasks"].append({
+                "stage": stage,
+                "iteration": iteration,
+                "output": output,
+                "completed_at": _now()
+            })
+            self._data["iteration"] = max(self._data["iteration"], iteration)
+            self._data["written_files"] = sorted(set(self._data["written_files"]) | set(written_files))
+            self._save()
+
+    def outputs(self, iteration):
+        """Outputs of the tasks completed in one iteration, by stage."""
+        data = self.load() or {}
+        return {task["stage"]: task["output"] for task in data.get("tasks", []) if task["iteration"] == iteration}
+
+    def finish(self, status, error=None):
+        """Records how the run ended: "completed", or "failed" with the error (failed runs stay resumable)."""
+        with self._lock:
+            if self._data is None:
+                return
+            self._data["status"] = status
+            self._data["error"] = error
+            self._save()
+
+    def _save(self):
+        # Called with the lock held
+        self._data["updated_at"] = _now()
+        try:
+            # Kept out of the project's auto-commits
+            ignored_dir(self.directory)
+            atomic_write(self.path, json.dumps(self._data, indent=2))
+        except OSError as e:
+            print(f"[Journal] Could not write {self.path}: {e}")
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,130 @@
+import datetime
+import os
+
+# --- Configuration ---
+CREW_MAX_PARALLEL_TASKS = int(os.getenv("CREW_MAX_PARALLEL_TASKS", "2"))
+
+
+class TaskGraph:
+    """Dependency graph of crew tasks derived from their context declarations.
+
+    A task depends on every task listed in its ``context``; a task without an
+    explicit context list depends on all tasks before it, which is what the
+    sequential process would have given it. ``schedule()`` orders the tasks
+    by dependency level and marks independent ones for asynchronous execution
+    so that the crew runs them concurrently.
+    """
+
+    def __init__(self, tasks, names=None):
+        self.tasks = list(tasks)
+        self.names = list(names) if names else [f"task_{i + 1}" for i in range(len(self.tasks))]
+        index = {id(task): i for i, task in enumerate(self.tasks)}
+        self.deps = []
+        for i, task in enumerate(self.tasks):
+            context = getattr(task, "context", None)
+            if isinstance(context, list):
+                deps = {index[id(t)] for t in context if id(t) in index}
+            else:
+                deps = set(range(i))
+            self.deps.append(deps)
+
+    def levels(self):
+        """Groups task indices into waves: every task's dependencies lie in earlier waves."""
+        level = []
+        for i in range(len(self.tasks)):
+            level.append(1 + max((level[d] for d in self.deps[i]), default=-1))
+        waves = [[] for _ in range(max(level, default=-1) + 1)]
+        for i, lvl in enumerate(level):
+            waves[lvl].append(i)
+        return waves
+
+    def groups(self, max_parallel=CREW_MAX_PARALLEL_TASKS):
+        """Waves split into groups of at most max_parallel tasks."""
+        size = max(1, max_parallel)
+        groups = []
+        for wave in self.levels():
+            groups.extend(wave[i:i + size] for i in range(0, len(wave), size))
+        return groups
+
+    def schedule(self, max_parallel=CREW_MAX_PARALLEL_TASKS):
+        """Returns the tasks in execution order with async_execution set.
+
+        In a sequential crew, consecutive asynchronous tasks run concurrently
+        and the next synchronous task waits for all of them. A group of
+        independent tasks therefore runs async when a single (synchronous)
+        task follows it. Otherwise its last member stays synchronous to act
+        as the barrier.
+        """
+        groups = self.groups(max_parallel)
+        ordered = []
+        for g, group in enumerate(groups):
+            followed_by_barrier = g + 1 < len(groups) and len(groups[g + 1]) == 1
+            for position, i in enumerate(group):
+                is_last = position == len(group) - 1
+                run_async = len(group) > 1 and (followed_by_barrier or not is_last)
+                self.tasks[i].async_execution = run_async
+                ordered.append(self.tasks[i])
+        return ordered
+
+    def durations(self):
+        """Seconds each task took, or None for tasks without timing information."""
+        result = []
+        for task in self.tasks:
+            start = getattr(task, "start_time", None)
+            end = getattr(task, "end_time", None)
+            if isinstance(start, datetime.datetime) and isinstance(end, datetime.datetime):
+                result.append((end - start).total_seconds())
+            else:
+                result.append(None)
+        return result
+
+    def critical_path(self, durations=None):
+        """Longest dependency chain by duration, as (task indices, seconds)."""
+        durations = durations if durations is not None else self.durations()
+        finish = []
+        previous = []
+        for i in range(len(self.tasks)):
+            best = max(self.deps[i], key=lambda d: finish[d], default=None)
+            previous.append(best)
+            finish.append((finish[best] if best is not None else 0.0) + (durations[i] or 0.0))
+
+        if not finish:
+            return [], 0.0
+        node = max(range(len(finish)), key=lambda i: finish[i])
+        total = finish[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return list(reversed(path)), total
+
+    def timing_report(self):
+        """Summarises a completed run: wall clock vs. sequential time and the critical path."""
+        durations = self.durations()
+        timed = [
+            (t.start_time, t.end_time) for t, d in zip(self.tasks, durations) if d is not None
+        ]
+        if not timed:
+            return None
+
+        wall = (max(end for _, end in timed) - min(start for start, _ in timed)).total_seconds()
+        sequential = sum(d for d in durations if d is not None)
+        path, path_seconds = self.critical_path(durations)
+        return {
+            "wall_seconds": round(wall, 3),
+            "sequential_seconds": round(sequential, 3),
+            "saved_seconds": round(max(0.0, sequential - wall), 3),
+            "critical_path": [self.names[i] for i in path],
+            "critical_path_seconds": round(path_seconds, 3),
+            "tasks": {
+                self.names[i]: round(d, 3) for i, d in enumerate(durations) if d is not None
+            }
+        }
+
+
+def format_timing_report(report):
+    return (
+        f"wall {report['wall_seconds']:.1f}s vs {report['sequential_seconds']:.1f}s sequential "
+        f"(saved {report['saved_seconds']:.1f}s); critical path: "
+        f"{' -> '.join(report['critical_path'])} ({report['critical_path_seconds']:.1f}s)"
+    )
@@ -1,9 +1,16 @@
 import logging
 import os
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from src.engine import CrewEngine
+from src.events import sse
+from src.jobs import JobManager
+from src.registry import EngineRegistry
+from src.metrics import get_metrics
+from src.run_journal import RunJournal
+from src.locks import PROJECT_LOCK_REQUEST_WAIT, ProjectBusy
 
 # Suppress Litellm logs
 logging.getLogger('litellm').setLevel(logging.CRITICAL)
@@ -27,11 +34,22 @@ class MessageRequest(BaseModel):
     project_name: str
     message: str
 
+class ResumeRequest(BaseModel):
+    project_name: str
+
 class CreateProjectRequest(BaseModel):
     project_name: str
     init_git: bool = False
     remote_url: str = None
 
+# Background crew work; sized by JOB_WORKERS.
+job_manager = JobManager()
+
+# Warm engines shared by all endpoints; sized by ENGINE_CACHE_SIZE / ENGINE_IDLE_TTL.
+engine_registry = EngineRegistry(
+    factory=lambda project_name: CrewEngine(project_name=project_name, init_git=False)
+)
+
 @app.get("/projects")
 async def list_projects():
     """List all available projects."""
@@ -39,55 +57,158 @@ async def list_projects():
     if not os.path.exists(projects_dir):
         return {"projects": []}
     
-    projects = [d for d in os.listdir(projects_dir) if os.path.isdir(os.path.join(projects_dir, d))]
+    projects = [d for d in os.listdir(projects_dir)
+                if not d.startswith(".") and os.path.isdir(os.path.join(projects_dir, d))]
     return {"projects": projects}
 
 @app.post("/projects")
-async def create_project(request: CreateProjectRequest):
+def create_project(request: CreateProjectRequest):
     """Create a new project with optional Git initialization."""
     try:
         engine = CrewEngine(
             project_name=request.project_name, 
             init_git=request.init_git, 
-            remote_url=request.remote_url
+            remote_url=request.remote_url,
+            lock_timeout=PROJECT_LOCK_REQUEST_WAIT
         )
+        engine_registry.put(request.project_name, engine)
         return {"status": "success", "project": request.project_name, "message": f"Project '{request.project_name}' initialized."}
+    except ProjectBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/run")
-async def run_task(request: TaskRequest):
+def run_task(request: TaskRequest):
     """
     Directly runs a task. Useful for specific triggers.
+    Returns 409 if another run has the project (use /jobs/run to queue behind it).
     """
     try:
-        engine = CrewEngine(project_name=request.project_name, init_git=False)
-        result = engine.run(request.user_story)
+        engine = engine_registry.get(request.project_name)
+        result = engine.run(request.user_story, lock_timeout=PROJECT_LOCK_REQUEST_WAIT)
         return {"status": "success", "result": result, "project": request.project_name}
+    except ProjectBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/message")
-async def process_message(request: MessageRequest):
+def process_message(request: MessageRequest):
     """
     Unified endpoint for Chat or Task execution.
     The engine determines intent (CHAT vs TASK).
+    Returns 409 if a task is requested while another run has the project.
     """
     try:
-        engine = CrewEngine(project_name=request.project_name, init_git=False)
-        result = engine.process_message(request.message)
+        engine = engine_registry.get(request.project_name)
+        result = engine.process_message(request.message, lock_timeout=PROJECT_LOCK_REQUEST_WAIT)
         return {"status": "success", "response": result, "project": request.project_name}
+    except ProjectBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs/run")
+async def submit_run_job(request: TaskRequest):
+    """
+    Queues a task run and returns its job ID immediately.
+    If another run has the project, the job waits for it in the "waiting" stage.
+    """
+    def work(job):
+        engine = engine_registry.get(request.project_name)
+        return engine.run(request.user_story, progress_callback=job.update_progress)
+
+    job = job_manager.submit(request.project_name, "run", request.user_story, work)
+    return {"status": "queued", "job_id": job.id, "project": request.project_name}
+
+@app.post("/jobs/message")
+async def submit_message_job(request: MessageRequest):
+    """
+    Queues a Chat or Task message and returns its job ID immediately.
+    """
+    def work(job):
+        engine = engine_registry.get(request.project_name)
+        return engine.process_message(request.message, progress_callback=job.update_progress)
+
+    job = job_manager.submit(request.project_name, "message", request.message, work)
+    return {"status": "queued", "job_id": job.id, "project": request.project_name}
+
+@app.post("/jobs/resume")
+async def submit_resume_job(request: ResumeRequest):
+    """
+    Queues the continuation of the project's interrupted run from its last completed task.
+    """
+    journal = RunJournal(os.path.join("projects", request.project_name)).resumable()
+    if journal is None:
+        raise HTTPException(status_code=404, detail=f"Project '{request.project_name}' has no interrupted run.")
+
+    def work(job):
+        engine = engine_registry.get(request.project_name)
+        return engine.resume_run(progress_callback=job.update_progress)
+
+    job = job_manager.submit(request.project_name, "resume", journal["user_story"], work)
+    return {"status": "queued", "job_id": job.id, "project": request.project_name}
+
+@app.get("/jobs")
+async def list_jobs(project_name: str = None):
+    """List known jobs, optionally filtered by project."""
+    return {"jobs": [job.to_dict() for job in job_manager.list(project_name)]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Returns status, progress and (once finished) the result of a job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str, last_event_id: str = Header(None)):
+    """
+    Server-Sent Events for a job as it runs: status and progress, task start/finish,
+    LLM token deltas, tool calls, written files and review verdicts, then "done" with the result.
+    Reconnecting clients (Last-Event-ID) continue after the last event they received.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        sse(job.events, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancels a queued job, or stops a running one after its current task."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job.to_dict()
+
 @app.get("/projects/{project_name}/memory")
-async def get_memory(project_name: str):
+def get_memory(project_name: str):
     """
     Returns the memory context (history) for a project.
     """
-    engine = CrewEngine(project_name=project_name)
+    engine = engine_registry.get(project_name)
     return {"memory": engine._get_memory_context()}
 
+@app.get("/projects/{project_name}/run")
+def get_run_journal(project_name: str):
+    """Returns the journal of the project's latest run: status, completed task outputs and written files."""
+    journal = RunJournal(os.path.join("projects", project_name)).load()
+    if journal is None:
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' has no run journal.")
+    return journal
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: per-stage task, LLM (latency, time to first token, tokens) and tool call stats."""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,213 @@
+import ast
+import configparser
+import glob
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pycodestyle
+from pyflakes import checker as pyflakes_checker
+from src.fileio import resolve_inside
+
+try:
+    from flake8.plugins.pyflakes import FLAKE8_PYFLAKES_CODES
+except ImportError:
+    FLAKE8_PYFLAKES_CODES = {}
+
+# --- Configuration ---
+SYNTAX_CACHE_SIZE = int(os.getenv("SYNTAX_CACHE_SIZE", "4096"))
+
+# flake8's defaults, so results match what the 'flake8' command reported
+DEFAULT_IGNORE = ("E121", "E123", "E126", "E226", "E24", "E704", "W503", "W504")
+DEFAULT_MAX_LINE_LENGTH = 79
+CONFIG_FILES = ("setup.cfg", "tox.ini", ".flake8")
+SKIP_DIRS = {"__pycache__", "venv", ".venv", "node_modules"}
+
+_NOQA_RE = re.compile(r"#\s*noqa(?::\s*(?P<codes>[A-Z][0-9]+(?:[,\s]+[A-Z][0-9]+)*))?", re.IGNORECASE)
+
+
+class Issue:
+    def __init__(self, line, col, code, text):
+        self.line = line
+        self.col = col
+        self.code = code
+        self.text = text
+
+    def format(self, path):
+        """flake8's default output format."""
+        return f"{path}:{self.line}:{self.col}: {self.code} {self.text}"
+
+
+class _CollectingReport(pycodestyle.BaseReport):
+    def __init__(self, options):
+        super().__init__(options)
+        self.issues = []
+
+    def error(self, line_number, offset, text, check):
+        code = super().error(line_number, offset, text, check)
+        if code:
+            self.issues.append(Issue(line_number, offset + 1, code, text[5:]))
+        return code
+
+
+def load_flake8_config(root):
+    """Reads max-line-length and ignore settings from the project's flake8 configuration."""
+    ignore = list(DEFAULT_IGNORE)
+    max_line_length = DEFAULT_MAX_LINE_LENGTH
+    for name in CONFIG_FILES:
+        path = os.path.join(root, name)
+        if not os.path.exists(path):
+            continue
+        parser = configparser.RawConfigParser()
+        try:
+            parser.read(path)
+        except configparser.Error:
+            continue
+        if not parser.has_section("flake8"):
+            continue
+        section = parser["flake8"]
+        if "max-line-length" in section:
+            max_line_length = int(section["max-line-length"])
+        if "ignore" in section:
+            ignore = _codes(section["ignore"])
+        if "extend-ignore" in section:
+            ignore += _codes(section["extend-ignore"])
+    return tuple(ignore), max_line_length
+
+
+def _codes(value):
+    return [code for code in re.split(r"[,\s]+", value) if code]
+
+
+def check_source(source, filename="<string>", ignore=DEFAULT_IGNORE, max_line_length=DEFAULT_MAX_LINE_LENGTH):
+    """Runs the compile, pyflakes and pycodestyle checks on source. Returns sorted Issues."""
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError as e:
+        # flake8 treats the offset as 0-based, so its column is one past Python's
+        return [Issue(e.lineno or 1, (e.offset or 0) + 1, "E999", f"{type(e).__name__}: {e.msg}")]
+    except ValueError as e:
+        return [Issue(1, 1, "E999", f"ValueError: {e}")]
+
+    issues = []
+    for message in pyflakes_checker.Checker(tree, filename=filename).messages:
+        code = FLAKE8_PYFLAKES_CODES.get(type(message).__name__, "F")
+        issues.append(Issue(message.lineno, message.col + 1, code, message.message % message.message_args))
+
+    lines = source.splitlines(True)
+    style = pycodestyle.StyleGuide(quiet=True, ignore=list(ignore), max_line_length=max_line_length)
+    report = _CollectingReport(style.options)
+    pycodestyle.Checker(filename, lines=lines, options=style.options, report=report).check_all()
+    issues.extend(report.issues)
+
+    issues = [
+        issue for issue in issues
+        if not _ignored(issue.code, ignore) and not _noqa(lines, issue)
+    ]
+    issues.sort(key=lambda issue: (issue.line, issue.col, issue.code))
+    return issues
+
+
+def _ignored(code, ignore):
+    return any(code.startswith(prefix) for prefix in ignore)
+
+
+def _noqa(lines, issue):
+    if not 0 < issue.line <= len(lines):
+        return False
+    match = _NOQA_RE.search(lines[issue.line - 1])
+    if not match:
+        return False
+    codes = match.group("codes")
+    return codes is None or any(issue.code.startswith(code.upper()) for code in _codes(codes))
+
+
+class SyntaxChecker:
+    """In-process flake8-compatible checker with results cached by file content hash.
+
+    Re-checking an unchanged file is a hash lookup; the cache is shared by
+    every checker in the process and bounded to SYNTAX_CACHE_SIZE entries.
+    """
+
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.hits = 0
+        self.misses = 0
+
+    def expand(self, spec):
+        """Resolves 'a.py b.py', 'a.py, b.py', globs ('**/*.py') and directories to relative .py paths.
+
+        Returns (paths, missing).
+        """
+        paths, missing = [], []
+        for token in re.split(r"[,\s]+", spec.strip()):
+            if not token:
+                continue
+            if any(ch in token for ch in "*?["):
+                matches = sorted(glob.glob(os.path.join(self.root, token), recursive=True))
+                # Globs are confined to the project like plain paths ('../**/*.py', symlinks out)
+                found = [m for m in matches if m.endswith(".py") and os.path.isfile(m) and self._inside(m)]
+                if not found:
+                    missing.append(token)
+                paths.extend(os.path.relpath(m, self.root) for m in found)
+                continue
+            full_path = resolve_inside(self.root, token)
+            if os.path.isdir(full_path):
+                paths.extend(self._walk(full_path))
+            elif os.path.isfile(full_path):
+                paths.append(os.path.relpath(full_path, self.root))
+            else:
+                missing.append(token)
+        return list(dict.fromkeys(paths)), missing
+
+    def _inside(self, path):
+        root = os.path.realpath(self.root)
+        return os.path.realpath(path).startswith(root + os.sep)
+
+    def _walk(self, directory):
+        found = []
+        for dirpath, dirs, files in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+            found.extend(
+                os.path.relpath(os.path.join(dirpath, name), self.root)
+                for name in sorted(files) if name.endswith(".py")
+            )
+        return found
+
+    def check_file(self, rel_path, config=None):
+        """Issues for one file, from the cache when its content (and the config) are unchanged."""
+        ignore, max_line_length = config or load_flake8_config(self.root)
+        with open(os.path.join(self.root, rel_path), "rb") as f:
+            data = f.read()
+        key = (hashlib.sha256(data).hexdigest(), ignore, max_line_length)
+
+        with self._lock:
+            issues = self._cache.get(key)
+            if issues is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return issues
+
+        self.misses += 1
+        try:
+            source = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            issues = [Issue(1, 1, "E902", f"UnicodeDecodeError: {e.reason}")]
+        else:
+            issues = check_source(source, rel_path, ignore, max_line_length)
+
+        with self._lock:
+            self._cache[key] = issues
+            while len(self._cache) > SYNTAX_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return issues
+
+    def check(self, paths):
+        """Checks several files with one config lookup. Returns {path: [Issue]}."""
+        config = load_flake8_config(self.root)
+        return {path: self.check_file(path, config) for path in paths}
@@ -0,0 +1,34 @@
+import re
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Approximates the token count of text for local (BPE) models.
+
+    Roughly one token per short word or punctuation mark, with long words
+    split every four characters. Close enough to budget prompts without
+    loading a tokenizer.
+    """
+    if not text:
+        return 0
+    total = 0
+    for match in _WORD_RE.finditer(text):
+        total += max(1, (len(match.group()) + 3) // 4)
+    return total
+
+
+def truncate_to_tokens(text, max_tokens, marker="\n... [truncated]"):
+    """Cuts text so that it fits in max_tokens, marking the cut."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - count_tokens(marker)
+    total = 0
+    for match in _WORD_RE.finditer(text):
+        total += max(1, (len(match.group()) + 3) // 4)
+        if total > budget:
+            return text[:match.start()].rstrip() + marker
+    return text
@@ -1,12 +1,21 @@
 from crewai.tools import BaseTool
 from pydantic import Field
-import subprocess
-import os
+from typing import List, Optional
+from src.warm_workers import get_worker_pool
+from src.process_runner import CODE_EXEC_MAX_OUTPUT, CODE_EXEC_TIMEOUT, resource_limits, run_command
+from src.syntax_checker import SyntaxChecker
+from src.pytest_output import condense_output, failed_test_ids
+from src.exec_log import EXEC_LOG_CONDENSE_CHARS, save_log
 
 class CodeExecutionTool(BaseTool):
     name: str = "Code Executor"
     description: str = "Executes shell commands (like 'pytest test_file.py' or 'python main.py'). PREFER running files over complex one-liners. Input is the command string."
     working_dir: str = Field(..., description="The directory where the command should be executed.")
+    use_warm_workers: bool = Field(default=True, description="Run python/pytest commands in a warm pre-forked worker when possible.")
+    timeout: float = Field(default=CODE_EXEC_TIMEOUT, description="Wall-clock limit in seconds; the whole process group is killed when it expires.")
+    max_output: int = Field(default=CODE_EXEC_MAX_OUTPUT, description="Bytes of stdout/stderr kept per stream (head and tail).")
+    log_dir: Optional[str] = Field(default=None, description="Where the captured output of long runs is kept; the agent then gets a condensed summary.")
+    failed_tests: List[str] = Field(default_factory=list, description="Node IDs pytest reported as failed in the last test run through this tool.")
 
     def _run(self, command: str) -> str:
         try:
@@ -19,45 +28,72 @@ class CodeExecutionTool(BaseTool):
             if "python -c" in cmd_clean and len(cmd_clean) > 200:
                 return "Error: The 'python -c' command is too long and complex. Please write the code to a .py file using FileWriterTool and then run it using 'python <filename>'."
 
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                cwd=self.working_dir
-            )
-            
-            output = f"Exit Code: {result.returncode}\n"
-            output += f"STDOUT:\n{result.stdout}\n"
-            if result.stderr:
-                output += f"STDERR:\n{result.stderr}\n"
-                
-            return output
+            limits = resource_limits()
+            pool = get_worker_pool() if self.use_warm_workers else None
+            warm = pool.run(self.working_dir, cmd_clean, self.timeout, self.max_output, limits) if pool else None
+            if warm is not None:
+                self._record_tests(cmd_clean, warm)
+                return self._format(
+                    cmd_clean, warm, f"{warm.seconds:.2f}s (warm worker, ~{warm.startup_saved:.2f}s startup saved)"
+                )
+
+            result = run_command(command, self.working_dir, self.timeout, self.max_output, limits)
+            self._record_tests(cmd_clean, result)
+
+            # Installed packages change what a warm worker would have preloaded
+            if pool and "pip" in cmd_clean.split()[:3]:
+                pool.invalidate(self.working_dir)
+
+            return self._format(cmd_clean, result, f"{result.seconds:.2f}s (cold subprocess)")
         except Exception as e:
             return f"Execution Execution Error: {str(e)}"
 
+    def _record_tests(self, command, result):
+        # Read from pytest's own output: the agent's report may not quote the FAILED lines
+        if "pytest" in command.split()[:3]:
+            self.failed_tests = failed_test_ids(f"{result.stdout}\n{result.stderr}")
+
+    def _format(self, command, result, timing):
+        header = f"Exit Code: {result.returncode}\n"
+        if result.timed_out:
+            header += f"TIMEOUT: the command was killed after {self.timeout:.0f}s. Look for infinite loops or blocking calls.\n"
+        body = f"STDOUT:\n{result.stdout}\n"
+        if result.stderr:
+            body += f"STDERR:\n{result.stderr}\n"
+        if result.truncated:
+            body += f"NOTE: output was longer than {self.max_output} bytes per stream; only its start and end are shown.\n"
+
+        # Long logs are kept on disk; later agents only see a failure-focused summary
+        if self.log_dir and len(body) > EXEC_LOG_CONDENSE_CHARS:
+            log_path = save_log(self.log_dir, command, header + body)
+            summary = condense_output(result.stdout, result.stderr, self.working_dir)
+            if summary is None:
+                half = EXEC_LOG_CONDENSE_CHARS // 2
+                summary = f"{body[:half]}\n... [{len(body) - 2 * half} characters omitted] ...\n{body[-half:]}"
+            body = f"{summary}\nCaptured output: {log_path}\n"
+
+        return header + body + f"Timing: {timing}\n"
+
 class SyntaxCheckTool(BaseTool):
     name: str = "Syntax Checker"
-    description: str = "Checks Python code for syntax errors and style issues using flake8. Input is the filename (e.g., 'main.py')."
+    description: str = "Checks Python code for syntax errors and style issues (flake8 rules). Input is one or more filenames (e.g., 'main.py utils.py'), a glob (e.g., '**/*.py') or '.' for the whole project."
     working_dir: str = Field(..., description="The directory where the file is located.")
 
     def _run(self, filename: str) -> str:
         try:
-            file_path = os.path.join(self.working_dir, filename)
-            if not os.path.exists(file_path):
-                return f"Error: File '{filename}' not found."
-
-            # Run flake8
-            result = subprocess.run(
-                ["flake8", filename],
-                capture_output=True,
-                text=True,
-                cwd=self.working_dir
-            )
-            
-            if result.returncode == 0:
+            checker = SyntaxChecker(self.working_dir)
+            paths, missing = checker.expand(filename)
+            if missing and not paths:
+                return f"Error: File '{' '.join(missing)}' not found."
+
+            lines = []
+            for path, issues in checker.check(paths).items():
+                lines.extend(issue.format(path) for issue in issues)
+            for name in missing:
+                lines.append(f"Error: File '{name}' not found.")
+
+            if not lines:
                 return "No syntax errors found."
-            else:
-                return f"Syntax/Style Issues:\n{result.stdout}\n{result.stderr}"
+            return "Syntax/Style Issues:\n" + "\n".join(lines) + "\n"
         except Exception as e:
-            return f"Linting Error: {str(e)}"
\ No newline at end of file
+            return f"Linting Error: {str(e)}"
@@ -0,0 +1,390 @@
+"""Warm execution worker for one project directory (run by src.warm_workers).
+
+The worker imports pytest and the third-party modules the project uses once,
+then forks a fresh child for every command so each run starts from that warm
+state. It talks JSON lines: a request {"argv", "timeout", "max_output",
+"limits"} on stdin, a result {"returncode", "stdout", "stderr", "seconds", ...}
+on stdout. The rlimits given on the command line are applied to the worker
+itself before it imports anything from the project's dependencies.
+
+Only the standard library is used here; the worker must not import src.*.
+"""
+import ast
+import importlib
+import importlib.util
+import json
+import os
+import runpy
+import selectors
+import signal
+import sys
+import threading
+import time
+from collections import deque
+
+SKIP_DIRS = {"__pycache__", "venv", ".venv", "node_modules", ".git"}
+# Seconds to keep reading output after the command exits (a grandchild may still hold the pipes)
+DRAIN_GRACE_SECONDS = 2
+READ_CHUNK = 65536
+
+
+class ImportScanner:
+    """Collects top-level imports from the project's .py files, re-parsing only changed files."""
+
+    def __init__(self, root):
+        self.root = root
+        self._files = {}  # path -> (mtime_ns, size, imports)
+
+    def local_names(self):
+        names = set()
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.name.endswith(".py"):
+                names.add(entry.name[:-3])
+            elif entry.is_dir() and entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                names.add(entry.name)
+        return names
+
+    def scan(self):
+        seen = set()
+        for dirpath, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+            for name in files:
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(dirpath, name)
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                cached = self._files.get(path)
+                if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                self._files[path] = (stat.st_mtime_ns, stat.st_size, _imports_of(path))
+        for path in set(self._files) - seen:
+            del self._files[path]
+
+        imports = set()
+        for _, _, names in self._files.values():
+            imports.update(names)
+        return imports
+
+
+def _preload_pytest():
+    """Imports pytest's built-in and installed plugins, which pytest.main() would load on every run."""
+    try:
+        import importlib.metadata
+        from _pytest.config import default_plugins
+    except ImportError:
+        return
+    modules = [f"_pytest.{name}" for name in default_plugins]
+    try:
+        modules += [ep.module for ep in importlib.metadata.entry_points(group="pytest11")]
+    except Exception:
+        pass
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except BaseException:
+            pass
+
+
+def _imports_of(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError):
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+class Worker:
+    def __init__(self, root, channel):
+        self.root = os.path.abspath(root)
+        self.channel = channel
+        self.scanner = ImportScanner(self.root)
+        self.preloaded = set()
+        self.failed = set()
+        self.base_path = [p for p in sys.path if os.path.abspath(p or ".") != self.root]
+
+    def preload(self):
+        """Imports pytest, its plugins and every importable non-project module the project uses."""
+        start = time.perf_counter()
+        if not self.preloaded:
+            _preload_pytest()
+        local = self.scanner.local_names()
+        for name in sorted(({"pytest"} | self.scanner.scan()) - local - self.preloaded - self.failed):
+            if name in sys.modules:
+                self.preloaded.add(name)
+                continue
+            try:
+                # Project modules are excluded by name, so root is not on sys.path here
+                spec = importlib.util.find_spec(name)
+                origin = getattr(spec, "origin", None) or ""
+                if spec is None or os.path.abspath(origin).startswith(self.root + os.sep):
+                    self.failed.add(name)
+                    continue
+                importlib.import_module(name)
+                self.preloaded.add(name)
+            except BaseException:
+                self.failed.add(name)
+        return time.perf_counter() - start
+
+    def unsafe_reason(self):
+        # fork() only copies the calling thread; a preloaded module that started threads is unsafe
+        if threading.active_count() > 1:
+            return "a preloaded module started threads"
+        return None
+
+    def handle(self, request):
+        preload_seconds = self.preload()
+        reason = self.unsafe_reason()
+        if reason:
+            return {"unsafe": reason}
+        shadowed = self.preloaded & self.scanner.local_names()
+        if shadowed:
+            # A new worker skips the project's own modules, so it can run this
+            return {"unsafe": f"project now shadows preloaded module(s): {', '.join(sorted(shadowed))}", "restart": True}
+        result = self.run(
+            request["argv"],
+            request.get("timeout"),
+            self.scanner.local_names(),
+            request.get("max_output", 0),
+            request.get("limits") or {}
+        )
+        result["preload_seconds"] = round(preload_seconds, 3)
+        return result
+
+    def run(self, argv, timeout, local_names=(), max_output=0, limits=None):
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(out_r)
+            os.close(err_r)
+            _child(argv, self.root, self.base_path, local_names, limits or {}, self.channel, out_w, err_w)
+        os.close(out_w)
+        os.close(err_w)
+
+        # Output is read while the command runs, so only the capped head and tail are ever stored
+        captured = {out_r: _Capture(max_output), err_r: _Capture(max_output)}
+        selector = selectors.DefaultSelector()
+        for fd in captured:
+            selector.register(fd, selectors.EVENT_READ)
+        timed_out = False
+        status = drain_until = None
+        deadline = start + timeout if timeout else None
+        try:
+            while status is None or (selector.get_map() and time.perf_counter() < drain_until):
+                if status is None:
+                    done, exit_status = os.waitpid(pid, os.WNOHANG)
+                    if not done and deadline and time.perf_counter() > deadline:
+                        timed_out = True
+                        try:
+                            os.killpg(pid, signal.SIGKILL)
+                        except OSError:
+                            os.kill(pid, signal.SIGKILL)
+                        done, exit_status = os.waitpid(pid, 0)
+                    if done:
+                        status = exit_status
+                        drain_until = time.perf_counter() + DRAIN_GRACE_SECONDS
+                        seconds = time.perf_counter() - start
+                if not selector.get_map():
+                    time.sleep(0.005)
+                    continue
+                for key, _ in selector.select(0.005):
+                    data = os.read(key.fd, READ_CHUNK)
+                    if data:
+                        captured[key.fd].write(data)
+                    else:
+                        selector.unregister(key.fd)
+        finally:
+            selector.close()
+            os.close(out_r)
+            os.close(err_r)
+
+        if os.WIFEXITED(status):
+            returncode = os.WEXITSTATUS(status)
+        else:
+            returncode = -os.WTERMSIG(status)
+        return {
+            "returncode": returncode,
+            "stdout": captured[out_r].text(),
+            "stderr": captured[err_r].text(),
+            "truncated": captured[out_r].truncated or captured[err_r].truncated,
+            "seconds": round(seconds, 3),
+            "timed_out": timed_out
+        }
+
+
+class _Capture:
+    """Keeps the first and last limit/2 bytes of a stream (same format as src.process_runner.CappedBuffer)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.head = bytearray()
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        if not self.limit:
+            self.head.extend(data)
+            return
+        head_room = self.limit // 2 - len(self.head)
+        if head_room > 0:
+            self.head.extend(data[:head_room])
+            data = data[head_room:]
+        if not data:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        tail_limit = self.limit - self.limit // 2
+        while self.tail_size - len(self.tail[0]) >= tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def truncated(self):
+        return bool(self.limit) and self.total > self.limit
+
+    def text(self):
+        tail = b"".join(self.tail)
+        if self.limit:
+            tail = tail[-(self.limit - self.limit // 2):]
+        omitted = self.total - len(self.head) - len(tail)
+        head = bytes(self.head).decode("utf-8", errors="replace")
+        if omitted > 0:
+            head += f"\n... [{omitted} bytes omitted] ...\n"
+        return head + tail.decode("utf-8", errors="replace")
+
+
+def _apply_limits(limits):
+    try:
+        import resource
+    except ImportError:
+        return
+    for name, value in limits.items():
+        kind = getattr(resource, name, None)
+        if kind is None:
+            continue
+        soft, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        try:
+            resource.setrlimit(kind, (value, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def _child(argv, root, base_path, local_names, limits, channel, out, err):
+    """Runs one command in the forked child and exits; never returns."""
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        _apply_limits(limits)
+        channel.close()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(out, 1)
+        os.dup2(err, 2)
+        os.close(out)
+        os.close(err)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", closefd=False)
+        os.chdir(root)
+        # Project modules must come from disk, even where the worker itself imported a same-named module
+        for name in list(sys.modules):
+            if name.split(".")[0] in local_names:
+                del sys.modules[name]
+        code = _execute(argv, root, base_path)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if not isinstance(e.code, int) and e.code is not None:
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except BaseException:
+            pass
+        os._exit(code if isinstance(code, int) else 1)
+
+
+def _execute(argv, root, base_path):
+    """Runs argv with the sys.path a fresh interpreter would have had."""
+    if not argv:
+        raise SystemExit("warm worker: empty command")
+    program, args = argv[0], argv[1:]
+    # Plugins preloaded by the worker cannot be assertion-rewritten; that is expected, not news
+    os.environ["PYTEST_ADDOPTS"] = (
+        os.environ.get("PYTEST_ADDOPTS", "") + " -W ignore::pytest.PytestAssertRewriteWarning"
+    ).strip()
+    if program in ("pytest", "py.test"):
+        # The pytest script does not put the working directory on sys.path
+        sys.path[:] = list(base_path)
+        sys.argv = ["pytest"] + args
+        import pytest
+        return int(pytest.main(args))
+    if not args:
+        raise SystemExit(f"warm worker: {program} needs a script or -m module")
+    if args[0] == "-m":
+        if len(args) < 2:
+            raise SystemExit("Argument expected for the -m option")
+        # 'python -m' does
+        sys.path[:] = [root] + list(base_path)
+        if args[1] == "pytest":
+            sys.argv = ["pytest"] + args[2:]
+            import pytest
+            return int(pytest.main(args[2:]))
+        sys.argv = [args[1]] + args[2:]
+        runpy.run_module(args[1], run_name="__main__", alter_sys=True)
+        return 0
+    script = os.path.abspath(os.path.join(root, args[0]))
+    sys.path[:] = [os.path.dirname(script)] + list(base_path)
+    sys.argv = [args[0]] + args[1:]
+    runpy.run_path(script, run_name="__main__")
+    return 0
+
+
+def main():
+    root = sys.argv[1]
+    # Third-party imports get no more memory or CPU than a command would
+    _apply_limits(json.loads(sys.argv[2]) if len(sys.argv) > 2 else {})
+    # sys.path[0] is this script's directory, which the commands must not see
+    del sys.path[0]
+    # Keep the protocol channel private: stray prints from imported modules go to stderr
+    channel = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    worker = Worker(root, channel)
+    start = time.perf_counter()
+    worker.preload()
+    channel.write(json.dumps({"ready": True, "preload_seconds": round(time.perf_counter() - start, 3),
+                              "preloaded": sorted(worker.preloaded)}) + "\n")
+
+    for line in sys.stdin:
+        try:
+            response = worker.handle(json.loads(line))
+        except Exception as e:
+            response = {"unsafe": f"worker error: {e}"}
+        channel.write(json.dumps(response) + "\n")
+        if "unsafe" in response:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from src.warm_worker_process import SKIP_DIRS
+
+# --- Configuration ---
+# "warm": run python/pytest commands in pre-forked workers when safe; "cold": always a fresh subprocess.
+CODE_EXEC_MODE = os.getenv("CODE_EXEC_MODE", "warm").lower()
+WARM_WORKERS_MAX = int(os.getenv("WARM_WORKERS_MAX", "8"))
+WARM_WORKER_STARTUP_TIMEOUT = float(os.getenv("WARM_WORKER_STARTUP_TIMEOUT", "60"))
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_worker_process.py")
+SHELL_METACHARACTERS = set("|&;<>()$`\\\n*?~")
+
+
+class WarmResult:
+    def __init__(self, returncode, stdout, stderr, seconds, startup_saved, timed_out=False, truncated=False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.seconds = seconds
+        self.startup_saved = startup_saved
+        self.timed_out = timed_out
+        self.truncated = truncated
+
+
+def warm_argv(command):
+    """Returns the argv to run in a warm worker, or None if the command must run cold.
+
+    Only plain 'pytest ...', 'python -m <module> ...' and 'python <file> ...'
+    commands qualify: no shell syntax, no 'python -c', no pip.
+    """
+    if any(ch in SHELL_METACHARACTERS for ch in command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if not argv:
+        return None
+
+    program = os.path.basename(argv[0])
+    if program in ("pytest", "py.test"):
+        return ["pytest"] + argv[1:]
+    if program not in ("python", "python3"):
+        return None
+    args = argv[1:]
+    if not args:
+        return None
+    if args[0] == "-m":
+        if len(args) < 2 or args[1] in ("pip", "venv", "ensurepip"):
+            return None
+        return ["python"] + args
+    if args[0].startswith("-") or not args[0].endswith(".py"):
+        return None
+    return ["python"] + args
+
+
+def project_signature(root):
+    """Stat-based identity of a project's .py files; changes when one is added, removed or edited."""
+    entries = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        for name in files:
+            if not name.endswith(".py"):
+                continue
+            try:
+                stat = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            entries.append((dirpath, name, stat.st_mtime_ns, stat.st_size))
+    return hash(tuple(sorted(entries)))
+
+
+class WarmWorker:
+    """One pre-forked worker process serving commands for a working directory.
+
+    limits are the rlimits a command's child gets; the worker applies them to
+    itself before importing the project's dependencies.
+    """
+
+    def __init__(self, working_dir, limits=None):
+        self.working_dir = os.path.abspath(working_dir)
+        self.limits = limits or {}
+        self.lock = threading.Lock()
+        self.startup_seconds = None
+        self.last_used = time.monotonic()
+        # Why a new worker would not run this project warm either (set when this one gives up)
+        self.unsafe = None
+        self._process = None
+
+    def start(self):
+        start = time.perf_counter()
+        self._process = subprocess.Popen(
+            [sys.executable, "-u", WORKER_SCRIPT, self.working_dir, json.dumps(self.limits)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.working_dir,
+            text=True,
+            bufsize=1
+        )
+        ready = self._read_message(WARM_WORKER_STARTUP_TIMEOUT)
+        if not ready or not ready.get("ready"):
+            self.unsafe = f"the worker did not start within {WARM_WORKER_STARTUP_TIMEOUT:.0f}s"
+            self.stop()
+            raise RuntimeError("warm worker failed to start")
+        # What every cold run pays before the command does any work
+        self.startup_seconds = time.perf_counter() - start
+        print(f"[WarmWorkers] Started worker for {self.working_dir} in {self.startup_seconds:.2f}s "
+              f"({len(ready.get('preloaded', []))} modules preloaded)")
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, argv, timeout=None, max_output=0, limits=None):
+        """Runs argv in a fresh fork of the worker. Returns None if the worker declines or dies."""
+        self.last_used = time.monotonic()
+        request = {"argv": argv, "timeout": timeout, "max_output": max_output, "limits": limits or {}}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+        except (OSError, ValueError):
+            self.stop()
+            return None
+
+        # The worker first imports any new dependencies, then runs the command under its own timeout
+        read_timeout = WARM_WORKER_STARTUP_TIMEOUT + timeout if timeout else None
+        response = self._read_message(read_timeout)
+        if not response or "unsafe" in response:
+            if response:
+                print(f"[WarmWorkers] Falling back to a cold run: {response['unsafe']}")
+                # A fresh worker can run a project that only shadows what this one imported
+                self.unsafe = None if response.get("restart") else response["unsafe"]
+            elif self.alive:
+                self.unsafe = f"the worker did not answer within {read_timeout:.0f}s"
+                print(f"[WarmWorkers] Falling back to a cold run: {self.unsafe}")
+            self.stop()
+            return None
+        return WarmResult(
+            response["returncode"],
+            response["stdout"],
+            response["stderr"],
+            response["seconds"],
+            max(0.0, self.startup_seconds - response.get("preload_seconds", 0.0)),
+            response.get("timed_out", False),
+            response.get("truncated", False)
+        )
+
+    def _read_message(self, timeout):
+        result = {}
+
+        def read():
+            line = self._process.stdout.readline()
+            if line:
+                try:
+                    result["message"] = json.loads(line)
+                except ValueError:
+                    pass
+
+        if timeout is None:
+            read()
+        else:
+            reader = threading.Thread(target=read, daemon=True)
+            reader.start()
+            reader.join(timeout)
+        return result.get("message")
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            self._process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+
+class WarmWorkerPool:
+    """Keeps at most max_workers warm workers, one per working directory, evicting the least recently used.
+
+    When a worker cannot run a project safely (e.g. a dependency starts
+    threads at import), the project runs cold until its .py files change or
+    it is invalidated, instead of paying for a new worker on every command.
+    """
+
+    def __init__(self, max_workers=WARM_WORKERS_MAX):
+        self.max_workers = max_workers
+        self._workers = OrderedDict()
+        self._starting = set()
+        self._unsafe = {}  # working dir -> (project_signature, reason)
+        self._lock = threading.Lock()
+
+    def run(self, working_dir, command, timeout=None, max_output=0, limits=None):
+        """Runs command warm if possible. Returns a WarmResult, or None to tell the caller to run it cold."""
+        argv = warm_argv(command)
+        if argv is None or not hasattr(os, "fork"):
+            return None
+
+        key = os.path.abspath(working_dir)
+        if self._known_unsafe(key):
+            return None
+        worker = self._get(key, limits)
+        if worker is None:
+            return None
+        # A worker serves one command at a time; a concurrent caller runs cold instead of queueing.
+        if not worker.lock.acquire(blocking=False):
+            return None
+        try:
+            result = worker.run(argv, timeout, max_output, limits)
+        finally:
+            worker.lock.release()
+        if worker.unsafe:
+            self._mark_unsafe(key, worker.unsafe)
+        return result
+
+    def invalidate(self, working_dir):
+        """Stops the worker for working_dir, e.g. after 'pip install' changed what it preloaded."""
+        key = os.path.abspath(working_dir)
+        with self._lock:
+            worker = self._workers.pop(key, None)
+            self._unsafe.pop(key, None)
+        if worker:
+            worker.stop()
+
+    def shutdown(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def _known_unsafe(self, key):
+        with self._lock:
+            entry = self._unsafe.get(key)
+        if entry is None:
+            return False
+        if entry[0] == project_signature(key):
+            return True
+        with self._lock:
+            self._unsafe.pop(key, None)  # the project changed: give a worker another try
+        return False
+
+    def _mark_unsafe(self, key, reason):
+        signature = project_signature(key)
+        with self._lock:
+            self._unsafe[key] = (signature, reason)
+            worker = self._workers.pop(key, None)
+        if worker:
+            worker.stop()
+        print(f"[WarmWorkers] Running {key} cold until its files change: {reason}")
+
+    def _get(self, key, limits=None):
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is not None and not worker.alive:
+                del self._workers[key]
+                worker = None
+            if worker is not None:
+                self._workers.move_to_end(key)
+                return worker
+            # Another caller is starting this project's worker; like a busy worker, run cold meanwhile
+            if key in self._starting:
+                return None
+            self._starting.add(key)
+
+        # Started outside the pool lock: preloading can take seconds and must not hold up other projects
+        worker = WarmWorker(key, limits)
+        try:
+            worker.start()
+        except (OSError, RuntimeError) as e:
+            print(f"[WarmWorkers] Could not start worker: {e}")
+            if worker.unsafe:
+                self._mark_unsafe(key, worker.unsafe)
+            worker = None
+
+        evicted = []
+        with self._lock:
+            self._starting.discard(key)
+            if worker is not None:
+                self._workers[key] = worker
+                while len(self._workers) > self.max_workers:
+                    evicted.append(self._workers.popitem(last=False)[1])
+        for old in evicted:
+            old.stop()
+        return worker
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Returns the process-wide worker pool, or None when warm execution is disabled."""
+    global _pool
+    if CODE_EXEC_MODE != "warm":
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmWorkerPool()
+        return _pool
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.batch import BatchRunner, format_batch_summary, load_results, read_stories
+
+
+class FakeEngine:
+    """Stands in for CrewEngine: approves every story after a short delay."""
+
+    def __init__(self, project, stats):
+        self.project = project
+        self.stats = stats
+        self.journal = MagicMock()
+        self.journal.resumable.return_value = None
+        self.last_run_metrics = None
+        self.stories = []
+
+    def run(self, story):
+        active = self.stats["active"]
+        with self.stats["lock"]:
+            active[self.project] = active.get(self.project, 0) + 1
+            self.stats["max_per_project"] = max(self.stats["max_per_project"], active[self.project])
+            self.stats["max_total"] = max(self.stats["max_total"], sum(active.values()))
+        time.sleep(0.05)
+        with self.stats["lock"]:
+            active[self.project] -= 1
+        self.stories.append(story)
+        if story == "crash":
+            raise TimeoutError("LLM request timed out")
+        self.last_run_metrics = {"status": "approved", "iterations": 1, "seconds": 0.05, "totals": {"llm_calls": 5}}
+        return "APPROVED\nLooks good."
+
+    def resume_run(self):
+        self.stories.append("resumed")
+        self.last_run_metrics = {"status": "approved", "iterations": 0, "seconds": 0.01, "totals": {}}
+        return "APPROVED"
+
+
+class TestReadStories(unittest.TestCase):
+    def test_records_and_ids(self):
+        stream = io.StringIO(
+            '# overnight backlog\n'
+            '{"project": "shop", "story": "Add a cart"}\n'
+            '\n'
+            '{"project": "blog", "user_story": "Add tags", "id": "blog-1"}\n'
+            '{"project": "shop", "story": "Add a cart"}\n'
+        )
+        items = read_stories(stream)
+
+        self.assertEqual([(i.project, i.story) for i in items], [("shop", "Add a cart"), ("blog", "Add tags"), ("shop", "Add a cart")])
+        self.assertEqual(items[1].id, "blog-1")
+        self.assertEqual(items[2].id, items[0].id + "#2")
+        # Ids do not depend on the line a story is on
+        self.assertEqual(read_stories(io.StringIO('{"project": "shop", "story": "Add a cart"}'))[0].id, items[0].id)
+
+    def test_invalid_records_are_rejected_with_their_line(self):
+        for line in ('{"project": "shop"}', '{"project": "../etc", "story": "x"}', 'not json', '["shop", "x"]'):
+            with self.assertRaisesRegex(ValueError, "Line 2"):
+                read_stories(io.StringIO('{"project": "shop", "story": "ok"}\n' + line))
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.results_path = os.path.join(directory, "results.jsonl")
+        self.stats = {"lock": threading.Lock(), "active": {}, "max_per_project": 0, "max_total": 0}
+        self.engines = {}
+
+    def factory(self, project):
+        return self.engines.setdefault(project, FakeEngine(project, self.stats))
+
+    def items(self, lines):
+        return read_stories(io.StringIO("\n".join(json.dumps(line) for line in lines)))
+
+    def test_projects_run_in_parallel_and_each_project_in_order(self):
+        items = self.items([{"project": p, "story": f"{p} story {i}"} for i in range(3) for p in ("a", "b", "c")])
+
+        with patch('builtins.print'):
+            results = BatchRunner(self.factory, self.results_path, parallel=2).run(items)
+
+        self.assertEqual(len(results), 9)
+        self.assertEqual(self.stats["max_per_project"], 1)  # a project never runs two stories at once
+        self.assertEqual(self.stats["max_total"], 2)
+        self.assertEqual(self.engines["a"].stories, ["a story 0", "a story 1", "a story 2"])
+
+        written = load_results(self.results_path)
+        self.assertEqual(len(written), 9)
+        record = written[items[0].id]
+        self.assertEqual((record["status"], record["verdict"], record["iterations"]), ("approved", "APPROVED", 1))
+        self.assertEqual(record["totals"], {"llm_calls": 5})
+
+    def test_finished_stories_are_skipped_and_errors_retried_with_resume(self):
+        items = self.items([{"project": "a", "story": "first"}, {"project": "a", "story": "crash"}])
+        with patch('builtins.print'):
+            results = BatchRunner(self.factory, self.results_path).run(items)
+        self.assertEqual([r["status"] for r in results], ["approved", "error"])
+        self.assertEqual(results[1]["error"], "LLM request timed out")
+        self.assertIn("1 error", format_batch_summary(results))
+
+        # The crashed story left an interrupted run in the project's journal
+        engine = self.engines["a"]
+        engine.journal.resumable.return_value = {"user_story": "crash", "tasks": []}
+        engine.stories.clear()
+        with patch('builtins.print'):
+            results = BatchRunner(self.factory, self.results_path).run(items)
+
+        self.assertEqual(engine.stories, ["resumed"])
+        self.assertEqual((results[0]["id"], results[0]["resumed"]), (items[1].id, True))
+        self.assertEqual(load_results(self.results_path)[items[1].id]["status"], "approved")
+
+    def test_project_that_cannot_be_opened(self):
+        def factory(project):
+            raise OSError("permission denied")
+
+        with patch('builtins.print'):
+            results = BatchRunner(factory, self.results_path).run(self.items([{"project": "a", "story": "x"}]))
+        self.assertEqual(results[0]["status"], "error")
+        self.assertIn("permission denied", results[0]["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
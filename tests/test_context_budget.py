@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import uuid
+from types import SimpleNamespace
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.context_budget import DIVIDER, ContextBudget, outline, summarize_section
+from src.metrics import MetricsRegistry
+from src.tokens import count_tokens
+
+PLAN = "Plan: add a greeting module.\n" + "\n".join(
+    f"We considered approach {i} at length, weighing its trade-offs against the others in detail." for i in range(40)
+) + "\n## Selected approach\n- app/greeting.py with greet(name)\n- tests/test_greeting.py"
+CODE = "### app/greeting.py\n```python\n" + "\n".join(
+    f"def greet_{i}(name):\n    return f'Hello {i}, {{name}}!'" for i in range(60)
+) + "\n```"
+LOG = "\n".join(f"tests/test_greeting.py::test_{i} PASSED" for i in range(80)) + "\n============ 80 passed in 0.31s ============"
+
+
+def make_task(stage, raw, run):
+    task = SimpleNamespace(id=uuid.uuid4(), agent=None, output=SimpleNamespace(raw=raw))
+    run.track(task, stage)
+    return task
+
+
+class TestSummaries(unittest.TestCase):
+    def test_outline_keeps_headings_and_list_items(self):
+        self.assertEqual(
+            outline(PLAN),
+            "Plan: add a greeting module.\n## Selected approach\n- app/greeting.py with greet(name)\n- tests/test_greeting.py"
+        )
+
+    def test_logs_are_condensed_and_code_is_left_alone(self):
+        self.assertEqual(summarize_section("execute", LOG), "Result: 80 passed")
+        self.assertEqual(summarize_section("develop", CODE), CODE)
+
+
+class TestContextBudget(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        patcher = patch('src.context_budget.get_metrics', return_value=self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.run_metrics = self.metrics.start_run("shop")
+        self.plan = make_task("plan", PLAN, self.run_metrics)
+        self.dev = make_task("develop", CODE, self.run_metrics)
+        self.runner = make_task("execute", LOG, self.run_metrics)
+        self.review = make_task("review", None, self.run_metrics)
+        self.review.context = [self.plan, self.dev, self.runner]
+
+    def messages(self):
+        context = DIVIDER.join([PLAN, CODE, LOG])
+        return [
+            {"role": "system", "content": "You are the Chief Architect."},
+            {"role": "user", "content": f"Review the code.\n\nThis is the context you're working with:\n{context}"}
+        ]
+
+    def test_prompts_within_the_limit_are_untouched(self):
+        messages = self.messages()
+        budget = ContextBudget({"reviewer": 100000})
+        self.assertIs(budget.fit(messages, "reviewer", self.review), messages)
+        self.assertEqual(self.metrics.prompt_size.count("reviewer"), 1)
+        self.assertEqual(self.metrics.context_budget.value("reviewer"), 100000)
+
+    def test_plan_and_log_are_summarised_before_code_is_touched(self):
+        messages = self.messages()
+        code_tokens = count_tokens(CODE)
+        budget = ContextBudget({"reviewer": code_tokens + 150})
+
+        fitted = budget.fit(messages, "reviewer", self.review)
+
+        content = fitted[1]["content"]
+        self.assertIn(CODE, content)
+        self.assertIn("## Selected approach", content)
+        self.assertNotIn("approach 7 at length", content)
+        self.assertTrue(content.endswith("Result: 80 passed"))
+        self.assertEqual(messages[1]["content"], self.messages()[1]["content"])  # the caller's list is not changed
+        self.assertLessEqual(sum(count_tokens(m["content"]) for m in fitted), code_tokens + 150)
+
+        self.assertGreater(self.metrics.context_trimmed.value("reviewer", "plan"), 0)
+        self.assertGreater(self.metrics.context_trimmed.value("reviewer", "execute"), 0)
+        self.assertEqual(self.metrics.context_trimmed.value("reviewer", "develop"), 0)
+        stats = self.metrics._stats_for(self.review.id)
+        self.assertEqual(stats.trimmed_tokens, sum(
+            self.metrics.context_trimmed.value("reviewer", stage) for stage in ("plan", "execute")
+        ))
+
+    def test_code_is_truncated_as_a_last_resort(self):
+        fitted = ContextBudget({"reviewer": 300}).fit(self.messages(), "reviewer", self.review)
+
+        content = fitted[1]["content"]
+        self.assertIn("[truncated]", content)
+        self.assertIn("### app/greeting.py", content)
+        self.assertGreater(self.metrics.context_trimmed.value("reviewer", "develop"), 0)
+
+    def test_prompt_without_task_context_is_left_alone(self):
+        messages = [{"role": "user", "content": PLAN}]
+        with patch('builtins.print') as mock_print:
+            self.assertIs(ContextBudget({"pm": 50}).fit(messages, "pm", self.plan), messages)
+        mock_print.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
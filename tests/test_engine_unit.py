@@ -3,11 +3,18 @@ from unittest.mock import patch, MagicMock, mock_open
 import os
 import sys
 import json
+import shutil
+import subprocess
+import tempfile
+import threading
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.engine import CrewEngine
+from src.jobs import JobCancelled
+from src.locks import PROJECT_LOCK_WAIT, ProjectBusy, ProjectLock
+from src.file_tree import FileTreeIndex
 
 class TestCrewEngineUnit(unittest.TestCase):
     def setUp(self):
@@ -39,17 +46,39 @@ class TestCrewEngineUnit(unittest.TestCase):
         self.assertIsNotNone(engine.search_tool)
         MockSerper.assert_called_once()
 
-    @patch('os.walk')
-    def test_get_file_tree(self, mock_walk):
-        # Mocking os.walk to return a predictable structure
-        # Use os.path.join to be platform agnostic
-        base = os.path.join('projects', 'test_proj')
-        mock_walk.return_value = [
-            (base, ['code', '__pycache__'], ['memory.md']),
-            (os.path.join(base, 'code'), [], ['main.py']),
-        ]
+    @patch('src.engine.LLM')
+    def test_llm_is_created_lazily(self, MockLLM):
+        self.assertEqual(self.engine._routers, {})
+        llm = self.engine.llm
+        self.assertIs(self.engine.llm, llm)
+        MockLLM.assert_called_once()
+
+    @patch('src.engine.LLM')
+    def test_roles_get_their_tier_model(self, MockLLM):
+        from src.llm_config import ModelConfig
+        config = ModelConfig(tiers={"fast": {"model": "openai/qwen3:1.7b"}}, default_model="openai/qwen3:8b",
+                             default_endpoints=["http://gpu1/v1"])
+        with patch('src.engine.get_model_config', return_value=config):
+            self.engine._llm_for("classifier")
+            self.engine._llm_for("docs")
+            self.engine._llm_for("developer")
+
+        # One client per distinct model spec: classifier and docs share the fast one
+        models = [call.kwargs["model"] for call in MockLLM.call_args_list]
+        self.assertEqual(sorted(models), ["openai/qwen3:1.7b", "openai/qwen3:8b"])
+        fast_call = next(call for call in MockLLM.call_args_list if call.kwargs["model"] == "openai/qwen3:1.7b")
+        self.assertEqual(fast_call.kwargs["temperature"], 0.0)
+
+    def test_get_file_tree(self):
+        # Build a predictable structure on disk
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base, ignore_errors=True)
+        os.makedirs(os.path.join(base, 'code'))
+        os.makedirs(os.path.join(base, '__pycache__'))
+        open(os.path.join(base, 'memory.md'), 'w').close()
+        open(os.path.join(base, 'code', 'main.py'), 'w').close()
         
-        self.engine.base_dir = base
+        self.engine.file_tree = FileTreeIndex(base)
         
         tree = self.engine._get_file_tree()
         
@@ -58,6 +87,16 @@ class TestCrewEngineUnit(unittest.TestCase):
         self.assertIn('main.py', tree)
         self.assertNotIn('__pycache__', tree)
 
+    def test_get_memory_context_with_query_uses_store(self):
+        self.engine.memory_store = MagicMock()
+        self.engine.memory_store.build_context.return_value = "Relevant memory"
+        self.engine._get_file_tree = MagicMock(return_value="TREE")
+
+        context = self.engine._get_memory_context("Add login")
+
+        self.engine.memory_store.build_context.assert_called_once_with("Add login")
+        self.assertEqual(context, "Relevant memory\nTREE")
+
     @patch('os.path.exists')
     @patch('builtins.open', new_callable=mock_open, read_data='{"version": "0.1.0"}')
     def test_get_project_metadata(self, mock_file, mock_exists):
@@ -65,27 +104,77 @@ class TestCrewEngineUnit(unittest.TestCase):
         metadata = self.engine.get_project_metadata()
         self.assertEqual(metadata['version'], '0.1.0')
 
-    @patch('re.finditer')
-    @patch('os.makedirs')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_save_files_from_output(self, mock_file, mock_makedirs, mock_finditer):
-        # Mock a task with output
-        mock_task = MagicMock()
-        mock_task.output = "### test.py\n```python\nprint('hello')\n```"
-        
-        mock_crew = MagicMock()
-        mock_crew.tasks = [mock_task]
-        
-        # Mock re.finditer to return a match
-        mock_match = MagicMock()
-        mock_match.group.side_effect = lambda i: {1: 'test.py', 2: "print('hello')"}[i]
-        mock_finditer.return_value = [mock_match]
-        
-        self.engine._save_files_from_output(mock_crew)
+    def test_save_files_from_text(self):
+        self.engine.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.engine.output_dir, ignore_errors=True)
+
+        written = self.engine._save_files_from_text("### test.py\n```python\nprint('hello')\n```")
         
-        # Verify file was "written"
-        # The file path will be os.path.join(self.engine.output_dir, 'test.py')
-        mock_file().write.assert_called_with("print('hello')")
+        self.assertEqual(written, ['test.py'])
+        with open(os.path.join(self.engine.output_dir, 'test.py')) as f:
+            self.assertEqual(f.read(), "print('hello')")
+        # Unchanged files are not written again, so they are not reported either
+        self.assertEqual(self.engine._save_files_from_text("### test.py\n```python\nprint('hello')\n```"), [])
+
+    def test_save_files_skips_diffs_and_escaping_paths(self):
+        self.engine.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.engine.output_dir, ignore_errors=True)
+
+        output = (
+            "### main.py\n```diff\n--- a/main.py\n+++ b/main.py\n@@ -1 +1 @@\n-a\n+b\n```\n"
+            "### ../evil.py\n```python\nx = 1\n```"
+        )
+
+        self.assertEqual(self.engine._save_files_from_text(output), [])
+        self.assertEqual(os.listdir(self.engine.output_dir), [])
+
+    @patch('src.engine.write_if_changed')
+    def test_task_callback_saves_files_as_tasks_complete(self, mock_write):
+        written = set()
+        reports = []
+        callback = self.engine._make_task_callback(reports.append, ["develop", "test"], written_files=written)
+        callback("### app.py\n```python\nx = 1\n```")
+
+        self.assertEqual(written, {'app.py'})
+        mock_write.assert_called_once_with(os.path.join(os.path.abspath(self.engine.output_dir), 'app.py'), "x = 1")
+        self.assertEqual(reports[-1]["stage"], "test")
+
+    def test_patch_callback_applies_diffs(self):
+        self.engine.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.engine.output_dir, ignore_errors=True)
+        with open(os.path.join(self.engine.output_dir, 'main.py'), 'w') as f:
+            f.write("def greet():\n    return 'hi'\n")
+
+        errors, written = [], set()
+        callback = self.engine._make_patch_callback(errors, written)
+        output = MagicMock()
+        output.raw = (
+            "```diff\n--- a/code/main.py\n+++ b/code/main.py\n@@ -1,2 +1,2 @@\n"
+            " def greet():\n-    return 'hi'\n+    return 'hello'\n```"
+        )
+        callback(output)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(written, {'main.py'})
+        with open(os.path.join(self.engine.output_dir, 'main.py')) as f:
+            self.assertEqual(f.read(), "def greet():\n    return 'hello'\n")
+
+    def test_patch_callback_reports_failures(self):
+        self.engine.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.engine.output_dir, ignore_errors=True)
+        with open(os.path.join(self.engine.output_dir, 'main.py'), 'w') as f:
+            f.write("x = 1\n")
+
+        errors = []
+        callback = self.engine._make_patch_callback(errors, set())
+        output = MagicMock()
+        output.raw = "--- a/main.py\n+++ b/main.py\n@@ -1 +1 @@\n-y = 2\n+y = 3\n"
+        callback(output)
+
+        self.assertEqual(len(errors), 1)
+        self.assertIn("NOT applied", output.raw)
+        with open(os.path.join(self.engine.output_dir, 'main.py')) as f:
+            self.assertEqual(f.read(), "x = 1\n")
 
     @patch('src.engine.Agent')
     @patch('src.engine.Crew')
@@ -107,6 +196,27 @@ class TestCrewEngineUnit(unittest.TestCase):
         intent = self.engine._classify_intent("Add a new button")
         self.assertEqual(intent, "TASK")
 
+    @patch('src.engine.Agent')
+    @patch('src.engine.Crew')
+    @patch('src.engine.Task')
+    def test_classify_intent_obvious_input_skips_llm(self, MockTask, MockCrew, MockAgent):
+        intent = self.engine._classify_intent("Fix the failing tests")
+
+        self.assertEqual(intent, "TASK")
+        self.assertEqual(self.engine.last_intent.source, "heuristic")
+        MockCrew.return_value.kickoff.assert_not_called()
+
+    @patch('src.engine.Agent')
+    @patch('src.engine.Crew')
+    @patch('src.engine.Task')
+    def test_classify_intent_llm_fallback_is_normalised(self, MockTask, MockCrew, MockAgent):
+        MockCrew.return_value.kickoff.return_value = "<think>hmm</think> Chat."
+
+        intent = self.engine._classify_intent("The login page looks broken")
+
+        self.assertEqual(intent, "CHAT")
+        self.assertEqual(self.engine.last_intent.source, "llm")
+
     @patch('subprocess.run')
     @patch('os.path.exists')
     @patch('builtins.open', new_callable=mock_open)
@@ -126,6 +236,46 @@ class TestCrewEngineUnit(unittest.TestCase):
         # Check if metadata file was created
         mock_file.assert_any_call(self.engine.metadata_file, 'w')
 
+    def test_git_setup_is_only_needed_for_a_missing_repo_or_origin(self):
+        self.engine.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.engine.base_dir, ignore_errors=True)
+        self.assertTrue(self.engine._git_setup_needed())
+
+        subprocess.run(["git", "init", "-q"], cwd=self.engine.base_dir, check=True)
+        self.assertFalse(self.engine._git_setup_needed())
+        self.assertTrue(self.engine._git_setup_needed(remote_url="https://github.com/user/repo"))
+        subprocess.run(["git", "remote", "add", "origin", "https://github.com/user/repo"], cwd=self.engine.base_dir, check=True)
+        self.assertFalse(self.engine._git_setup_needed(remote_url="https://github.com/user/repo"))
+
+    @patch('src.engine.CrewEngine._initialize_git_repo')
+    @patch('src.engine.CrewEngine._git_setup_needed')
+    def test_git_init_does_not_wait_out_a_busy_project(self, mock_needed, mock_init):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        lock = ProjectLock(directory)
+        holding, done = threading.Event(), threading.Event()
+
+        def other_run():
+            with lock.hold(purpose="run: Other task"):
+                holding.set()
+                done.wait(10)
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        holding.wait(5)
+        try:
+            with patch('os.makedirs'), patch('src.engine.CodeExecutionTool'), patch('src.engine.SyntaxCheckTool'), \
+                    patch('src.engine.get_project_lock', return_value=lock):
+                mock_needed.return_value = False  # existing repo: the lock is not needed
+                CrewEngine(project_name="test_proj", init_git=True)
+                mock_needed.return_value = True
+                with self.assertRaises(ProjectBusy):
+                    CrewEngine(project_name="test_proj", init_git=True, lock_timeout=0)
+        finally:
+            done.set()
+            thread.join()
+        mock_init.assert_not_called()
+
     @patch('builtins.open', new_callable=mock_open)
     def test_update_memory(self, mock_file):
         self.engine._update_memory("Add login", "Result OK")
@@ -153,9 +303,76 @@ class TestCrewEngineUnit(unittest.TestCase):
         mock_classify.return_value = "TASK"
         self.engine.process_message("Do work")
         
-        mock_run.assert_called_once_with("Do work")
+        mock_run.assert_called_once_with("Do work", progress_callback=None, lock_timeout=PROJECT_LOCK_WAIT)
         mock_chat.assert_not_called()
 
+    @patch('src.engine.CrewEngine._run')
+    def test_run_is_rejected_while_another_run_holds_the_project(self, mock_run):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.engine.lock = ProjectLock(directory)
+        holding, done = threading.Event(), threading.Event()
+
+        def other_run():
+            with self.engine.lock.hold(purpose="run: Other task"):
+                holding.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        holding.wait(5)
+        progress = MagicMock()
+        try:
+            with self.assertRaises(ProjectBusy):
+                self.engine.run("Do work", progress_callback=progress, lock_timeout=0)
+        finally:
+            done.set()
+            thread.join()
+
+        mock_run.assert_not_called()
+        progress.assert_called_once_with({"stage": "waiting", "step": 0, "total": 0, "iteration": 0})
+        mock_run.return_value = "APPROVED"
+        self.assertEqual(self.engine.run("Do work", lock_timeout=0), "APPROVED")
+
+    @patch('src.engine.CrewEngine._run')
+    def test_cancel_stops_the_wait_for_the_project(self, mock_run):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.engine.lock = ProjectLock(directory)
+        holding, done, cancelled = threading.Event(), threading.Event(), threading.Event()
+
+        def other_run():
+            with self.engine.lock.hold(purpose="run: Other task"):
+                holding.set()
+                done.wait(10)
+
+        def progress(report):
+            if cancelled.is_set():
+                raise JobCancelled()
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        holding.wait(5)
+        threading.Timer(0.1, cancelled.set).start()
+        try:
+            with self.assertRaises(JobCancelled):
+                self.engine.run("Do work", progress_callback=progress, lock_timeout=None)
+            self.assertFalse(done.is_set())  # gave up while the other run still held the project
+        finally:
+            done.set()
+            thread.join()
+
+        mock_run.assert_not_called()  # the journal of an interrupted run is left for /jobs/resume
+
+    def test_task_callback_reports_stages(self):
+        reports = []
+        callback = self.engine._make_task_callback(reports.append, ["plan", "develop"], iteration=1)
+        callback("plan output")
+        callback("develop output")
+
+        self.assertEqual([r["stage"] for r in reports], ["plan", "develop"])
+        self.assertEqual(reports[1], {"stage": "develop", "step": 2, "total": 2, "iteration": 1})
+
     @patch('src.engine.Agent')
     @patch('src.engine.Crew')
     @patch('src.engine.Task')
@@ -171,26 +388,16 @@ class TestCrewEngineUnit(unittest.TestCase):
         # Ensure context was fetched
         mock_context.assert_called_once()
 
-    @patch('subprocess.run')
+    @patch('src.engine.get_git_pipeline')
     @patch('os.path.exists')
-    @patch('json.dump')
-    @patch('src.engine.CrewEngine.get_project_metadata')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_commit_changes(self, mock_file, mock_get_meta, mock_json_dump, mock_exists, mock_run):
-        # Setup: .git exists, metadata returns version 0.1.0
+    def test_commit_changes(self, mock_exists, mock_get_pipeline):
+        # Setup: .git exists; the pipeline commits now and pushes in the background
         mock_exists.return_value = True
-        mock_get_meta.return_value = {"version": "0.1.0"}
-        
+
         self.engine._commit_changes("New Feature")
-        
-        # Verify version incremented to 0.1.1
-        # json.dump should be called with updated metadata
-        args, _ = mock_json_dump.call_args
-        self.assertEqual(args[0]['version'], "0.1.1")
-        
-        # Verify git commit called
-        calls = [call.args[0] for call in mock_run.call_args_list]
-        self.assertTrue(any("commit" in cmd for cmd in calls))
+
+        mock_get_pipeline.assert_called_once_with(self.engine.base_dir, self.engine.metadata_file)
+        mock_get_pipeline.return_value.commit.assert_called_once_with("feat: New Feature (v{version})")
 
 if __name__ == '__main__':
     unittest.main()
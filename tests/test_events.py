@@ -0,0 +1,134 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import events
+from src.events import EventStream, publish, sse, streaming_to
+
+
+def collect(chunks, count=None):
+    """Runs the async SSE generator, returning all its chunks (or the first count)."""
+    async def run():
+        out = []
+        async for chunk in chunks:
+            out.append(chunk)
+            if len(out) == count:
+                break
+        return out
+    return asyncio.run(run())
+
+
+class TestEventStream(unittest.TestCase):
+    def test_read_after_seq_and_buffer_limit(self):
+        stream = EventStream(limit=3)
+        for i in range(5):
+            stream.publish("progress", step=i)
+
+        self.assertEqual([e["seq"] for e in stream.read()], [3, 4, 5])
+        self.assertEqual([e["step"] for e in stream.read(after=4)], [4])
+        self.assertEqual(stream.read(after=5, timeout=0.01), [])
+
+    def test_reader_wakes_on_publish_and_close(self):
+        stream = EventStream()
+        threading.Timer(0.05, stream.publish, args=("status",), kwargs={"status": "running"}).start()
+        self.assertEqual(stream.read(timeout=5)[0]["status"], "running")
+
+        stream.close()
+        stream.publish("token", text="late")  # dropped once the job is done
+        self.assertEqual(len(stream.read(timeout=5)), 1)
+
+    def test_async_reader_wakes_on_publish_from_another_thread(self):
+        stream = EventStream()
+
+        async def wait():
+            threading.Timer(0.05, stream.publish, args=("status",), kwargs={"status": "running"}).start()
+            return await stream.wait(timeout=5)
+
+        self.assertEqual(asyncio.run(wait())[0]["status"], "running")
+        self.assertFalse(stream._waiters)
+
+    def test_full_buffer_drops_tokens_first(self):
+        stream = EventStream(limit=3)
+        stream.publish("task_started", task="Implement")
+        for text in ("a", "b", "c"):
+            stream.publish("token", call_id="c1", text=text)
+        stream.publish("progress", step=2)
+
+        self.assertEqual([(e["type"], e.get("text")) for e in stream.read()],
+                         [("task_started", None), ("token", "c"), ("progress", None)])
+
+    def test_sse_format_and_resume(self):
+        stream = EventStream()
+        stream.publish("status", status="queued", kind="run")
+        stream.publish("done", status="succeeded")
+        stream.close()
+
+        chunks = collect(sse(stream, heartbeat=0.01))
+        self.assertEqual(chunks[0], "retry: 2000\n\n")
+        lines = chunks[1].splitlines()
+        self.assertEqual(lines[:2], ["id: 1", "event: status"])
+        self.assertEqual(json.loads(lines[2][len("data: "):])["kind"], "run")
+        # A client reconnecting with Last-Event-ID: 1 only gets what it missed
+        self.assertEqual([c.split("\n")[1] for c in collect(sse(stream, after=1))[1:]], ["event: done"])
+
+    def test_idle_stream_sends_keep_alive(self):
+        stream = EventStream()
+        self.assertEqual(collect(sse(stream, heartbeat=0.01), count=2)[1], ": keep-alive\n\n")
+
+    def test_tokens_of_one_call_are_sent_together(self):
+        stream = EventStream()
+        for call_id, text in (("c1", "def "), ("c1", "f():"), ("c2", "ok")):
+            stream.publish("token", call_id=call_id, text=text)
+        stream.close()
+
+        sent = [json.loads(c.splitlines()[2][len("data: "):]) for c in collect(sse(stream))[1:]]
+        self.assertEqual([(e["seq"], e["text"]) for e in sent], [(2, "def f():"), (3, "ok")])
+
+
+class TestRouting(unittest.TestCase):
+    def test_events_go_to_the_stream_of_the_running_job(self):
+        first, second = EventStream(), EventStream()
+
+        def job(stream, text):
+            with streaming_to(stream):
+                publish("files", paths=[text])
+
+        threads = [threading.Thread(target=job, args=(s, t)) for s, t in ((first, "a.py"), (second, "b.py"))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        publish("files", paths=["outside.py"])  # no job: ignored
+
+        self.assertEqual([e["paths"] for e in first.read()], [["a.py"]])
+        self.assertEqual([e["paths"] for e in second.read()], [["b.py"]])
+
+    def test_crew_handlers(self):
+        stream = EventStream()
+        agent = SimpleNamespace(role="Developer")
+        with streaming_to(stream):
+            events.on_task_started(SimpleNamespace(task_id=None, task_name="Implement", task=SimpleNamespace(agent=agent)))
+            events.on_token(SimpleNamespace(agent_role=None, from_agent=agent, call_id="c1", chunk="def "))
+            events.on_token(SimpleNamespace(agent_role="Developer", call_id="c1", chunk=""))
+            events.on_tool(SimpleNamespace(task_id=None, agent_role="Developer", tool_name="write_file",
+                                           tool_args={"path": "a.py"}, error="disk full"), "error")
+            events.on_task_completed(SimpleNamespace(task_id=None, agent_role="Developer",
+                                                     output=SimpleNamespace(raw="x" * (events.EVENT_TEXT_LIMIT + 1))))
+
+        started, token, tool, completed = stream.read()
+        self.assertEqual((started["type"], started["agent"], started["task"]), ("task_started", "Developer", "Implement"))
+        self.assertEqual((token["text"], token["agent"]), ("def ", "Developer"))
+        self.assertEqual((tool["tool"], tool["status"], tool["error"], tool["args"]), ("write_file", "error", "disk full", None))
+        self.assertTrue(completed["output"].endswith("[truncated]"))
+        self.assertIsNone(completed["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
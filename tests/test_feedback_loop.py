@@ -30,7 +30,7 @@ class TestFeedbackLoop(unittest.TestCase):
         engine = CrewEngine(project_name="test_project", init_git=False)
         
         # Mock file operations to avoid side effects
-        engine._save_files_from_output = MagicMock()
+        engine._save_files_from_text = MagicMock(return_value=[])
         engine._update_memory = MagicMock()
         engine._commit_changes = MagicMock()
         engine._get_memory_context = MagicMock(return_value="Context")
@@ -43,5 +43,28 @@ class TestFeedbackLoop(unittest.TestCase):
         self.assertEqual(mock_crew_instance.kickoff.call_count, 2)
         print("\nTest passed: Loop executed 2 times (Reject -> Approve)")
 
+    @patch('src.engine.Crew')
+    @patch('src.engine.Agent')
+    @patch('src.engine.Task')
+    @patch('src.engine.LLM')
+    def test_failed_tests_are_rerun_first(self, MockLLM, MockTask, MockAgent, MockCrew):
+        engine = CrewEngine(project_name="test_project", init_git=False)
+        engine._update_memory = MagicMock()
+        engine._commit_changes = MagicMock()
+        engine._get_memory_context = MagicMock(return_value="Context")
+
+        def first_run():
+            # What the runner's pytest call left on the tool; the crew's answer does not quote it
+            engine.code_tool.failed_tests = ["tests/test_hello.py::test_greet"]
+            return "REJECTED: test_greet fails."
+
+        kickoffs = iter([first_run, lambda: "APPROVED"])
+        MockCrew.return_value.kickoff.side_effect = lambda: next(kickoffs)()
+
+        engine.run("Implement a greeting")
+
+        descriptions = [c.kwargs.get("description", "") for c in MockTask.call_args_list]
+        self.assertTrue(any("'pytest tests/test_hello.py::test_greet'" in d for d in descriptions))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.fence_parser import parse_code_blocks
+
+
+class TestFenceParser(unittest.TestCase):
+    def test_heading_and_block(self):
+        blocks, errors = parse_code_blocks("Intro\n### main.py\n\n```python\nprint('hi')\n```\nDone")
+        self.assertEqual(errors, [])
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual((blocks[0].filename, blocks[0].language, blocks[0].content), ("main.py", "python", "print('hi')"))
+
+    def test_block_without_heading_has_no_filename(self):
+        blocks, _ = parse_code_blocks("### main.py\nSome prose.\n```diff\n-a\n+b\n```")
+        self.assertIsNone(blocks[0].filename)
+        self.assertEqual(blocks[0].language, "diff")
+
+    def test_longer_fence_contains_shorter_one(self):
+        text = "### README.md\n````markdown\n# App\n```\npip install app\n```\n````\n"
+        blocks, errors = parse_code_blocks(text)
+        self.assertEqual(errors, [])
+        self.assertEqual(blocks[0].content, "# App\n```\npip install app\n```")
+
+    def test_nested_fence_with_language_tag(self):
+        text = "### README.md\n```markdown\n# App\n```bash\npython main.py\n```\nMore docs.\n```\n### b.py\n```\nx = 1\n```"
+        blocks, errors = parse_code_blocks(text)
+        self.assertEqual(errors, [])
+        self.assertEqual([b.filename for b in blocks], ["README.md", "b.py"])
+        self.assertEqual(blocks[0].content, "# App\n```bash\npython main.py\n```\nMore docs.")
+
+    def test_indented_output_is_dedented(self):
+        text = "    ### app.py\n    ```python\n    def f():\n        return 1\n    ```"
+        blocks, _ = parse_code_blocks(text)
+        self.assertEqual(blocks[0].content, "def f():\n    return 1")
+
+    def test_heading_variants(self):
+        blocks, _ = parse_code_blocks("### `a.py`\n```\n1\n```\n### File: **b.py**\n```\n2\n```")
+        self.assertEqual([b.filename for b in blocks], ["a.py", "b.py"])
+
+    def test_unclosed_block_is_reported(self):
+        blocks, errors = parse_code_blocks("### ok.py\n```\n1\n```\n### broken.py\n```python\nx = 1\n")
+        self.assertEqual([b.filename for b in blocks], ["ok.py"])
+        self.assertEqual(len(errors), 1)
+        self.assertIn("broken.py", errors[0])
+        self.assertIn("Line 6", errors[0])
+
+    def test_blocks_after_an_unclosed_fence_are_recovered(self):
+        text = "### notes.md\n```markdown\nNever closed.\n\n### a.py\n```python\nx = 1\n```\n### b.py\n```python\ny = 2\n```\n"
+        blocks, errors = parse_code_blocks(text)
+        self.assertEqual([(b.filename, b.content, b.line) for b in blocks], [("a.py", "x = 1", 6), ("b.py", "y = 2", 10)])
+        self.assertEqual(len(errors), 1)
+
+    def test_unbalanced_nested_fences_are_read_again(self):
+        text = (
+            "### notes.md\n```markdown\nNever closed.\n"
+            "### README.md\n```markdown\n# App\n```bash\nls\n```\n```\n"
+            "### b.py\n```python\ny = 2\n```\n"
+        )
+        blocks, errors = parse_code_blocks(text)
+        self.assertEqual([(b.filename, b.content) for b in blocks],
+                         [("README.md", "# App\n```bash\nls\n```"), ("b.py", "y = 2")])
+        self.assertEqual(len(errors), 1)
+        self.assertIn("Line 2: code block for 'notes.md'", errors[0])
+
+    def test_fences_without_a_closer_are_read_as_text(self):
+        text = "```python\n" * 3 + "### a.py\n~~~\nx = 1\n~~~\n"
+        blocks, errors = parse_code_blocks(text)
+        self.assertEqual([(b.filename, b.content) for b in blocks], [("a.py", "x = 1")])
+        self.assertEqual(len(errors), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
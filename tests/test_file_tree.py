@@ -0,0 +1,130 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.file_tree import FileTreeIndex, IgnoreRules
+
+class TestFileTreeIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _touch(self, *parts):
+        path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write("")
+        return path
+
+    def test_render_format(self):
+        self._touch('memory.md')
+        self._touch('code', 'main.py')
+        self._touch('code', 'pkg', 'util.py')
+
+        tree = FileTreeIndex(self.root).render()
+
+        self.assertEqual(tree, (
+            "\n## Current File Structure:\n"
+            "  memory.md\n"
+            "  code/\n"
+            "    main.py\n"
+            "    pkg/\n"
+            "      util.py\n"
+        ))
+
+    def test_skips_hidden_and_default_ignores(self):
+        self._touch('.env')
+        self._touch('.git', 'HEAD')
+        self._touch('code', 'node_modules', 'lib', 'index.js')
+        self._touch('code', 'venv', 'bin', 'python')
+        self._touch('code', 'main.py')
+
+        tree = FileTreeIndex(self.root).render()
+
+        self.assertIn('main.py', tree)
+        for hidden in ('.env', '.git', 'node_modules', 'venv', 'index.js'):
+            self.assertNotIn(hidden, tree)
+
+    def test_honours_gitignore(self):
+        with open(os.path.join(self.root, '.gitignore'), 'w') as f:
+            f.write("*.log\nbuild/\n!keep.log\n")
+        self._touch('code', 'app.log')
+        self._touch('code', 'keep.log')
+        self._touch('code', 'build', 'out.bin')
+        self._touch('code', 'main.py')
+
+        tree = FileTreeIndex(self.root).render()
+
+        self.assertIn('main.py', tree)
+        self.assertIn('keep.log', tree)
+        self.assertNotIn('app.log', tree)
+        self.assertNotIn('build', tree)
+
+    def test_incremental_refresh_only_rescans_changed_directories(self):
+        for i in range(5):
+            self._touch('code', f'pkg{i}', 'mod.py')
+        index = FileTreeIndex(self.root)
+        index.render()
+        self.assertEqual(index.rescanned, 7)
+
+        index.render()
+        self.assertEqual(index.rescanned, 0)
+
+        self._touch('code', 'pkg3', 'new.py')
+        tree = index.render()
+        self.assertEqual(index.rescanned, 1)
+        self.assertIn('new.py', tree)
+
+    def test_gitignore_edit_is_picked_up(self):
+        self._touch('code', 'app.log')
+        index = FileTreeIndex(self.root)
+        self.assertIn('app.log', index.render())
+
+        gitignore = os.path.join(self.root, '.gitignore')
+        with open(gitignore, 'w') as f:
+            f.write("*.log\n")
+        self.assertNotIn('app.log', index.render())
+
+    def test_limits(self):
+        for i in range(10):
+            self._touch('big', f'file{i}.py')
+        self._touch('a', 'b', 'c', 'deep.py')
+        for i in range(3):
+            self._touch(f'z{i}.py')
+
+        tree = FileTreeIndex(self.root, max_depth=2, collapse_threshold=5).render()
+        self.assertIn('... (10 files, 0 directories collapsed)', tree)
+        self.assertIn('c/ ...', tree)
+        self.assertNotIn('deep.py', tree)
+
+        tree = FileTreeIndex(self.root, max_entries=2).render()
+        self.assertIn('more entries not shown', tree)
+
+    def test_removed_directory(self):
+        self._touch('code', 'pkg', 'mod.py')
+        index = FileTreeIndex(self.root)
+        self.assertIn('mod.py', index.render())
+
+        shutil.rmtree(os.path.join(self.root, 'code', 'pkg'))
+        self.assertNotIn('pkg', index.render())
+
+class TestIgnoreRules(unittest.TestCase):
+    def test_anchored_and_nested_patterns(self):
+        rules = IgnoreRules().extend("", ["/dist", "docs/*.md", "**/tmp"]).extend("code", ["secret.py"])
+
+        self.assertTrue(rules.ignored("dist", True))
+        self.assertFalse(rules.ignored("code/dist", True))
+        self.assertTrue(rules.ignored("docs/a.md", False))
+        self.assertTrue(rules.ignored("code/x/tmp", True))
+        self.assertTrue(rules.ignored("code/sub/secret.py", False))
+        self.assertFalse(rules.ignored("secret.py", False))
+
+if __name__ == '__main__':
+    unittest.main()
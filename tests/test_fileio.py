@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.fileio import atomic_write, resolve_inside, write_if_changed
+
+
+class TestFileIO(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def test_atomic_write_preserves_mode_and_leaves_no_temp_files(self):
+        path = os.path.join(self.root, "run.sh")
+        atomic_write(path, "echo 1\n")
+        os.chmod(path, 0o755)
+        atomic_write(path, "echo 2\n")
+
+        with open(path) as f:
+            self.assertEqual(f.read(), "echo 2\n")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o755)
+        self.assertEqual(os.listdir(self.root), ["run.sh"])
+
+    def test_new_files_get_the_umask_default_mode(self):
+        path = os.path.join(self.root, "new.py")
+        atomic_write(path, "x = 1\n")
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+
+    def test_write_if_changed_skips_identical_content(self):
+        path = os.path.join(self.root, "pkg", "a.py")
+        self.assertTrue(write_if_changed(path, "x = 1\n"))
+        mtime = os.stat(path).st_mtime_ns
+
+        self.assertFalse(write_if_changed(path, "x = 1\n"))
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertTrue(write_if_changed(path, "x = 2\n"))
+
+    def test_resolve_inside(self):
+        self.assertEqual(resolve_inside(self.root, "a/b.py"), os.path.join(self.root, "a", "b.py"))
+        with self.assertRaises(ValueError):
+            resolve_inside(self.root, "../outside.py")
+        with self.assertRaises(ValueError):
+            resolve_inside(self.root, "/etc/passwd")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.git_pipeline import GitPipeline, bump_version
+from src.locks import get_project_lock
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+class TestGitPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.remote = os.path.join(self.tmp, "remote.git")
+        self.repo = os.path.join(self.tmp, "repo")
+        git(self.tmp, "init", "-q", "--bare", self.remote)
+        os.makedirs(self.repo)
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "config", "user.email", "test@example.com")
+        git(self.repo, "config", "user.name", "Test")
+        self.metadata_file = os.path.join(self.repo, "project_metadata.json")
+        self.write("project_metadata.json", json.dumps({"version": "0.1.0"}))
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "init")
+        git(self.repo, "remote", "add", "origin", self.remote)
+
+    def write(self, name, content):
+        with open(os.path.join(self.repo, name), "w") as f:
+            f.write(content)
+
+    def test_bump_version(self):
+        self.assertEqual(bump_version(self.metadata_file), "0.1.1")
+        self.assertEqual(bump_version(os.path.join(self.tmp, "missing.json")), "unknown")
+
+    def test_commits_are_made_in_order_and_pushed(self):
+        pipeline = GitPipeline(self.repo, self.metadata_file)
+        self.write("a.py", "a = 1\n")
+        self.assertTrue(pipeline.commit("feat: a (v{version})"))
+        self.assertTrue(pipeline.wait(30))
+
+        self.write("b.py", "b = 1\n")
+        pipeline.commit("feat: b (v{version})")
+        pipeline.commit("feat: c (v{version})")  # only the version bump
+        # Committed straight away; the push follows in the background
+        log = git(self.repo, "log", "--format=%s").splitlines()
+        self.assertEqual(log[:3], ["feat: c (v0.1.3)", "feat: b (v0.1.2)", "feat: a (v0.1.1)"])
+        self.assertTrue(pipeline.wait(30))
+        self.assertEqual(git(self.remote, "rev-parse", "main"), git(self.repo, "rev-parse", "HEAD"))
+        self.assertEqual(pipeline.pending(), 0)
+
+    def test_push_is_coalesced_and_remote_cached(self):
+        pipeline = GitPipeline(self.repo, self.metadata_file)
+        pushes = []
+        real_git = pipeline._git
+
+        def counting_git(*args, **kwargs):
+            if args[0] in ("push", "remote", "branch"):
+                pushes.append(args[0])
+            return real_git(*args, **kwargs)
+
+        with patch.object(pipeline, "_git", side_effect=counting_git), \
+                patch.object(pipeline, "_start"):
+            # Queue several commits before the worker runs
+            for name in ("a", "b", "c"):
+                self.write(f"{name}.py", "x = 1\n")
+                pipeline.commit(f"feat: {name}")
+            pipeline._push_with_retry()
+
+        self.assertEqual(pushes.count("push"), 1)
+        self.assertEqual((pushes.count("remote"), pushes.count("branch")), (1, 1))
+        self.assertEqual(git(self.remote, "log", "--format=%s", "main").splitlines()[:3],
+                         ["feat: c", "feat: b", "feat: a"])
+
+    @patch('src.git_pipeline.GIT_RETRY_BACKOFF', 0.01)
+    @patch('src.git_pipeline.GIT_PUSH_RETRIES', 2)
+    def test_failed_push_stays_queued_across_restarts(self):
+        git(self.repo, "remote", "set-url", "origin", os.path.join(self.tmp, "missing.git"))
+        pipeline = GitPipeline(self.repo, self.metadata_file)
+        self.write("a.py", "a = 1\n")
+        pipeline.commit("feat: a")
+
+        self.assertFalse(pipeline.wait(30))
+        self.assertEqual(pipeline.pending(), 1)
+
+        # A later process finds the pending push in the queue file and completes it
+        git(self.repo, "remote", "set-url", "origin", self.remote)
+        restarted = GitPipeline(self.repo, self.metadata_file)
+        restarted.resume()
+        self.assertTrue(restarted.wait(30))
+        self.assertEqual(git(self.remote, "log", "-1", "--format=%s", "main"), "feat: a")
+
+    def test_commit_holds_only_its_runs_changes(self):
+        pipeline = GitPipeline(self.repo, self.metadata_file)
+        lock = get_project_lock(self.repo)
+        waiting = threading.Event()
+
+        def next_run():
+            waiting.set()
+            with lock.hold(purpose="run: story1"):
+                self.write("story1.py", "b = 1\n")
+                pipeline.commit("feat: story1")
+
+        with lock.hold(purpose="run: story0"):
+            self.write("story0.py", "a = 1\n")
+            queued = threading.Thread(target=next_run)
+            queued.start()
+            waiting.wait(5)
+            pipeline.commit("feat: story0")
+        queued.join(30)
+        self.assertTrue(pipeline.wait(30))
+
+        def files(rev):
+            return git(self.repo, "show", "--name-only", "--format=%s", rev).split()
+
+        self.assertEqual(files("HEAD~1"), ["feat:", "story0", "project_metadata.json", "story0.py"])
+        self.assertEqual(files("HEAD"), ["feat:", "story1", "project_metadata.json", "story1.py"])
+
+
+if __name__ == '__main__':
+    unittest.main()
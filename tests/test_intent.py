@@ -0,0 +1,40 @@
+import unittest
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.intent import classify_heuristic, normalize_intent, INTENT_CONFIDENCE
+
+class TestIntentHeuristic(unittest.TestCase):
+    def assertConfident(self, text, intent):
+        decision = classify_heuristic(text)
+        self.assertEqual(decision.intent, intent, text)
+        self.assertGreaterEqual(decision.confidence, INTENT_CONFIDENCE, text)
+        self.assertEqual(decision.source, "heuristic")
+
+    def test_obvious_tasks(self):
+        for text in ["Add a new button", "fix the failing tests", "Please create a CSV exporter",
+                     "Can you implement pagination?", "Refactor auth.py to use classes"]:
+            self.assertConfident(text, "TASK")
+
+    def test_obvious_chat(self):
+        for text in ["How are you?", "What does main.py do?", "Explain the auth flow",
+                     "hello", "thanks!", "Is the API documented?"]:
+            self.assertConfident(text, "CHAT")
+
+    def test_uncertain_inputs_defer_to_llm(self):
+        for text in ["The login page looks broken", "I think we need dark mode", ""]:
+            self.assertLess(classify_heuristic(text).confidence, INTENT_CONFIDENCE, text)
+
+class TestNormalizeIntent(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_intent("CHAT"), "CHAT")
+        self.assertEqual(normalize_intent(" task."), "TASK")
+        self.assertEqual(normalize_intent("The answer is: Chat"), "CHAT")
+        self.assertEqual(normalize_intent("<think>CHAT or TASK?</think>\nTASK"), "TASK")
+        self.assertIsNone(normalize_intent("I am not sure"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import threading
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.jobs import JobManager, JobCancelled
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1)
+
+    def tearDown(self):
+        self.manager.shutdown(wait=True)
+
+    def test_submit_returns_immediately_and_succeeds(self):
+        release = threading.Event()
+
+        def work(job):
+            release.wait(5)
+            return "done"
+
+        job = self.manager.submit("proj", "run", "story", work)
+        self.assertIn(job.status, ("queued", "running"))
+
+        release.set()
+        job.future.result(timeout=5)
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.result, "done")
+        self.assertIs(self.manager.get(job.id), job)
+
+    def test_failure_is_recorded(self):
+        def work(job):
+            raise RuntimeError("Boom")
+
+        job = self.manager.submit("proj", "run", "story", work)
+        job.future.result(timeout=5)
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "Boom")
+
+    def test_progress_is_reported(self):
+        def work(job):
+            job.update_progress({"stage": "plan", "step": 1, "total": 6})
+            job.update_progress({"stage": "plan"})  # a repeated report adds no event
+            return "ok"
+
+        job = self.manager.submit("proj", "run", "story", work)
+        job.future.result(timeout=5)
+        self.assertEqual(job.progress["stage"], "plan")
+        self.assertEqual(job.progress["total"], 6)
+        self.assertEqual(len([e for e in job.events.read() if e["type"] == "progress"]), 1)
+
+    def test_cancel_queued_job(self):
+        release = threading.Event()
+        blocker = self.manager.submit("proj", "run", "first", lambda job: release.wait(5))
+        queued = self.manager.submit("proj", "run", "second", lambda job: "never")
+
+        self.manager.cancel(queued.id)
+        release.set()
+        blocker.future.result(timeout=5)
+
+        self.assertEqual(queued.status, "cancelled")
+        self.assertIsNone(queued.result)
+
+    def test_cancel_running_job_at_next_progress_report(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(job):
+            started.set()
+            release.wait(5)
+            job.update_progress({"stage": "develop"})
+            return "unreachable"
+
+        job = self.manager.submit("proj", "run", "story", work)
+        started.wait(5)
+        self.manager.cancel(job.id)
+        self.assertEqual(job.status, "cancelling")
+
+        release.set()
+        job.future.result(timeout=5)
+        self.assertEqual(job.status, "cancelled")
+
+    def test_update_progress_raises_when_cancelled(self):
+        job = self.manager.submit("proj", "run", "story", lambda job: "ok")
+        job.future.result(timeout=5)
+        job.request_cancel()
+        with self.assertRaises(JobCancelled):
+            job.update_progress({"stage": "plan"})
+
+    def test_list_filters_by_project(self):
+        a = self.manager.submit("a", "run", "story", lambda job: "ok")
+        b = self.manager.submit("b", "run", "story", lambda job: "ok")
+        a.future.result(timeout=5)
+        b.future.result(timeout=5)
+        self.assertEqual([j.id for j in self.manager.list("a")], [a.id])
+        self.assertEqual(len(self.manager.list()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
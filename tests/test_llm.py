@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import MagicMock
+import tempfile
+import shutil
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crewai.llms.base_llm import call_stop_override
+from src.llm import RoleLLM
+from src.llm_cache import ResponseCache
+
+class TestRoleLLM(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(directory=self.dir, roles="classifier")
+        self.delegate = MagicMock(model="qwen3:8b", temperature=None, top_p=None, max_tokens=None,
+                                  seed=None, presence_penalty=None, frequency_penalty=None)
+        self.delegate.call.return_value = "TASK"
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_cached_role_replays_response(self):
+        llm = RoleLLM(self.delegate, role="classifier", cache=self.cache)
+        messages = [{"role": "user", "content": "Add a button"}]
+
+        self.assertEqual(llm.call(messages), "TASK")
+        self.assertEqual(llm.call(messages), "TASK")
+
+        self.delegate.call.assert_called_once()
+        self.assertEqual(self.cache.stats()["hits"], {"classifier": 1})
+
+    def test_uncached_role_always_calls_delegate(self):
+        llm = RoleLLM(self.delegate, role="runner", cache=self.cache)
+        llm.call("Run tests")
+        llm.call("Run tests")
+        self.assertEqual(self.delegate.call.call_count, 2)
+
+    def test_tool_call_results_are_not_cached(self):
+        self.delegate.call.return_value = {"tool": "call"}
+        llm = RoleLLM(self.delegate, role="classifier", cache=self.cache)
+        llm.call("Hi")
+        llm.call("Hi")
+        self.assertEqual(self.delegate.call.call_count, 2)
+
+    def test_stop_words_are_forwarded(self):
+        llm = RoleLLM(self.delegate, role="developer")
+
+        with call_stop_override(llm, ["\nObservation:"]):
+            self.assertEqual(llm.sampling_params()["stop"], ["\nObservation:"])
+            llm.call("Write code")
+        self.delegate.call.assert_called_once()
+
+    def test_capabilities_delegate(self):
+        self.delegate.supports_function_calling.return_value = True
+        self.delegate.get_context_window_size.return_value = 32768
+        llm = RoleLLM(self.delegate, role="developer")
+        self.assertTrue(llm.supports_function_calling())
+        self.assertEqual(llm.get_context_window_size(), 32768)
+
+if __name__ == '__main__':
+    unittest.main()
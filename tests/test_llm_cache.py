@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import shutil
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(directory=self.dir, max_bytes=10 * 1024, ttl=60, roles="classifier,pm_chat")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_key_is_content_addressed(self):
+        messages = [{"role": "user", "content": "Hi"}]
+        key = ResponseCache.make_key("qwen3:8b", messages, {"temperature": 0.1})
+
+        self.assertEqual(key, ResponseCache.make_key("qwen3:8b", list(messages), {"temperature": 0.1}))
+        self.assertNotEqual(key, ResponseCache.make_key("qwen3:14b", messages, {"temperature": 0.1}))
+        self.assertNotEqual(key, ResponseCache.make_key("qwen3:8b", messages, {"temperature": 0.7}))
+
+    def test_put_get_and_counters(self):
+        self.assertIsNone(self.cache.get("abc123", "classifier"))
+        self.cache.put("abc123", "TASK", "classifier")
+        self.assertEqual(self.cache.get("abc123", "classifier"), "TASK")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], {"classifier": 1})
+        self.assertEqual(stats["misses"], {"classifier": 1})
+
+    def test_roles(self):
+        self.assertTrue(self.cache.enabled_for("classifier"))
+        self.assertFalse(self.cache.enabled_for("runner"))
+        self.assertTrue(ResponseCache(directory=self.dir, roles="*").enabled_for("runner"))
+
+    def test_expired_entries_miss(self):
+        with patch('src.llm_cache.time.time', return_value=1000.0):
+            self.cache.put("abc123", "TASK")
+        with patch('src.llm_cache.time.time', return_value=1100.0):
+            self.assertIsNone(self.cache.get("abc123"))
+        self.assertFalse(os.path.exists(self.cache._path("abc123")))
+
+    def test_size_eviction_drops_least_recently_used(self):
+        self.cache.ttl = 0
+        for i in range(30):
+            key = f"{i:04d}" + "0" * 60
+            self.cache.put(key, "x" * 500)
+            os.utime(self.cache._path(key), (i, 1_000_000_000 + i))
+
+        self.cache.evict()
+
+        self.assertLessEqual(self.cache.stats()["bytes"], 10 * 1024)
+        self.assertFalse(os.path.exists(self.cache._path("0000" + "0" * 60)))
+        self.assertTrue(os.path.exists(self.cache._path("0029" + "0" * 60)))
+
+if __name__ == '__main__':
+    unittest.main()
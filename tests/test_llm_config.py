@@ -0,0 +1,82 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_config import ModelConfig, ROLES, parse_role_tiers
+
+
+class TestModelConfig(unittest.TestCase):
+    def make(self, **kwargs):
+        return ModelConfig(default_model="openai/qwen3:8b", default_endpoints=["http://gpu1/v1"], **kwargs)
+
+    def test_light_roles_default_to_the_fast_tier(self):
+        config = self.make()
+        classifier = config.for_role("classifier")
+        developer = config.for_role("developer")
+
+        self.assertEqual(classifier.tier, "fast")
+        self.assertEqual(classifier.sampling, {"temperature": 0.0})
+        self.assertEqual(developer.tier, "main")
+        self.assertEqual(developer.sampling, {})
+        self.assertEqual(developer.model, "openai/qwen3:8b")
+        self.assertEqual(developer.endpoints, ["http://gpu1/v1"])
+        self.assertNotEqual(classifier.key(), developer.key())
+
+    def test_file_tiers_and_role_overrides(self):
+        config = self.make(
+            tiers={"fast": {"model": "openai/qwen3:1.7b", "endpoints": "http://small/v1"},
+                   "big": {"model": "openai/qwen3:32b", "max_tokens": 4096}},
+            roles={"developer": {"tier": "big", "temperature": 0.2}, "reviewer": "big"}
+        )
+
+        fast = config.for_role("docs")
+        self.assertEqual((fast.model, fast.endpoints), ("openai/qwen3:1.7b", ["http://small/v1"]))
+        self.assertEqual(fast.sampling, {"temperature": 0.0})
+
+        developer = config.for_role("developer")
+        self.assertEqual(developer.model, "openai/qwen3:32b")
+        self.assertEqual(developer.sampling, {"max_tokens": 4096, "temperature": 0.2})
+        self.assertEqual(config.for_role("reviewer").sampling, {"max_tokens": 4096})
+        # Roles with the same settings share clients
+        self.assertEqual(config.for_role("qa").key(), config.for_tier("main").key())
+
+    def test_star_reassigns_every_role(self):
+        config = self.make()
+        config.assign(parse_role_tiers("*=main, docs=fast"))
+        self.assertEqual({r for r in ROLES if config.for_role(r).tier == "fast"}, {"docs"})
+
+    def test_invalid_settings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.make(roles={"developer": "huge"})
+        with self.assertRaises(ValueError):
+            self.make(tiers={"fast": {"temprature": 0}})
+        with self.assertRaises(ValueError):
+            parse_role_tiers("developer")
+
+    def test_load_from_file_then_env(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "llm_models.json")
+        with open(path, "w") as f:
+            json.dump({"tiers": {"fast": {"model": "openai/qwen3:1.7b"}}, "roles": {"qa": "fast"}}, f)
+
+        config = ModelConfig.load(path, role_tiers="classifier=main")
+
+        self.assertEqual(config.for_role("qa").model, "openai/qwen3:1.7b")
+        self.assertEqual(config.for_role("classifier").tier, "main")
+        self.assertEqual(ModelConfig.load(os.path.join(directory, "missing.json"), "").for_role("qa").tier, "main")
+
+        with open(path, "w") as f:
+            f.write("{not json")
+        with self.assertRaises(ValueError):
+            ModelConfig.load(path, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import threading
+import time
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crewai import LLM
+from src.llm import RoleLLM
+from src.llm_pool import Backend, FairLimiter
+from src.metrics import MetricsRegistry
+
+
+class TestFairLimiter(unittest.TestCase):
+    def test_slots_are_handed_out_round_robin_between_projects(self):
+        limiter = FairLimiter(1)
+        limiter.acquire("a")
+        order = []
+
+        def waiter(key, label):
+            limiter.acquire(key)
+            order.append(label)
+            limiter.release()
+
+        threads = []
+        # Project a queues three calls before project b queues one
+        for key, label in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")):
+            thread = threading.Thread(target=waiter, args=(key, label))
+            thread.start()
+            threads.append(thread)
+            while limiter.queued < len(threads):
+                time.sleep(0.001)
+
+        limiter.release()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, ["a1", "b1", "a2", "a3"])
+        self.assertEqual(limiter.inflight, 0)
+
+    def test_limit_and_timeout(self):
+        limiter = FairLimiter(2)
+        self.assertEqual(limiter.acquire("a"), 0.0)
+        self.assertEqual(limiter.acquire("b"), 0.0)
+        with self.assertRaises(TimeoutError):
+            limiter.acquire("c", timeout=0.05)
+        self.assertEqual(limiter.queued, 0)
+
+        limiter.release()
+        self.assertEqual(limiter.acquire("c", timeout=0.05), 0.0)
+
+    def test_zero_means_unlimited(self):
+        limiter = FairLimiter(0)
+        for _ in range(100):
+            limiter.acquire()
+        self.assertEqual(limiter.queued, 0)
+
+
+class TestBackend(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        patcher = patch('src.llm_pool.get_metrics', return_value=self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_llms_share_one_connection_pool(self):
+        backend = Backend("http://127.0.0.1:9/v1")
+        self.addCleanup(backend.close)
+        first = backend.attach(LLM(model="openai/qwen3:8b", base_url=backend.base_url, api_key="k"))
+        second = backend.attach(LLM(model="openai/other", base_url=backend.base_url, api_key="k"))
+
+        self.assertIs(first._get_sync_client()._client, backend.http_client)
+        self.assertIs(second._get_sync_client()._client, backend.http_client)
+
+    def test_role_llm_waits_for_a_slot_and_records_the_wait(self):
+        backend = Backend("http://ollama:11434/v1", max_inflight=1)
+        delegate = MagicMock(model="qwen3:8b")
+        delegate.call.return_value = "ok"
+        llm = RoleLLM(delegate, role="developer", backend=backend, project="shop")
+
+        backend.acquire("other")
+        thread = threading.Thread(target=llm.call, args=("Write code",))
+        thread.start()
+        while backend.limiter.queued == 0:
+            time.sleep(0.001)
+        self.assertEqual(self.metrics.llm_queued.value("ollama:11434"), 1)
+        time.sleep(0.05)
+        backend.release()
+        thread.join(5)
+
+        delegate.call.assert_called_once()
+        self.assertEqual(self.metrics.llm_queue_wait.count("ollama:11434", "shop"), 1)
+        self.assertGreaterEqual(self.metrics.llm_queue_wait._values[("ollama:11434", "shop")][-2], 0.05)
+        self.assertEqual(self.metrics.llm_inflight.value("ollama:11434"), 0)
+        self.assertEqual(backend.limiter.inflight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
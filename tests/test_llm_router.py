@@ -0,0 +1,160 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm import RoleLLM
+from src.llm_pool import Backend
+from src.llm_router import EndpointPool, LLMRouter, current_session, parse_endpoints, routing_session
+from src.metrics import MetricsRegistry
+
+
+class TestRouterHelpers(unittest.TestCase):
+    def test_parse_endpoints(self):
+        self.assertEqual(
+            parse_endpoints("http://a:11434/v1/, http://b:11434/v1\nhttp://c/v1"),
+            ["http://a:11434/v1", "http://b:11434/v1", "http://c/v1"]
+        )
+        self.assertEqual(parse_endpoints(""), [])
+
+    def test_nested_sessions_keep_the_outer_one(self):
+        self.assertIsNone(current_session())
+        with routing_session("shop") as outer:
+            self.assertTrue(outer.startswith("shop/"))
+            with routing_session("shop") as inner:
+                self.assertEqual(inner, outer)
+        self.assertIsNone(current_session())
+
+
+class RouterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        for target in ('src.llm_pool.get_metrics', 'src.llm_router.get_metrics'):
+            patcher = patch(target, return_value=self.metrics)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Fresh backends, so slot counts do not leak between tests
+        self.backends = {}
+        patcher = patch('src.llm_router.get_backend', side_effect=self._backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _backend(self, url):
+        if url not in self.backends:
+            self.backends[url] = Backend(url, max_inflight=2)
+            self.addCleanup(self.backends[url].close)
+        return self.backends[url]
+
+
+class TestEndpointPool(RouterTestCase):
+    def test_routes_to_the_faster_endpoint_and_sticks_per_session(self):
+        pool = EndpointPool(["http://a/v1", "http://b/v1"])
+        fast, slow = pool.endpoints[1], pool.endpoints[0]
+        pool.report_success(slow, 1.5)
+        pool.report_success(fast, 1.0)
+        self.assertIs(pool.route("run-1"), fast)
+
+        # Busy enough to lose new work, but the run stays where its prompts are cached
+        for _ in range(2):
+            fast.backend.limiter.acquire()
+        self.assertIs(pool.route("run-2"), slow)
+        self.assertIs(pool.route("run-1"), fast)
+
+    def test_sticky_session_moves_when_its_queue_is_too_long(self):
+        pool = EndpointPool(["http://a/v1", "http://b/v1"])
+        first = pool.route("run-1")
+        with patch('src.llm_router.LLM_STICKY_SLACK', 1), \
+                patch.object(type(first.backend.limiter), 'queued', property(lambda limiter: 3 if limiter is first.backend.limiter else 0)):
+            self.assertIsNot(pool.route("run-1"), first)
+
+    def test_failed_endpoint_is_skipped_until_it_recovers(self):
+        pool = EndpointPool(["http://a/v1", "http://b/v1"])
+        broken, other = pool.endpoints
+        pool.report_failure(broken, ConnectionError("refused"))
+        self.assertEqual(self.metrics.llm_endpoint_up.value("a"), 0)
+        self.assertTrue(all(pool.route() is other for _ in range(5)))
+
+        pool.report_failure(other, ConnectionError("refused"))
+        # With everything down, the endpoint that failed first is retried
+        self.assertIs(pool.route(), broken)
+
+        pool.report_success(broken, 0.5)
+        self.assertEqual(self.metrics.llm_endpoint_up.value("a"), 1)
+        self.assertIs(pool.route(), broken)
+
+    def test_health_check_marks_endpoints(self):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200 if self.path == "/v1/models" else 404)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        pool = EndpointPool([f"http://127.0.0.1:{server.server_address[1]}/v1", "http://127.0.0.1:9/v1"])
+        up, down = pool.endpoints
+        pool.report_failure(up, ConnectionError("refused"))
+        pool.check_health()
+
+        self.assertTrue(up.available(0) and up.failures == 0)
+        self.assertEqual(down.failures, 1)
+        self.assertEqual(self.metrics.llm_endpoint_up.value("127.0.0.1:9"), 0)
+
+
+class TestLLMRouter(RouterTestCase):
+    def make_router(self, *replies):
+        pool = EndpointPool([f"http://h{i}/v1" for i in range(len(replies))])
+        clients = {}
+        for i, reply in enumerate(replies):
+            client = MagicMock(model="qwen3:8b")
+            client.call.side_effect = [reply]
+            clients[f"http://h{i}/v1"] = client
+        router = LLMRouter(pool, make_client=lambda url: clients[url])
+        return router, clients
+
+    def test_fails_over_to_the_next_endpoint(self):
+        router, clients = self.make_router(ConnectionError("refused"), "ok")
+        with patch.object(router.pool, 'route', side_effect=lambda session, exclude=(): [
+            e for e in router.pool.endpoints if e not in exclude][0]):
+            llm = RoleLLM(router.primary, role="developer", project="shop", router=router)
+            self.assertEqual(llm.call("Write code"), "ok")
+
+        clients["http://h0/v1"].call.assert_called_once()
+        clients["http://h1/v1"].call.assert_called_once()
+        self.assertFalse(router.pool.endpoints[0].available(0))
+        self.assertEqual(self.metrics.llm_failovers.value("h0"), 1)
+        self.assertEqual(self.metrics.llm_queue_wait.count("h1", "shop"), 1)
+        self.assertEqual(self.backends["http://h0/v1"].limiter.inflight, 0)
+
+    def test_request_errors_are_not_retried(self):
+        router, clients = self.make_router(ValueError("bad prompt"), "ok")
+        llm = RoleLLM(router.primary, role="developer", router=router)
+
+        with self.assertRaises(ValueError):
+            llm.call("Write code")
+        self.assertEqual(sum(c.call.call_count for c in clients.values()), 1)
+        self.assertTrue(all(e.failures == 0 for e in router.pool.endpoints))
+
+    def test_gives_up_after_every_endpoint_failed(self):
+        router, _ = self.make_router(ConnectionError("refused"), ConnectionError("refused"))
+        llm = RoleLLM(router.primary, role="developer", router=router)
+
+        with self.assertRaises(ConnectionError):
+            llm.call("Write code")
+        self.assertTrue(all(e.failures == 1 for e in router.pool.endpoints))
+
+
+if __name__ == '__main__':
+    unittest.main()
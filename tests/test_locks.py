@@ -0,0 +1,117 @@
+import unittest
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+# Add root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from src.locks import ProjectBusy, ProjectLock, get_project_lock
+
+HOLD_LOCK = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from src.locks import get_project_lock
+with get_project_lock(sys.argv[2]).hold(purpose="run: Other task"):
+    print("locked", flush=True)
+    sys.stdin.readline()
+"""
+
+
+class TestProjectLock(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.lock = ProjectLock(self.directory)
+
+    def try_in_thread(self, timeout=0):
+        outcome = {}
+
+        def attempt():
+            try:
+                with self.lock.hold(timeout, purpose="other", on_wait=lambda holder: outcome.setdefault("waited", holder)):
+                    outcome["acquired"] = True
+            except ProjectBusy as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=attempt)
+        thread.start()
+        thread.join()
+        return outcome
+
+    def test_other_threads_are_rejected_while_held(self):
+        with self.lock.hold(purpose="run: Add a cart"):
+            with self.lock.hold(purpose="nested"):  # re-entrant for the holder
+                pass
+            outcome = self.try_in_thread(timeout=0.1)
+
+        self.assertNotIn("acquired", outcome)
+        self.assertEqual(outcome["waited"]["purpose"], "run: Add a cart")
+        self.assertEqual(outcome["error"].holder["pid"], os.getpid())
+        self.assertIn("is busy (run: Add a cart since", str(outcome["error"]))
+
+        self.assertTrue(self.try_in_thread()["acquired"])
+        self.assertIsNone(self.lock.holder())
+
+    def test_poll_can_stop_the_wait(self):
+        polls = []
+
+        def on_poll():
+            polls.append(1)
+            if len(polls) == 2:
+                raise KeyboardInterrupt("cancelled")
+
+        outcome = {}
+
+        def attempt():
+            try:
+                self.lock.acquire(timeout=None, on_poll=on_poll)
+                outcome["acquired"] = True
+            except KeyboardInterrupt as e:
+                outcome["error"] = e
+
+        with self.lock.hold(purpose="run: Add a cart"):
+            thread = threading.Thread(target=attempt)
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual((len(polls), str(outcome["error"])), (2, "cancelled"))
+        self.assertNotIn("acquired", outcome)
+        self.assertTrue(self.try_in_thread()["acquired"])
+
+    def test_lock_file_is_kept_out_of_commits(self):
+        with self.lock.hold():
+            pass
+        with open(os.path.join(self.directory, ".runs", ".gitignore")) as f:
+            self.assertEqual(f.read(), "*\n")
+
+    def test_lock_is_shared_across_processes(self):
+        child = subprocess.Popen(
+            [sys.executable, "-c", HOLD_LOCK, ROOT, self.directory],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        self.addCleanup(child.wait)
+        try:
+            self.assertEqual(child.stdout.readline().strip(), "locked")
+            with self.assertRaises(ProjectBusy) as busy:
+                self.lock.acquire(timeout=0.3)
+            self.assertEqual(busy.exception.holder["pid"], child.pid)
+        finally:
+            child.stdin.write("\n")
+            child.stdin.close()
+
+        child.wait(timeout=10)
+        with self.lock.hold(timeout=5):
+            self.assertEqual(self.lock.holder()["pid"], os.getpid())
+
+    def test_one_lock_per_directory_in_a_process(self):
+        self.assertIs(get_project_lock(self.directory), get_project_lock(os.path.join(self.directory, ".")))
+
+
+if __name__ == '__main__':
+    unittest.main()
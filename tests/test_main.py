@@ -1,4 +1,5 @@
 import unittest
+import io
 from unittest.mock import patch, MagicMock
 import os
 import sys
@@ -54,5 +55,24 @@ class TestMain(unittest.TestCase):
         self.assertTrue(init_git)
         self.assertEqual(remote, "https://github.com/user/repo")
 
+    @patch('main.BatchRunner')
+    @patch('sys.stdin', new_callable=lambda: io.StringIO('{"project": "shop", "story": "Add a cart"}\n'))
+    def test_batch_mode_reads_stdin(self, mock_stdin, MockRunner):
+        MockRunner.return_value.run.return_value = [{"status": "approved", "seconds": 12.0}]
+        args = main.parse_args(["--batch", "-", "--results", "out.jsonl", "--parallel", "3"])
+
+        with patch('builtins.print'):
+            self.assertEqual(main.run_batch(args), 0)
+
+        factory, results_path, parallel = MockRunner.call_args[0]
+        self.assertEqual((results_path, parallel), ("out.jsonl", 3))
+        items = MockRunner.return_value.run.call_args[0][0]
+        self.assertEqual([(i.project, i.story) for i in items], [("shop", "Add a cart")])
+
+    def test_batch_mode_rejects_a_bad_file(self):
+        args = main.parse_args(["--batch", os.path.join("missing", "stories.jsonl")])
+        with patch('builtins.print'):
+            self.assertEqual(main.run_batch(args), 2)
+
 if __name__ == '__main__':
     unittest.main()
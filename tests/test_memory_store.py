@@ -0,0 +1,77 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.memory_store import MemoryStore, BM25Index, tokenize
+from src.tokens import count_tokens
+
+def feature(title, body):
+    return f"\n## Implemented Feature: {title}\n\n**Result Summary:**\n{body}\n\n---\n"
+
+class TestMemoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.memory_file = os.path.join(self.tmp, "memory.md")
+        with open(self.memory_file, 'w', encoding='utf-8') as f:
+            f.write(feature("Add user login", "APPROVED. Login form with password hashing in auth.py."))
+            f.write(feature("Add CSV export", "APPROVED. export.py writes reports as CSV files."))
+            f.write(feature("Dark mode toggle", "APPROVED. Theme switch stored in settings.json."))
+        self.store = MemoryStore(self.memory_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_parses_entries(self):
+        entries = self.store.load()
+        self.assertEqual([e.title for e in entries], ["Add user login", "Add CSV export", "Dark mode toggle"])
+        self.assertIn("password hashing", entries[0].body)
+        self.assertFalse(entries[0].body.endswith("---"))
+
+    def test_search_ranks_relevant_entry_first(self):
+        results = self.store.search("fix the login password check")
+        self.assertEqual(results[0].title, "Add user login")
+
+    def test_build_context_includes_summary_and_relevant_entries(self):
+        context = self.store.build_context("export reports to CSV")
+
+        self.assertIn("Implemented features (3)", context)
+        self.assertIn("- Add user login", context)
+        self.assertIn("export.py writes reports", context)
+        # Latest feature is included as well when there is room
+        self.assertIn("settings.json", context)
+        self.assertNotIn("password hashing", context)
+
+    def test_build_context_respects_budget(self):
+        with open(self.memory_file, 'a', encoding='utf-8') as f:
+            for i in range(200):
+                f.write(feature(f"Feature {i}", "lorem ipsum dolor sit amet " * 50))
+
+        context = self.store.build_context("Feature 42", token_budget=400)
+
+        self.assertLessEqual(count_tokens(context), 440)
+        self.assertIn("Implemented features (203)", context)
+        self.assertIn("earlier features", context)
+
+    def test_reloads_when_file_changes(self):
+        self.assertEqual(len(self.store.load()), 3)
+        with open(self.memory_file, 'a', encoding='utf-8') as f:
+            f.write(feature("Search page", "APPROVED."))
+        self.assertEqual(len(self.store.load()), 4)
+
+    def test_missing_file(self):
+        store = MemoryStore(os.path.join(self.tmp, "missing.md"))
+        self.assertEqual(store.build_context("anything"), "")
+
+class TestBM25(unittest.TestCase):
+    def test_rare_terms_weigh_more(self):
+        docs = [tokenize("login page"), tokenize("login api"), tokenize("billing api")]
+        scores = BM25Index(docs).scores(tokenize("billing login"))
+        self.assertGreater(scores[2], scores[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock
+import datetime
+import os
+import sys
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import MetricsRegistry, format_run_summary
+
+
+def at(seconds):
+    return datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(seconds=seconds)
+
+
+def llm_event(call_id, task_id, timestamp, usage=None):
+    return SimpleNamespace(call_id=call_id, task_id=task_id, agent_role="Senior Developer",
+                           timestamp=timestamp, usage=usage)
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.run = self.registry.start_run("proj")
+        self.task = MagicMock(id="task-1", start_time=at(0), end_time=at(12))
+        self.task.agent.role = "Senior Developer"
+        self.run.track(self.task, "develop")
+
+    def test_llm_and_tool_events_are_attributed_to_the_task(self):
+        self.registry.on_llm_started(llm_event("c1", None, at(1)))
+        self.registry.on_llm_chunk(llm_event("c1", None, at(1.5)))
+        self.registry.on_llm_chunk(llm_event("c1", None, at(2)))
+        self.registry.on_llm_completed(llm_event("c1", "task-1", at(3), {"prompt_tokens": 100, "completion_tokens": 20}))
+        self.registry.on_tool_finished(SimpleNamespace(
+            task_id="task-1", tool_name="Syntax Checker", started_at=at(4), finished_at=at(4.5)
+        ))
+
+        summary = self.run.finish("approved")
+        task = summary["tasks"][0]
+
+        self.assertEqual((task["stage"], task["iteration"], task["seconds"]), ("develop", 0, 12.0))
+        self.assertEqual((task["llm_calls"], task["llm_seconds"], task["ttft_seconds"]), (1, 2.0, 0.5))
+        self.assertEqual((task["prompt_tokens"], task["completion_tokens"], task["tool_calls"]), (100, 20, 1))
+        self.assertEqual(summary["totals"]["prompt_tokens"], 100)
+        self.assertIn("develop", format_run_summary(summary))
+
+    def test_prometheus_output(self):
+        self.registry.on_llm_started(llm_event("c1", None, at(0)))
+        self.registry.on_llm_completed(llm_event("c1", "task-1", at(2), {"input_tokens": 7, "output_tokens": 3}))
+        self.registry.on_llm_started(llm_event("c2", None, at(0)))
+        self.registry.on_llm_completed(llm_event("c2", "unknown-task", at(1)))
+        self.run.finish("rejected")
+
+        text = self.registry.render()
+
+        self.assertIn('agent_orchestrator_llm_tokens_total{stage="develop",role="Senior Developer",kind="prompt"} 7', text)
+        self.assertIn('agent_orchestrator_llm_calls_total{stage="other",role="Senior Developer",status="ok"} 1', text)
+        # Non-streamed calls: the first token arrives with the response
+        self.assertIn(
+            'agent_orchestrator_llm_time_to_first_token_seconds_sum{stage="develop",role="Senior Developer"} 2.000000',
+            text
+        )
+        self.assertIn('agent_orchestrator_task_seconds_bucket{stage="develop",role="Senior Developer",le="30"} 1', text)
+        self.assertIn('agent_orchestrator_runs_total{status="rejected"} 1', text)
+
+    def test_fix_iterations_are_counted(self):
+        fix_task = MagicMock(id="task-2", start_time=None, end_time=None)
+        self.run.track(fix_task, "fix", iteration=2)
+
+        summary = self.run.finish("approved")
+
+        self.assertEqual(summary["iterations"], 2)
+        self.assertEqual(summary["tasks"][1]["seconds"], None)
+        self.assertEqual(self.registry.fix_iterations.value(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.patching import PatchError, apply_hunks, apply_patches, is_unified_diff, parse_patches
+from src.pytest_output import failed_test_ids
+
+ORIGINAL = "import os\n\n\ndef add(a, b):\n    return a - b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+
+class TestPatching(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.write("calc.py", ORIGINAL)
+
+    def write(self, path, content):
+        with open(os.path.join(self.root, path), 'w') as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(os.path.join(self.root, path)) as f:
+            return f.read()
+
+    def test_parse_and_apply(self):
+        text = (
+            "Here is the fix:\n```diff\n--- a/calc.py\n+++ b/calc.py\n"
+            "@@ -3,4 +3,4 @@\n \n def add(a, b):\n-    return a - b\n+    return a + b\n \n```\n"
+        )
+        patches = parse_patches(text)
+        self.assertEqual([p.path for p in patches], ["calc.py"])
+
+        self.assertEqual(apply_patches(patches, self.root), ["calc.py"])
+        self.assertEqual(self.read("calc.py"), ORIGINAL.replace("return a - b", "return a + b", 1))
+
+    def test_wrong_line_numbers_are_located_by_context(self):
+        text = "--- a/calc.py\n+++ b/calc.py\n@@ -40,3 +40,3 @@\n def sub(a, b):\n-    return a - b\n+    return b - a\n"
+        apply_patches(parse_patches(text), self.root)
+        self.assertTrue(self.read("calc.py").endswith("def sub(a, b):\n    return b - a\n"))
+
+    def test_hunk_without_line_numbers(self):
+        text = "--- calc.py\n+++ calc.py\n@@ ... @@\n-import os\n+import sys\n"
+        apply_patches(parse_patches(text), self.root)
+        self.assertTrue(self.read("calc.py").startswith("import sys\n"))
+
+    def test_new_and_deleted_files(self):
+        self.write("old.py", "x = 1\n")
+        text = (
+            "--- /dev/null\n+++ b/pkg/new.py\n@@ -0,0 +1,2 @@\n+a = 1\n+b = 2\n"
+            "--- a/old.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-x = 1\n"
+        )
+        changed = apply_patches(parse_patches(text), self.root)
+        self.assertEqual(changed, ["pkg/new.py", "old.py"])
+        self.assertEqual(self.read("pkg/new.py"), "a = 1\nb = 2\n")
+        self.assertFalse(os.path.exists(os.path.join(self.root, "old.py")))
+
+    def test_new_file_diff_replaces_an_existing_file(self):
+        self.write("x.py", "x = 1\n")
+        apply_patches(parse_patches("--- /dev/null\n+++ b/x.py\n@@ -0,0 +1 @@\n+x = 2\n"), self.root)
+        self.assertEqual(self.read("x.py"), "x = 2\n")
+
+    def test_deletion_must_match_the_file(self):
+        self.write("old.py", "x = 2\n")
+        with self.assertRaises(PatchError):
+            apply_patches(parse_patches("--- a/old.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-x = 1\n"), self.root)
+        with self.assertRaises(PatchError):
+            apply_patches(parse_patches("--- a/calc.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-import os\n"), self.root)
+        self.assertEqual(self.read("old.py"), "x = 2\n")
+        self.assertEqual(self.read("calc.py"), ORIGINAL)
+
+    def test_all_or_nothing(self):
+        self.write("other.py", "y = 1\n")
+        text = (
+            "--- a/other.py\n+++ b/other.py\n@@ -1 +1 @@\n-y = 1\n+y = 2\n"
+            "--- a/calc.py\n+++ b/calc.py\n@@ -1 +1 @@\n-import missing\n+import sys\n"
+        )
+        with self.assertRaises(PatchError):
+            apply_patches(parse_patches(text), self.root)
+        self.assertEqual(self.read("other.py"), "y = 1\n")
+        self.assertEqual(self.read("calc.py"), ORIGINAL)
+
+    def test_missing_file_and_escaping_path(self):
+        with self.assertRaises(PatchError):
+            apply_patches(parse_patches("--- a/nope.py\n+++ b/nope.py\n@@ -1 +1 @@\n-a\n+b\n"), self.root)
+        with self.assertRaises(ValueError):
+            apply_patches(parse_patches("--- /dev/null\n+++ b/../x.py\n@@ -0,0 +1 @@\n+a\n"), self.root)
+
+    def test_apply_hunks_multiple_in_order(self):
+        text = (
+            "--- a/calc.py\n+++ b/calc.py\n"
+            "@@ -1,2 +1,2 @@\n-import os\n+import sys\n \n"
+            "@@ -8,2 +8,2 @@\n def sub(a, b):\n-    return a - b\n+    return a - b  # ok\n"
+        )
+        patch = parse_patches(text)[0]
+        result = apply_hunks(ORIGINAL, patch.hunks)
+        self.assertTrue(result.startswith("import sys\n"))
+        self.assertIn("return a - b  # ok", result)
+        self.assertIn("def add(a, b):\n    return a - b\n", result)
+
+    def test_is_unified_diff(self):
+        self.assertTrue(is_unified_diff("--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b"))
+        self.assertFalse(is_unified_diff("print('--- not a diff')\n"))
+
+    def test_failed_test_ids(self):
+        output = (
+            "=== short test summary info ===\n"
+            "FAILED tests/test_calc.py::test_add - assert -1 == 3\n"
+            "FAILED tests/test_calc.py::TestSub::test_neg\n"
+            "ERROR tests/test_io.py\n"
+            "FAILED tests/test_calc.py::test_add - assert -1 == 3\n"
+            "=== 2 failed, 1 error in 0.10s ===\n"
+        )
+        self.assertEqual(failed_test_ids(output), [
+            "tests/test_calc.py::test_add",
+            "tests/test_calc.py::TestSub::test_neg",
+            "tests/test_io.py"
+        ])
+        self.assertEqual(failed_test_ids("=== 3 passed ==="), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
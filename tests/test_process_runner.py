@@ -0,0 +1,101 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.process_runner import CappedBuffer, run_command
+
+
+class TestCappedBuffer(unittest.TestCase):
+    def test_small_output_is_kept(self):
+        buffer = CappedBuffer(limit=100)
+        buffer.write(b"hello ")
+        buffer.write(b"world")
+        self.assertEqual(buffer.text(), "hello world")
+        self.assertFalse(buffer.truncated)
+
+    def test_keeps_head_and_tail(self):
+        buffer = CappedBuffer(limit=10)
+        for i in range(100):
+            buffer.write(str(i % 10).encode() * 3)
+        text = buffer.text()
+        self.assertTrue(text.startswith("00011"))
+        self.assertTrue(text.endswith("88999"))
+        self.assertIn("[290 bytes omitted]", text)
+        self.assertTrue(buffer.truncated)
+
+    def test_no_limit(self):
+        buffer = CappedBuffer(limit=0)
+        buffer.write(b"x" * 1000)
+        self.assertEqual(len(buffer.text()), 1000)
+
+
+@unittest.skipUnless(os.name == "posix", "process groups and rlimits are POSIX-only")
+class TestRunCommand(unittest.TestCase):
+    def test_captures_output_and_exit_code(self):
+        result = run_command(f"{sys.executable} -c \"import sys; print('out'); print('err', file=sys.stderr); sys.exit(2)\"", ".")
+        self.assertEqual(result.returncode, 2)
+        self.assertEqual(result.stdout, "out\n")
+        self.assertEqual(result.stderr, "err\n")
+        self.assertFalse(result.timed_out)
+
+    def test_timeout_kills_process_group(self):
+        # The shell spawns a grandchild; both must die
+        start = time.perf_counter()
+        result = run_command("sleep 30 & sleep 30; wait", ".", timeout=0.5)
+        self.assertTrue(result.timed_out)
+        self.assertLess(time.perf_counter() - start, 10)
+
+    @unittest.skipUnless(os.name == "posix", "process groups are POSIX-only")
+    def test_timeout_kills_grandchildren_that_ignore_sigterm(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        stubborn = (
+            "import os, signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+            "open('pid', 'w').write(str(os.getpid())); time.sleep(30)"
+        )
+        result = run_command(f"{sys.executable} -c \"{stubborn}\" & sleep 30", directory, timeout=1)
+        self.assertTrue(result.timed_out)
+
+        with open(os.path.join(directory, "pid")) as f:
+            pid = int(f.read())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and _alive(pid):
+            time.sleep(0.05)
+        self.assertFalse(_alive(pid))
+
+    def test_noisy_output_is_capped(self):
+        result = run_command(f"{sys.executable} -c \"print('x' * 5000000)\"", ".", max_output=1000)
+        self.assertTrue(result.truncated)
+        self.assertLess(len(result.stdout), 1100)
+        self.assertIn("bytes omitted", result.stdout)
+
+    def test_memory_limit(self):
+        result = run_command(
+            f"{sys.executable} -c \"b = bytearray(512 * 1024 * 1024)\"", ".",
+            limits={"RLIMIT_AS": 256 * 1024 * 1024}
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("MemoryError", result.stderr)
+
+
+def _alive(pid):
+    """True if pid is running (a zombie waiting to be reaped counts as dead)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] not in ("Z", "X")
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pytest_output import condense_output, failed_test_ids, parse_pytest_failures, parse_traceback
+
+PYTEST_OUTPUT = """FF.                                                                      [100%]
+=================================== FAILURES ===================================
+___________________________________ test_add ___________________________________
+
+    def test_add():
+        print("noise " * 50)
+>       assert add(1, 2) == 3
+E       assert 2 == 3
+
+tests/test_calc.py:6: AssertionError
+----------------------------- Captured stdout call -----------------------------
+noise noise noise noise noise noise noise noise noise noise noise noise noise
+___________________________________ test_div ___________________________________
+
+    def test_div():
+>       assert div(1, 0) == 0
+
+tests/test_calc.py:8: 
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ 
+
+    def div(a, b):
+>       return a / b
+E       ZeroDivisionError: division by zero
+
+calc.py:6: ZeroDivisionError
+=========================== short test summary info ============================
+FAILED tests/test_calc.py::test_add - assert 2 == 3
+FAILED tests/test_calc.py::test_div - ZeroDivisionError: division by zero
+2 failed, 1 passed in 0.06s
+"""
+
+TRACEBACK_OUTPUT = """Traceback (most recent call last):
+  File "/usr/lib/python3/runpy.py", line 88, in _run_code
+    exec(code, run_globals)
+  File "/proj/run.py", line 2, in <module>
+    print(calc.div(1, 0))
+  File "/proj/calc.py", line 6, in div
+    return a / b
+ZeroDivisionError: division by zero
+"""
+
+
+class TestPytestOutput(unittest.TestCase):
+    def test_parse_failures_keeps_deepest_frame_and_drops_captured_output(self):
+        failures = parse_pytest_failures(PYTEST_OUTPUT)
+
+        self.assertEqual([f.name for f in failures], ["test_add", "test_div"])
+        self.assertEqual(failures[0].location, "tests/test_calc.py:6: AssertionError")
+        self.assertEqual(failures[1].location, "calc.py:6: ZeroDivisionError")
+        self.assertIn(">       return a / b", "\n".join(failures[1].render(8)))
+        self.assertNotIn("noise", "\n".join(failures[0].render(8)))
+
+    def test_condense_pytest_output(self):
+        summary = condense_output(PYTEST_OUTPUT, "")
+
+        self.assertTrue(summary.startswith("Result: 2 failed, 1 passed"))
+        self.assertIn("Failures (2):", summary)
+        self.assertIn("FAILED tests/test_calc.py::test_div", summary)
+        self.assertIn("E       ZeroDivisionError: division by zero", summary)
+        self.assertNotIn("noise", summary)
+
+    def test_condense_limits_failures_shown(self):
+        summary = condense_output(PYTEST_OUTPUT, "", max_failures=1)
+
+        self.assertIn("Not shown (1):\nFAILED tests/test_calc.py::test_div", summary)
+        self.assertNotIn("ZeroDivisionError", summary)
+
+    def test_failed_tests_can_be_read_back_from_the_summary(self):
+        expected = ["tests/test_calc.py::test_add", "tests/test_calc.py::test_div"]
+        for max_failures in (10, 1):
+            self.assertEqual(failed_test_ids(condense_output(PYTEST_OUTPUT, "", max_failures=max_failures)), expected)
+
+        # Failures without a FAILURES section (e.g. run with --tb=no)
+        summary = condense_output(PYTEST_OUTPUT[PYTEST_OUTPUT.index("FAILED "):], "")
+        self.assertEqual(failed_test_ids(summary), expected)
+
+    def test_traceback_points_at_deepest_project_frame(self):
+        self.assertEqual(parse_traceback(TRACEBACK_OUTPUT, "/proj"), [
+            "  calc.py:6 in div",
+            "    return a / b",
+            "ZeroDivisionError: division by zero"
+        ])
+
+        summary = condense_output("", TRACEBACK_OUTPUT, "/proj")
+        self.assertIn("Traceback (deepest project frame):", summary)
+        self.assertNotIn("runpy.py", summary)
+
+    def test_unrecognised_output(self):
+        self.assertIsNone(condense_output("hello\n" * 10, ""))
+
+
+if __name__ == '__main__':
+    unittest.main()
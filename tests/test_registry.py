@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import shutil
+import threading
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.registry import EngineRegistry
+
+class TestEngineRegistry(unittest.TestCase):
+    def setUp(self):
+        self.projects_dir = tempfile.mkdtemp()
+        self.factory = MagicMock(side_effect=self._build)
+
+    def tearDown(self):
+        shutil.rmtree(self.projects_dir, ignore_errors=True)
+
+    def _build(self, project_name):
+        os.makedirs(os.path.join(self.projects_dir, project_name, "code"), exist_ok=True)
+        return MagicMock(name=project_name)
+
+    def _registry(self, **kwargs):
+        return EngineRegistry(self.factory, projects_dir=self.projects_dir, **kwargs)
+
+    def test_warm_get_reuses_engine(self):
+        registry = self._registry()
+        first = registry.get("proj")
+        second = registry.get("proj")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(registry.stats()["hits"], 1)
+
+    def test_lru_eviction(self):
+        registry = self._registry(max_size=2)
+        a = registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")  # evicts "b", the least recently used
+
+        self.assertEqual(registry.stats()["projects"], ["a", "c"])
+        self.assertIs(registry.get("a"), a)
+
+    def test_idle_expiry(self):
+        registry = self._registry(idle_ttl=10)
+        with patch('src.registry.time.monotonic', return_value=100.0):
+            first = registry.get("proj")
+        with patch('src.registry.time.monotonic', return_value=200.0):
+            second = registry.get("proj")
+
+        self.assertIsNot(first, second)
+
+    def test_rebuilds_when_project_replaced_on_disk(self):
+        registry = self._registry()
+        first = registry.get("proj")
+
+        shutil.rmtree(os.path.join(self.projects_dir, "proj"))
+        second = registry.get("proj")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.factory.call_count, 2)
+
+    def test_rebuilds_when_git_initialised(self):
+        registry = self._registry()
+        first = registry.get("proj")
+        os.makedirs(os.path.join(self.projects_dir, "proj", ".git"))
+
+        self.assertIsNot(registry.get("proj"), first)
+
+    def test_put_and_invalidate(self):
+        registry = self._registry()
+        self._build("proj")
+        engine = MagicMock()
+        registry.put("proj", engine)
+        self.assertIs(registry.get("proj"), engine)
+
+        registry.invalidate("proj")
+        self.assertIsNot(registry.get("proj"), engine)
+
+    def test_slow_build_only_blocks_its_own_project(self):
+        release = threading.Event()
+
+        def build(project_name):
+            if project_name == "slow":
+                release.wait(5)
+            return self._build(project_name)
+
+        self.factory.side_effect = build
+        registry = self._registry()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("slow"))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+
+        self.assertIsNotNone(registry.get("fast"))  # not stuck behind "slow"
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(results[0], results[1])
+        self.assertEqual([c.args[0] for c in self.factory.call_args_list].count("slow"), 1)
+
+if __name__ == '__main__':
+    unittest.main()
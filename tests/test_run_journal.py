@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import shutil
+import sys
+import tempfile
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crewai.tasks.task_output import TaskOutput
+from src.engine import CrewEngine
+from src.run_journal import RunJournal
+
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.journal = RunJournal(self.directory)
+
+    def test_tasks_are_persisted_as_they_complete(self):
+        self.journal.start("Add a greeting")
+        self.journal.record_task("plan", 0, "the plan")
+        self.journal.record_task("develop", 0, "the code", {"app.py"})
+        self.journal.record_task("fix", 1, "the fix", {"app.py", "util.py"})
+
+        reloaded = RunJournal(self.directory)
+        data = reloaded.load()
+        self.assertEqual(data["user_story"], "Add a greeting")
+        self.assertEqual(data["iteration"], 1)
+        self.assertEqual(data["written_files"], ["app.py", "util.py"])
+        self.assertEqual(reloaded.outputs(0), {"plan": "the plan", "develop": "the code"})
+        self.assertEqual(reloaded.outputs(1), {"fix": "the fix"})
+        with open(os.path.join(self.directory, ".runs", ".gitignore")) as f:
+            self.assertEqual(f.read(), "*\n")
+
+    def test_only_unfinished_runs_are_resumable(self):
+        self.assertIsNone(self.journal.resumable())
+        self.journal.start("Add a greeting")
+        self.assertIsNotNone(self.journal.resumable())
+        self.journal.finish("failed", "Crew execution failed: timed out")
+        self.assertEqual(RunJournal(self.directory).resumable()["error"], "Crew execution failed: timed out")
+
+        self.assertEqual(self.journal.resume()["resumed"], 1)
+        self.journal.finish("completed")
+        self.assertIsNone(RunJournal(self.directory).resumable())
+
+    def test_start_replaces_the_previous_run(self):
+        self.journal.start("first")
+        self.journal.record_task("plan", 0, "old plan")
+        self.journal.start("second")
+        self.assertEqual(self.journal.outputs(0), {})
+
+    def test_unreadable_journal_is_ignored(self):
+        os.makedirs(os.path.join(self.directory, ".runs"))
+        with open(self.journal.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(self.journal.load())
+
+
+@patch('src.engine.LLM')
+@patch('src.engine.Task')
+@patch('src.engine.Agent')
+@patch('src.engine.Crew')
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.crews = []
+        self.fail_after = None
+
+    def make_engine(self, MockCrew, MockAgent, MockTask):
+        MockAgent.side_effect = lambda **kwargs: MagicMock(**kwargs)
+        MockTask.side_effect = lambda **kwargs: MagicMock(output=None, **kwargs)
+        MockCrew.side_effect = self.make_crew
+        engine = CrewEngine(project_name="test_project", init_git=False)
+        engine.journal = RunJournal(self.directory)
+        engine._save_files_from_text = MagicMock(side_effect=lambda text: ["app.py"] if "###" in text else [])
+        engine._update_memory = MagicMock()
+        engine._commit_changes = MagicMock()
+        engine._get_memory_context = MagicMock(return_value="Context")
+        return engine
+
+    def make_crew(self, **kwargs):
+        crew = MagicMock()
+        crew.tasks = kwargs["tasks"]
+        crew.kickoff.side_effect = lambda: self.kickoff(kwargs["tasks"], kwargs["task_callback"])
+        self.crews.append(crew)
+        return crew
+
+    def kickoff(self, tasks, task_callback):
+        """Runs the tasks like a sequential crew, timing out after fail_after of them."""
+        raw = None
+        for i, task in enumerate(tasks):
+            if i == self.fail_after:
+                raise TimeoutError("LLM request timed out")
+            raw = "APPROVED" if task.expected_output.startswith("Verdict") else f"### app.py\n{task.expected_output}"
+            task.output = TaskOutput(description=task.description, agent=task.agent.role, raw=raw)
+            task_callback(task.output)
+        return raw
+
+    def test_resume_continues_after_the_last_completed_task(self, MockCrew, MockAgent, MockTask, MockLLM):
+        engine = self.make_engine(MockCrew, MockAgent, MockTask)
+        self.fail_after = 2
+        result = engine.run("Add a greeting")
+
+        self.assertTrue(result.startswith("Crew execution failed"))
+        journal = engine.journal.resumable()
+        self.assertEqual([task["stage"] for task in journal["tasks"]], ["plan", "develop"])
+        self.assertEqual(journal["written_files"], ["app.py"])
+
+        self.fail_after = None
+        result = engine.resume_run()
+
+        self.assertEqual(result, "APPROVED")
+        resumed = self.crews[-1]
+        self.assertEqual(len(resumed.tasks), 4)
+        self.assertFalse(any(task.agent.role == "Product Manager" for task in resumed.tasks))
+        # The restored outputs are the context of the remaining tasks
+        plan = next(task for task in resumed.tasks[0].context if task.agent.role == "Product Manager")
+        self.assertEqual(plan.output.raw, journal["tasks"][0]["output"])
+        self.assertIsNone(engine.journal.resumable())
+        self.assertEqual(len(engine.journal.load()["tasks"]), 6)
+
+    def test_nothing_to_resume(self, MockCrew, MockAgent, MockTask, MockLLM):
+        engine = self.make_engine(MockCrew, MockAgent, MockTask)
+        self.assertIsNone(engine.resume_run())
+        engine.run("Add a greeting")
+        self.assertIsNone(engine.resume_run())
+        self.assertEqual(len(self.crews), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
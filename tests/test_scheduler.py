@@ -0,0 +1,75 @@
+import unittest
+import datetime
+from types import SimpleNamespace
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.scheduler import TaskGraph, format_timing_report
+
+def make_task(context=None):
+    return SimpleNamespace(context=context, async_execution=False, start_time=None, end_time=None)
+
+class TestTaskGraph(unittest.TestCase):
+    def setUp(self):
+        # Mirrors CrewEngine.run: QA works from the plan, runner needs dev and QA
+        self.plan = make_task([])
+        self.dev = make_task([self.plan])
+        self.qa = make_task([self.plan])
+        self.runner = make_task([self.dev, self.qa])
+        self.docs = make_task([self.plan, self.dev, self.runner])
+        self.review = make_task([self.plan, self.dev, self.qa, self.runner, self.docs])
+        self.tasks = [self.plan, self.dev, self.qa, self.runner, self.docs, self.review]
+        self.graph = TaskGraph(self.tasks, names=["plan", "develop", "test", "execute", "document", "review"])
+
+    def test_levels(self):
+        self.assertEqual(self.graph.levels(), [[0], [1, 2], [3], [4], [5]])
+
+    def test_schedule_marks_independent_tasks_async(self):
+        ordered = self.graph.schedule(max_parallel=2)
+
+        self.assertEqual(ordered, self.tasks)
+        self.assertEqual([t.async_execution for t in ordered], [False, True, True, False, False, False])
+
+    def test_schedule_respects_parallel_limit(self):
+        self.graph.schedule(max_parallel=1)
+        self.assertFalse(any(t.async_execution for t in self.tasks))
+
+    def test_group_without_following_barrier_keeps_last_task_sync(self):
+        root = make_task([])
+        a, b = make_task([root]), make_task([root])
+        graph = TaskGraph([root, a, b])
+        graph.schedule(max_parallel=4)
+        self.assertEqual([a.async_execution, b.async_execution], [True, False])
+
+    def test_missing_context_means_sequential(self):
+        first, second = make_task(), make_task()
+        self.assertEqual(TaskGraph([first, second]).levels(), [[0], [1]])
+
+    def test_timing_report(self):
+        t0 = datetime.datetime(2026, 1, 1, 12, 0, 0)
+        spans = {
+            "plan": (0, 10), "develop": (10, 40), "test": (10, 25),
+            "execute": (40, 50), "document": (50, 55), "review": (55, 60)
+        }
+        for task, name in zip(self.tasks, self.graph.names):
+            start, end = spans[name]
+            task.start_time = t0 + datetime.timedelta(seconds=start)
+            task.end_time = t0 + datetime.timedelta(seconds=end)
+
+        report = self.graph.timing_report()
+
+        self.assertEqual(report["wall_seconds"], 60.0)
+        self.assertEqual(report["sequential_seconds"], 75.0)
+        self.assertEqual(report["saved_seconds"], 15.0)
+        self.assertEqual(report["critical_path"], ["plan", "develop", "execute", "document", "review"])
+        self.assertEqual(report["critical_path_seconds"], 60.0)
+        self.assertIn("saved 15.0s", format_timing_report(report))
+
+    def test_timing_report_without_timings(self):
+        self.assertIsNone(self.graph.timing_report())
+
+if __name__ == '__main__':
+    unittest.main()
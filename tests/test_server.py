@@ -7,11 +7,13 @@ import unittest
 # Add root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.server import app
+from src.server import app, job_manager, engine_registry
+from src.locks import PROJECT_LOCK_REQUEST_WAIT, ProjectBusy
 
 class TestServer(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(app)
+        engine_registry.clear()
 
     @patch('src.server.CrewEngine')
     def test_message_endpoint(self, MockEngine):
@@ -31,7 +33,7 @@ class TestServer(unittest.TestCase):
             "project": "test_proj"
         })
         
-        mock_instance.process_message.assert_called_once_with("Hello")
+        mock_instance.process_message.assert_called_once_with("Hello", lock_timeout=PROJECT_LOCK_REQUEST_WAIT)
 
     @patch('src.server.CrewEngine')
     def test_run_endpoint(self, MockEngine):
@@ -51,12 +53,114 @@ class TestServer(unittest.TestCase):
             "project": "test_proj"
         })
 
+    @patch('src.server.CrewEngine')
+    def test_busy_project_is_rejected(self, MockEngine):
+        MockEngine.return_value.run.side_effect = ProjectBusy(
+            "projects/test_proj", {"purpose": "run: Other task", "since": "2026-01-01T10:00:00", "pid": 42}
+        )
+
+        response = self.client.post("/run", json={"project_name": "test_proj", "user_story": "Do task"})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("Project 'test_proj' is busy (run: Other task", response.json()["detail"])
+
+    @patch('src.server.CrewEngine')
+    def test_run_job_lifecycle(self, MockEngine):
+        mock_instance = MockEngine.return_value
+        mock_instance.run.return_value = "Task Done"
+
+        response = self.client.post("/jobs/run", json={
+            "project_name": "test_proj",
+            "user_story": "Do task"
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "queued")
+        job_id = response.json()["job_id"]
+
+        job_manager.get(job_id).future.result(timeout=5)
+
+        response = self.client.get(f"/jobs/{job_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "succeeded")
+        self.assertEqual(response.json()["result"], "Task Done")
+        args, kwargs = mock_instance.run.call_args
+        self.assertEqual(args, ("Do task",))
+        self.assertIn("progress_callback", kwargs)
+
+    @patch('src.server.CrewEngine')
+    def test_message_job(self, MockEngine):
+        mock_instance = MockEngine.return_value
+        mock_instance.process_message.return_value = "Hi there"
+
+        response = self.client.post("/jobs/message", json={
+            "project_name": "test_proj",
+            "message": "Hello"
+        })
+        job_id = response.json()["job_id"]
+        job_manager.get(job_id).future.result(timeout=5)
+
+        response = self.client.get("/jobs", params={"project_name": "test_proj"})
+        self.assertIn(job_id, [j["job_id"] for j in response.json()["jobs"]])
+        self.assertEqual(self.client.get(f"/jobs/{job_id}").json()["result"], "Hi there")
+
+    @patch('src.server.RunJournal')
+    @patch('src.server.CrewEngine')
+    def test_resume_job(self, MockEngine, MockJournal):
+        mock_instance = MockEngine.return_value
+        mock_instance.resume_run.return_value = "APPROVED"
+        MockJournal.return_value.resumable.return_value = None
+
+        response = self.client.post("/jobs/resume", json={"project_name": "test_proj"})
+        self.assertEqual(response.status_code, 404)
+
+        MockJournal.return_value.resumable.return_value = {"user_story": "Do task", "tasks": []}
+        response = self.client.post("/jobs/resume", json={"project_name": "test_proj"})
+        job_id = response.json()["job_id"]
+        job_manager.get(job_id).future.result(timeout=5)
+
+        job = self.client.get(f"/jobs/{job_id}").json()
+        self.assertEqual((job["kind"], job["result"]), ("resume", "APPROVED"))
+        MockJournal.assert_called_with(os.path.join("projects", "test_proj"))
+
+    @patch('src.server.CrewEngine')
+    def test_job_event_stream(self, MockEngine):
+        MockEngine.return_value.process_message.return_value = "Hi there"
+        job_id = self.client.post("/jobs/message", json={"project_name": "test_proj", "message": "Hello"}).json()["job_id"]
+        job_manager.get(job_id).future.result(timeout=5)
+
+        response = self.client.get(f"/jobs/{job_id}/events")
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        types = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        self.assertEqual((types[0], types[-1]), ("status", "done"))
+        self.assertIn('"result": "Hi there"', response.text)
+
+        resumed = self.client.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": str(len(types) - 1)})
+        self.assertEqual(resumed.text.count("event: "), 1)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get("/jobs/missing").status_code, 404)
+        self.assertEqual(self.client.get("/jobs/missing/events").status_code, 404)
+        self.assertEqual(self.client.delete("/jobs/missing").status_code, 404)
+
+    @patch('src.server.CrewEngine')
+    def test_engine_reused_across_requests(self, MockEngine):
+        mock_instance = MockEngine.return_value
+        mock_instance.process_message.return_value = "Hi"
+        mock_instance._get_memory_context.return_value = "Memory"
+
+        self.client.post("/message", json={"project_name": "test_proj", "message": "Hello"})
+        self.client.post("/message", json={"project_name": "test_proj", "message": "Again"})
+        response = self.client.get("/projects/test_proj/memory")
+
+        self.assertEqual(response.json(), {"memory": "Memory"})
+        MockEngine.assert_called_once_with(project_name="test_proj", init_git=False)
+
     @patch('os.listdir')
     @patch('os.path.exists')
     @patch('os.path.isdir')
     def test_list_projects(self, mock_isdir, mock_exists, mock_listdir):
         mock_exists.return_value = True
-        mock_listdir.return_value = ["proj1", "proj2"]
+        mock_listdir.return_value = ["proj1", ".llm_cache", "proj2"]
         mock_isdir.return_value = True
         
         response = self.client.get("/projects")
@@ -71,7 +175,19 @@ class TestServer(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['status'], "success")
-        MockEngine.assert_called_with(project_name="new_proj", init_git=True, remote_url=None)
+        MockEngine.assert_called_with(project_name="new_proj", init_git=True, remote_url=None,
+                                      lock_timeout=PROJECT_LOCK_REQUEST_WAIT)
+
+        MockEngine.side_effect = ProjectBusy("projects/new_proj", {"purpose": "run: Add a cart"})
+        response = self.client.post("/projects", json={"project_name": "new_proj", "init_git": True})
+        self.assertEqual(response.status_code, 409)
+
+    def test_metrics_endpoint(self):
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("# TYPE agent_orchestrator_llm_calls_total counter", response.text)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.syntax_checker import SyntaxChecker, check_source
+from src.tools import SyntaxCheckTool
+
+
+class TestSyntaxChecker(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        SyntaxChecker._cache.clear()
+
+    def write(self, path, content):
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w') as f:
+            f.write(content)
+
+    def test_flake8_compatible_messages(self):
+        issues = check_source("import os\ndef f( x ):\n    return undefined + x\n", "a.py")
+        self.assertEqual([issue.format("a.py") for issue in issues], [
+            "a.py:1:1: F401 'os' imported but unused",
+            "a.py:2:1: E302 expected 2 blank lines, found 0",
+            "a.py:2:7: E201 whitespace after '('",
+            "a.py:2:9: E202 whitespace before ')'",
+            "a.py:3:12: F821 undefined name 'undefined'"
+        ])
+
+    def test_syntax_error(self):
+        issues = check_source("def f(:\n    pass\n")
+        self.assertEqual(len(issues), 1)
+        self.assertEqual((issues[0].line, issues[0].col, issues[0].code), (1, 8, "E999"))
+
+    def test_noqa_and_config(self):
+        source = "import os  # noqa\nimport re  # noqa: E501\nx = '" + "a" * 80 + "'\n"
+        codes = [issue.code for issue in check_source(source)]
+        self.assertEqual(codes, ["F401", "E501"])
+
+        self.write("setup.cfg", "[flake8]\nmax-line-length = 120\nextend-ignore = F401\n")
+        self.write("a.py", source)
+        self.assertEqual(SyntaxChecker(self.root).check(["a.py"])["a.py"], [])
+
+    def test_expand_files_globs_and_directories(self):
+        self.write("main.py", "x = 1\n")
+        self.write("pkg/util.py", "y = 2\n")
+        self.write("pkg/notes.txt", "")
+        self.write("venv/lib.py", "")
+        checker = SyntaxChecker(self.root)
+
+        self.assertEqual(checker.expand("main.py, pkg/util.py"), (["main.py", "pkg/util.py"], []))
+        self.assertEqual(checker.expand("**/*.py")[0], ["main.py", "pkg/util.py", "venv/lib.py"])
+        self.assertEqual(checker.expand(".")[0], ["main.py", "pkg/util.py"])
+        self.assertEqual(checker.expand("main.py gone.py"), (["main.py"], ["gone.py"]))
+        with self.assertRaises(ValueError):
+            checker.expand("../outside.py")
+
+    def test_globs_stay_inside_the_project(self):
+        outside = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside, ignore_errors=True)
+        with open(os.path.join(outside, "secret.py"), 'w') as f:
+            f.write("key = 1\n")
+        self.write("main.py", "x = 1\n")
+        checker = SyntaxChecker(self.root)
+
+        pattern = os.path.join("..", os.path.basename(outside), "*.py")
+        self.assertEqual(checker.expand(pattern), ([], [pattern]))
+        # Leaving the project and coming back in is fine
+        self.assertEqual(checker.expand(os.path.join("..", os.path.basename(self.root), "*.py"))[0], ["main.py"])
+
+    def test_unchanged_content_is_served_from_cache(self):
+        self.write("a.py", "import os\n")
+        checker = SyntaxChecker(self.root)
+        with patch('src.syntax_checker.check_source', wraps=check_source) as mock_check:
+            checker.check(["a.py"])
+            checker.check(["a.py"])
+            self.assertEqual(mock_check.call_count, 1)
+            self.assertEqual((checker.hits, checker.misses), (1, 1))
+
+            self.write("a.py", "import os\nos.getcwd()\n")
+            self.assertEqual(checker.check(["a.py"])["a.py"], [])
+            self.assertEqual(mock_check.call_count, 2)
+
+    def test_tool_output(self):
+        self.write("good.py", "x = 1\n")
+        self.write("bad.py", "import os\n")
+        tool = SyntaxCheckTool(working_dir=self.root)
+
+        self.assertEqual(tool._run("good.py"), "No syntax errors found.")
+        self.assertEqual(tool._run("missing.py"), "Error: File 'missing.py' not found.")
+        output = tool._run("good.py bad.py")
+        self.assertTrue(output.startswith("Syntax/Style Issues:\n"))
+        self.assertIn("bad.py:1:1: F401 'os' imported but unused", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
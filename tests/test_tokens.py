@@ -0,0 +1,24 @@
+import unittest
+import sys
+import os
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tokens import count_tokens, truncate_to_tokens
+
+class TestTokens(unittest.TestCase):
+    def test_count_tokens(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertEqual(count_tokens("the cat sat ."), 4)
+        self.assertGreater(count_tokens("internationalization"), 1)
+
+    def test_truncate_to_tokens(self):
+        text = "word " * 100
+        truncated = truncate_to_tokens(text, 20)
+        self.assertLessEqual(count_tokens(truncated), 20)
+        self.assertTrue(truncated.endswith("[truncated]"))
+        self.assertEqual(truncate_to_tokens("short", 20), "short")
+
+if __name__ == '__main__':
+    unittest.main()
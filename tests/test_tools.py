@@ -1,22 +1,23 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import sys
 import os
+import shutil
+import tempfile
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.tools import CodeExecutionTool
+from src.process_runner import ProcessResult
 
 class TestCodeExecutionTool(unittest.TestCase):
     def setUp(self):
-        self.tool = CodeExecutionTool(working_dir=".")
+        self.tool = CodeExecutionTool(working_dir=".", use_warm_workers=False)
 
-    @patch('subprocess.run')
+    @patch('src.tools.run_command')
     def test_run_pytest(self, mock_run):
-        mock_run.return_value.returncode = 0
-        mock_run.return_value.stdout = "Tests passed"
-        mock_run.return_value.stderr = ""
+        mock_run.return_value = ProcessResult(0, "Tests passed", "", 0.5)
         
         output = self.tool._run("pytest")
         
@@ -26,18 +27,106 @@ class TestCodeExecutionTool(unittest.TestCase):
         mock_run.assert_called_once()
         args = mock_run.call_args
         self.assertEqual(args[0][0], "pytest")
+        self.assertEqual(args[0][1], ".")
 
-    @patch('subprocess.run')
+    @patch('src.tools.run_command')
+    def test_failed_tests_are_recorded_from_pytest_output(self, mock_run):
+        mock_run.return_value = ProcessResult(1, "FAILED tests/test_a.py::test_x - assert 1 == 2\n1 failed", "", 0.5)
+        self.tool._run("python -m pytest tests")
+        self.assertEqual(self.tool.failed_tests, ["tests/test_a.py::test_x"])
+
+        mock_run.return_value = ProcessResult(0, "hello", "", 0.1)
+        self.tool._run("python main.py")  # not a test run
+        self.assertEqual(self.tool.failed_tests, ["tests/test_a.py::test_x"])
+
+        mock_run.return_value = ProcessResult(0, "1 passed", "", 0.1)
+        self.tool._run("pytest tests/test_a.py::test_x")
+        self.assertEqual(self.tool.failed_tests, [])
+
+    @patch('src.tools.run_command')
     def test_run_blocked_command(self, mock_run):
         output = self.tool._run("rm -rf /")
         self.assertIn("Error: Only 'python', 'pytest', or 'pip' commands are allowed", output)
         mock_run.assert_not_called()
 
-    @patch('subprocess.run')
+    @patch('src.tools.run_command')
     def test_run_error(self, mock_run):
         mock_run.side_effect = Exception("Boom")
         output = self.tool._run("python script.py")
         self.assertIn("Execution Execution Error: Boom", output)
 
+    @patch('src.tools.run_command')
+    def test_run_reports_timeout_and_truncation(self, mock_run):
+        mock_run.return_value = ProcessResult(-9, "tick", "", 120.0, timed_out=True, truncated=True)
+
+        output = self.tool._run("python loop.py")
+
+        self.assertIn("TIMEOUT: the command was killed after 120s", output)
+        self.assertIn("only its start and end are shown", output)
+
+    @patch('src.tools.run_command')
+    @patch('src.tools.get_worker_pool')
+    def test_run_uses_warm_worker(self, mock_get_pool, mock_run):
+        mock_pool = MagicMock()
+        mock_pool.run.return_value = MagicMock(
+            returncode=1, stdout="1 failed", stderr="", seconds=0.12, startup_saved=0.9,
+            timed_out=False, truncated=False
+        )
+        mock_get_pool.return_value = mock_pool
+        tool = CodeExecutionTool(working_dir=".")
+
+        output = tool._run("pytest -q")
+
+        self.assertIn("Exit Code: 1", output)
+        self.assertIn("Timing: 0.12s (warm worker, ~0.90s startup saved)", output)
+        self.assertEqual(mock_pool.run.call_args[0][:2], (".", "pytest -q"))
+        mock_run.assert_not_called()
+
+    @patch('src.tools.run_command')
+    @patch('src.tools.get_worker_pool')
+    def test_pip_runs_cold_and_invalidates_worker(self, mock_get_pool, mock_run):
+        mock_pool = MagicMock()
+        mock_pool.run.return_value = None
+        mock_get_pool.return_value = mock_pool
+        mock_run.return_value = ProcessResult(0, "Installed", "", 1.0)
+
+        output = CodeExecutionTool(working_dir=".")._run("pip install requests")
+
+        self.assertIn("(cold subprocess)", output)
+        mock_pool.invalidate.assert_called_once_with(".")
+
+    @patch('src.tools.run_command')
+    def test_long_output_is_condensed_and_logged(self, mock_run):
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        stdout = (
+            "=================================== FAILURES ===================================\n"
+            "___________________________________ test_add ___________________________________\n"
+            + "    noise\n" * 500
+            + ">       assert add(1, 2) == 3\n"
+            "E       assert 2 == 3\n"
+            "\n"
+            "tests/test_calc.py:6: AssertionError\n"
+            "=========================== short test summary info ============================\n"
+            "FAILED tests/test_calc.py::test_add - assert 2 == 3\n"
+            "1 failed in 0.05s\n"
+        )
+        mock_run.return_value = ProcessResult(1, stdout, "", 0.5)
+        tool = CodeExecutionTool(working_dir=".", use_warm_workers=False, log_dir=log_dir)
+
+        output = tool._run("pytest")
+
+        self.assertIn("Exit Code: 1", output)
+        self.assertIn("FAILED tests/test_calc.py::test_add", output)
+        self.assertIn("E       assert 2 == 3", output)
+        self.assertNotIn("noise", output)
+        log_path = output.split("Captured output: ")[1].splitlines()[0]
+        with open(log_path) as f:
+            self.assertEqual(f.read().count("noise"), 500)
+
+        # Short output is returned as is
+        mock_run.return_value = ProcessResult(0, "1 passed", "", 0.5)
+        self.assertIn("STDOUT:\n1 passed", tool._run("pytest"))
+
 if __name__ == '__main__':
     unittest.main()
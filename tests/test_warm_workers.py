@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.warm_workers import WarmWorker, WarmWorkerPool, warm_argv
+from src.warm_worker_process import _execute
+
+
+class TestWarmArgv(unittest.TestCase):
+    def test_eligible_commands(self):
+        self.assertEqual(warm_argv("pytest -q tests/test_a.py::test_x[1]"), ["pytest", "-q", "tests/test_a.py::test_x[1]"])
+        self.assertEqual(warm_argv("python -m pytest -x"), ["python", "-m", "pytest", "-x"])
+        self.assertEqual(warm_argv("python3 main.py --name 'a b'"), ["python", "main.py", "--name", "a b"])
+
+    def test_commands_that_run_cold(self):
+        for command in ("pip install x", "python -m pip install x", "python -c 'print(1)'",
+                        "pytest | tee log", "python main.py > out.txt", "pytest tests/*.py", "python", ""):
+            self.assertIsNone(warm_argv(command), command)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "warm workers need fork()")
+class TestWarmWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.pool = WarmWorkerPool(max_workers=1)
+        self.addCleanup(self.pool.shutdown)
+        self.write("calc.py", "def add(a, b):\n    return a + b\n")
+        self.write("test_calc.py", "from calc import add\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+
+    def write(self, name, content):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(content)
+
+    def test_runs_pytest_and_sees_changed_modules(self):
+        result = self.pool.run(self.root, "python -m pytest -q")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("1 passed", result.stdout)
+        self.assertNotIn("warning", result.stdout)
+
+        self.write("calc.py", "def add(a, b):\n    return a - b\n")
+        result = self.pool.run(self.root, "python -m pytest -q")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("1 failed", result.stdout)
+
+    def test_runs_scripts_with_arguments(self):
+        self.write("main.py", "import sys\nprint('args', sys.argv[1:])\nsys.exit(3)\n")
+        result = self.pool.run(self.root, "python main.py a b")
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout, "args ['a', 'b']\n")
+        self.assertGreater(result.startup_saved, 0)
+
+    def test_timeout_kills_the_run(self):
+        self.write("slow.py", "import time\ntime.sleep(30)\n")
+        result = self.pool.run(self.root, "python slow.py", timeout=0.5)
+        self.assertTrue(result.timed_out)
+        self.assertLess(result.seconds, 5)
+
+    def test_output_is_capped_while_the_command_runs(self):
+        self.write("noisy.py", "import sys\nfor _ in range(2000):\n    sys.stdout.write('x' * 5000)\nprint('end')\n")
+        result = self.pool.run(self.root, "python noisy.py", max_output=1000)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(result.truncated)
+        self.assertLess(len(result.stdout), 1100)
+        self.assertIn("bytes omitted", result.stdout)
+        self.assertTrue(result.stdout.endswith("end\n"))
+
+    def test_project_module_shadowing_a_worker_import(self):
+        self.write("json.py", "value = 'local'\n")
+        self.write("main.py", "import json\nprint(json.value)\n")
+        result = self.pool.run(self.root, "python main.py")
+        self.assertEqual(result.stdout, "local\n")
+
+    def test_ineligible_command_returns_none(self):
+        self.assertIsNone(self.pool.run(self.root, "pip list"))
+
+    def test_incomplete_argv_fails_cleanly(self):
+        for argv in ([], ["python"], ["python", "-m"]):
+            with self.assertRaises(SystemExit):
+                _execute(argv, self.root, list(sys.path))
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "warm workers need fork()")
+class TestUnsafeDependencies(unittest.TestCase):
+    """Dependencies (outside the project, on PYTHONPATH) that a worker must not or cannot preload."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.site = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.site, ignore_errors=True)
+        env = patch.dict(os.environ, {"PYTHONPATH": self.site})
+        env.start()
+        self.addCleanup(env.stop)
+        self.pool = WarmWorkerPool()
+        self.addCleanup(self.pool.shutdown)
+        self.write(self.site, "threaddep.py", "import threading, time\nthreading.Thread(target=time.sleep, args=(60,), daemon=True).start()\n")
+        self.write(self.site, "hangdep.py", "import time\ntime.sleep(60)\n")
+        self.write(self.site, "limitdep.py",
+                   "import os, resource\nwith open(os.environ['LIMIT_FILE'], 'a') as f:\n"
+                   "    f.write(f'{os.getpid()} {resource.getrlimit(resource.RLIMIT_AS)[0]}\\n')\n")
+
+    def write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+
+    def test_threads_at_import_run_cold_until_files_change(self):
+        self.write(self.root, "main.py", "import threaddep\n")
+        self.assertIsNone(self.pool.run(self.root, "python main.py"))
+
+        # No new worker (and its startup) for every later command
+        with patch.object(WarmWorker, "start", side_effect=AssertionError("worker restarted")):
+            self.assertIsNone(self.pool.run(self.root, "python main.py"))
+
+        self.write(self.root, "main.py", "print('no threads')\n")
+        self.assertEqual(self.pool.run(self.root, "python main.py").stdout, "no threads\n")
+
+    def test_hanging_import_does_not_block_the_caller(self):
+        self.write(self.root, "main.py", "print('hi')\n")
+        self.assertIsNotNone(self.pool.run(self.root, "python main.py"))
+        with patch('src.warm_workers.WARM_WORKER_STARTUP_TIMEOUT', 1):
+            self.write(self.root, "main.py", "import hangdep\n")
+            start = time.monotonic()
+            self.assertIsNone(self.pool.run(self.root, "python main.py", timeout=0.5))
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertIn(os.path.abspath(self.root), self.pool._unsafe)
+
+    def test_preload_runs_under_the_command_limits(self):
+        limit_file = os.path.join(self.site, "limit.txt")
+        self.write(self.root, "main.py", "import limitdep\n")
+        limit = 3 * 1024 * 1024 * 1024
+        with patch.dict(os.environ, {"LIMIT_FILE": limit_file}):
+            self.pool.run(self.root, "python main.py", limits={"RLIMIT_AS": limit})
+        with open(limit_file) as f:
+            imports = [line.split() for line in f.read().splitlines()]
+        # Imported once, by the worker's preload; the command's child reuses it
+        self.assertEqual([int(rlimit) for _, rlimit in imports], [limit])
+
+
+if __name__ == '__main__':
+    unittest.main()